@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Data Watcher
+Watches the data directory and syncs only the edited records to Notion
+"""
+
+import json
+import time
+from pathlib import Path
+
+# inotify is optional; without it the watcher falls back to polling mtimes
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+import notion_data_populator as populator
+from validate_data import DataValidator
+
+DATA_DIR = Path("data")
+
+# Data file -> record kind (also the top-level key inside the file)
+DATA_FILES = {
+    "learning_modules.json": "modules",
+    "resources.json": "resources",
+    "projects.json": "projects"
+}
+
+def load_records(filename):
+    """Parse a data file into an id -> record map, or None if it is not valid JSON yet"""
+    path = DATA_DIR / filename
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        print(f"⚠️ {filename} is missing, waiting for it to come back...")
+        return None
+    except json.JSONDecodeError as e:
+        print(f"⚠️ {filename} is not valid JSON yet ({e}), waiting for the next save...")
+        return None
+
+    kind = DATA_FILES[filename]
+    return {record["id"]: record for record in data.get(kind, []) if record.get("id")}
+
+def diff_records(old, new):
+    """Compare two id -> record maps and return (added, changed, removed) ids"""
+    added = [record_id for record_id in new if record_id not in old]
+    removed = [record_id for record_id in old if record_id not in new]
+    changed = [record_id for record_id in new if record_id in old and new[record_id] != old[record_id]]
+    return added, changed, removed
+
+class InotifySource:
+    """Reports changed data files using inotify"""
+
+    def __init__(self):
+        self.inotify = INotify()
+        watch_flags = flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE | flags.DELETE
+        self.inotify.add_watch(str(DATA_DIR), watch_flags)
+
+    def wait(self, timeout):
+        """Block up to timeout seconds and return the names of changed data files"""
+        events = self.inotify.read(timeout=None if timeout is None else int(timeout * 1000))
+        return {event.name for event in events if event.name in DATA_FILES}
+
+class PollingSource:
+    """Reports changed data files by polling their modification times"""
+
+    def __init__(self, poll_interval):
+        self.poll_interval = poll_interval
+        self.stamps = self._stamps()
+
+    def _stamps(self):
+        stamps = {}
+        for filename in DATA_FILES:
+            path = DATA_DIR / filename
+            stamps[filename] = (path.stat().st_mtime_ns, path.stat().st_size) if path.exists() else None
+        return stamps
+
+    def wait(self, timeout):
+        """Block up to timeout seconds and return the names of changed data files"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            stamps = self._stamps()
+            changed = {name for name in stamps if stamps[name] != self.stamps[name]}
+            self.stamps = stamps
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.poll_interval)
+
+def wait_for_burst(source, debounce):
+    """Wait for a change, then keep collecting until the files are quiet for `debounce` seconds"""
+    changed = source.wait(None)
+    while True:
+        more = source.wait(debounce)
+        if not more:
+            return changed
+        changed |= more
+
+def sync_file(filename, snapshot, validator, page_ids):
+    """Validate and push the records of one file that differ from the snapshot"""
+    kind = DATA_FILES[filename]
+    records = load_records(filename)
+    if records is None:
+        return
+
+    previous = snapshot[filename]
+    added, changed, removed = diff_records(previous, records)
+    if not (added or changed or removed):
+        return
+
+    print(f"\n📝 {filename}: {len(added)} added, {len(changed)} changed, {len(removed)} removed")
+
+    for record_id in added + changed:
+        record = records[record_id]
+        validator.errors, validator.warnings = [], []
+        valid = validator.validate_record(kind, record)
+        for warning in validator.warnings:
+            print(f"  ⚠️ {warning}")
+        if not valid:
+            for error in validator.errors:
+                print(f"  ❌ {error}")
+            continue
+
+        try:
+            if record_id in previous:
+                populator.update_record(kind, record, page_ids)
+                print(f"  🔄 Updated: {record['name']}")
+            else:
+                populator.create_record(kind, record, page_ids)
+                print(f"  ✅ Added: {record['name']}")
+            previous[record_id] = record
+        except Exception as e:
+            print(f"  ❌ Failed to sync {record['name']}: {e}")
+
+    for record_id in removed:
+        try:
+            populator.archive_record(kind, record_id, page_ids)
+            print(f"  🗑️ Archived: {previous[record_id]['name']}")
+            del previous[record_id]
+        except Exception as e:
+            print(f"  ❌ Failed to archive {record_id}: {e}")
+
+def watch(debounce=1.0, poll_interval=1.0):
+    """Watch data/*.json and sync added, changed and removed records as files are saved"""
+    print("👀 Watching data directory for changes...")
+    print("=" * 60)
+
+    if INotify is not None:
+        source = InotifySource()
+        print("📡 Using inotify")
+    else:
+        source = PollingSource(poll_interval)
+        print(f"⏱️ inotify_simple not installed, polling every {poll_interval}s")
+
+    # Records failing validation or the write stay at their old snapshot value,
+    # so the next save of that file retries them
+    snapshot = {filename: load_records(filename) or {} for filename in DATA_FILES}
+    validator = DataValidator()
+
+    try:
+        while True:
+            changed_files = wait_for_burst(source, debounce)
+            # Page writes go straight to the state store, so re-read it to see pages other runs created
+            page_ids = populator.load_page_ids()
+            for filename in sorted(changed_files):
+                sync_file(filename, snapshot, validator, page_ids)
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+
+if __name__ == "__main__":
+    watch()
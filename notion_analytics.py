@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Notion Learning Tracker Analytics
+Computes progress analytics from the JSON data or the local mirror and renders them as blocks
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+import notion_mirror
+
+COMPLETED_STATUS = "Completed"
+
+# Module field -> Learning Modules property (mirror column)
+MODULE_COLUMNS = {
+    "category": "Category",
+    "phase": "Phase",
+    "status": "Status",
+    "estimated_hours": "Estimated Hours",
+    "actual_hours": "Actual Hours"
+}
+
+# Reflection field -> candidate mirror columns (workspace spec name first, then the sample data name)
+REFLECTION_COLUMNS = {
+    "week": ("Week Start Date", "Week Date"),
+    "hours": ("Total Study Hours", "Hours Studied")
+}
+CONFIDENCE_AREAS = {
+    "Backend": ("Backend Confidence", "Confidence - Backend"),
+    "Database": ("Database Confidence", "Confidence - Database"),
+    "System Design": ("System Design Confidence", "Confidence - System Design"),
+    "AI/ML": ("AI/ML Confidence", "Confidence - AI/ML")
+}
+
+# Weeks are counted from a Monday so that a streak means consecutive calendar weeks
+EPOCH_MONDAY = np.datetime64("1970-01-05")
+
+def load_modules_from_json(path=Path("data") / "learning_modules.json"):
+    """Load module records from the JSON data"""
+    with open(path, "r") as f:
+        return json.load(f).get("modules", [])
+
+def load_modules_from_mirror(conn):
+    """Load module records from the local mirror"""
+    return [{field: row.get(column) for field, column in MODULE_COLUMNS.items()}
+            for row in notion_mirror.read_pages(conn, "learning_modules")]
+
+def first_column(row, columns):
+    """Return the value of the first candidate column present in a row"""
+    for column in columns:
+        if row.get(column) is not None:
+            return row[column]
+    return None
+
+def confidence_value(value):
+    """Read a confidence rating from a number or a select such as '4 - Advanced'"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str) and value[:1].isdigit():
+        return float(value.split()[0])
+    return np.nan
+
+def load_reflections_from_mirror(conn):
+    """Load weekly reflections from the local mirror"""
+    reflections = []
+    for row in notion_mirror.read_pages(conn, "weekly_reflections"):
+        week = first_column(row, REFLECTION_COLUMNS["week"])
+        if not week:
+            continue
+        reflections.append({
+            "week": week[:10],
+            "hours": first_column(row, REFLECTION_COLUMNS["hours"]),
+            "confidence": {area: confidence_value(first_column(row, columns))
+                           for area, columns in CONFIDENCE_AREAS.items()}
+        })
+    return reflections
+
+def group_totals(labels, estimated, actual, completed):
+    """Per-label module counts, completion and hours, aggregated with bincount"""
+    names, inverse = np.unique(labels, return_inverse=True)
+    size = len(names)
+    modules = np.bincount(inverse, minlength=size)
+    done = np.bincount(inverse, weights=completed, minlength=size)
+    estimated_hours = np.bincount(inverse, weights=estimated, minlength=size)
+    actual_hours = np.bincount(inverse, weights=np.nan_to_num(actual), minlength=size)
+    return [
+        {
+            "name": str(names[i]),
+            "modules": int(modules[i]),
+            "completed": int(done[i]),
+            "completion": float(done[i] / modules[i] * 100),
+            "estimated_hours": float(estimated_hours[i]),
+            "actual_hours": float(actual_hours[i])
+        }
+        for i in range(size)
+    ]
+
+def module_analytics(modules):
+    """Completion, hours per phase and category, and the estimated-vs-actual ratio"""
+    if not modules:
+        return {"modules": 0, "completed": 0, "completion": 0.0, "estimate_ratio": None,
+                "by_phase": [], "by_category": []}
+
+    phase = np.array([m.get("phase") or "Unassigned" for m in modules], dtype=str)
+    category = np.array([m.get("category") or "Uncategorized" for m in modules], dtype=str)
+    status = np.array([m.get("status") or "" for m in modules], dtype=str)
+    estimated = np.array([m.get("estimated_hours") or 0 for m in modules], dtype=float)
+    actual = np.array([np.nan if m.get("actual_hours") is None else m["actual_hours"] for m in modules], dtype=float)
+    completed = (status == COMPLETED_STATUS).astype(float)
+
+    # Only modules with both numbers logged say anything about estimation accuracy
+    tracked = ~np.isnan(actual) & (actual > 0) & (estimated > 0)
+    estimate_ratio = float(actual[tracked].sum() / estimated[tracked].sum()) if tracked.any() else None
+
+    return {
+        "modules": len(modules),
+        "completed": int(completed.sum()),
+        "completion": float(completed.mean() * 100),
+        "estimate_ratio": estimate_ratio,
+        "by_phase": group_totals(phase, estimated, actual, completed),
+        "by_category": group_totals(category, estimated, actual, completed)
+    }
+
+def reflection_analytics(reflections, today=None):
+    """Study streaks, weekly hours and confidence trends from weekly reflections"""
+    empty = {"weeks": 0, "current_streak": 0, "longest_streak": 0, "total_hours": 0.0,
+             "recent_weekly_hours": None, "confidence": []}
+    if not reflections:
+        return empty
+
+    days = np.array([r["week"] for r in reflections], dtype="datetime64[D]")
+    order = np.argsort(days)
+    week_numbers = ((days[order] - EPOCH_MONDAY).astype(int)) // 7
+    hours = np.array([np.nan if r.get("hours") is None else r["hours"] for r in reflections], dtype=float)[order]
+
+    # Streaks are runs of consecutive calendar weeks with at least one reflection
+    weeks, inverse = np.unique(week_numbers, return_inverse=True)
+    breaks = np.flatnonzero(np.diff(weeks) != 1)
+    run_lengths = np.diff(np.concatenate(([0], breaks + 1, [len(weeks)])))
+    this_week = (np.datetime64(today or date.today(), "D") - EPOCH_MONDAY).astype(int) // 7
+    current_streak = int(run_lengths[-1]) if weeks[-1] >= this_week - 1 else 0
+
+    weekly_hours = np.bincount(inverse, weights=np.nan_to_num(hours), minlength=len(weeks))
+    confidence = []
+    for area in CONFIDENCE_AREAS:
+        values = np.array([r["confidence"].get(area, np.nan) for r in reflections], dtype=float)[order]
+        logged = ~np.isnan(values)
+        if not logged.any():
+            continue
+        x, y = week_numbers[logged], values[logged]
+        slope = float(np.polyfit(x, y, 1)[0]) if len(np.unique(x)) > 1 else 0.0
+        confidence.append({"area": area, "latest": float(y[-1]), "trend": slope, "entries": int(logged.sum())})
+
+    return {
+        "weeks": len(weeks),
+        "current_streak": current_streak,
+        "longest_streak": int(run_lengths.max()),
+        "total_hours": float(np.nansum(hours)),
+        "recent_weekly_hours": float(weekly_hours[-4:].mean()),
+        "confidence": confidence
+    }
+
+def compute(source="auto", mirror_path=notion_mirror.MIRROR_DB, today=None):
+    """Compute all analytics; "auto" prefers the local mirror when it has been pulled"""
+    conn = None
+    if source == "mirror" or (source == "auto" and os.path.exists(mirror_path)):
+        conn = notion_mirror.connect(mirror_path)
+
+    modules = load_modules_from_mirror(conn) if conn else []
+    used = "mirror"
+    if not modules and source != "mirror":
+        modules = load_modules_from_json()
+        used = "json"
+    reflections = load_reflections_from_mirror(conn) if conn else []
+
+    report = {"source": used}
+    report.update(module_analytics(modules))
+    report["reflections"] = reflection_analytics(reflections, today=today)
+    return report
+
+def format_hours(hours):
+    """Format an hour total without trailing zeros"""
+    return f"{hours:,.1f}".rstrip("0").rstrip(".")
+
+def format_trend(trend):
+    """Format a weekly confidence slope as the change over four weeks"""
+    return f"{round(trend * 4, 2) + 0.0:+.2f}"
+
+def text(content, bold=False):
+    """Build a rich text item"""
+    item = {"type": "text", "text": {"content": content}}
+    if bold:
+        item["annotations"] = {"bold": True}
+    return item
+
+def heading_block(content):
+    """Build a heading_3 block"""
+    return {"object": "block", "type": "heading_3", "heading_3": {"rich_text": [text(content)]}}
+
+def callout_block(rich_text, emoji):
+    """Build a callout block"""
+    return {"object": "block", "type": "callout", "callout": {"rich_text": rich_text, "icon": {"emoji": emoji}}}
+
+def table_block(header, rows):
+    """Build a table block with a header row"""
+    return {
+        "object": "block",
+        "type": "table",
+        "table": {
+            "table_width": len(header),
+            "has_column_header": True,
+            "has_row_header": False,
+            "children": [
+                {"object": "block", "type": "table_row", "table_row": {"cells": [[text(cell)] for cell in cells]}}
+                for cells in [header] + rows
+            ]
+        }
+    }
+
+def group_table(label, groups):
+    """Render per-phase or per-category totals as a table"""
+    rows = [[g["name"], str(g["modules"]), str(g["completed"]), f"{g['completion']:.0f}%",
+             format_hours(g["estimated_hours"]), format_hours(g["actual_hours"])] for g in groups]
+    return table_block([label, "Modules", "Completed", "Completion", "Estimated h", "Actual h"], rows)
+
+def analytics_blocks(report):
+    """Render an analytics report as callouts and tables"""
+    reflections = report["reflections"]
+    ratio = report["estimate_ratio"]
+    summary = [
+        text("Completion: ", bold=True),
+        text(f"{report['completion']:.0f}% ({report['completed']} of {report['modules']} modules)\n"),
+        text("Actual vs. estimated hours: ", bold=True),
+        text(f"{ratio:.2f}×\n" if ratio is not None else "no actual hours logged yet\n"),
+        text("Study streak: ", bold=True),
+        text(f"{reflections['current_streak']} weeks (longest {reflections['longest_streak']}, "
+             f"{reflections['weeks']} weeks reflected)")
+    ]
+    blocks = [
+        callout_block(summary, "🧮"),
+        heading_block("Hours by Phase"),
+        group_table("Phase", report["by_phase"]),
+        heading_block("Hours by Category"),
+        group_table("Category", report["by_category"]),
+        heading_block("Confidence Trends")
+    ]
+
+    if reflections["confidence"]:
+        rows = [[c["area"], f"{c['latest']:g}", format_trend(c['trend']), str(c["entries"])]
+                for c in reflections["confidence"]]
+        blocks.append(table_block(["Area", "Latest", "Trend / 4 weeks", "Entries"], rows))
+        weakest = min(reflections["confidence"], key=lambda c: (c["latest"], c["trend"]))
+        blocks.append(callout_block([
+            text("Focus next: ", bold=True),
+            text(f"{weakest['area']} (confidence {weakest['latest']:g}, trend {format_trend(weakest['trend'])} per 4 weeks)")
+        ], "🎯"))
+    else:
+        blocks.append(callout_block([text("No weekly reflections in the local mirror yet - "
+                                          "run 'python notion_mirror.py pull' after logging a week.")], "📝"))
+    return blocks
+
+def print_report(report):
+    """Print an analytics report"""
+    reflections = report["reflections"]
+    print(f"📚 Modules: {report['modules']} ({report['completion']:.0f}% complete, source: {report['source']})")
+    ratio = report["estimate_ratio"]
+    print(f"⏱️ Actual vs. estimated hours: {f'{ratio:.2f}x' if ratio is not None else 'n/a'}")
+    for key, label in (("by_phase", "Phase"), ("by_category", "Category")):
+        print(f"\n{label}:")
+        for g in report[key]:
+            print(f"   {g['name']}: {g['completed']}/{g['modules']} completed ({g['completion']:.0f}%), "
+                  f"{format_hours(g['estimated_hours'])}h estimated, {format_hours(g['actual_hours'])}h actual")
+    print(f"\n🔥 Streak: {reflections['current_streak']} weeks (longest {reflections['longest_streak']})")
+    for c in reflections["confidence"]:
+        print(f"   {c['area']}: {c['latest']:g} ({format_trend(c['trend'])} per 4 weeks)")
+
+def main(argv=None):
+    """Command line entry point: compute and print the analytics"""
+    parser = argparse.ArgumentParser(description="Compute learning analytics locally")
+    parser.add_argument("--source", choices=["auto", "json", "mirror"], default="auto",
+                        help="Read modules from the JSON data or the local mirror (default: mirror if pulled)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    report = compute(args.source)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+        print(f"\n⚡ Computed in {elapsed:.1f} ms")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
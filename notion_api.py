@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Notion Learning Tracker API Client
+Rate-limited Notion client shared by all scripts, with optional per-request tracing
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import time
+import atexit
+import hashlib
+import weakref
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import httpx
+from notion_client import Client
+from notion_client.errors import APIResponseError, HTTPResponseError
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:
+    # No flock (Windows): each client keeps its own budget
+    fcntl = None
+
+# Load environment variables
+load_dotenv()
+
+# Notion allows an average of three requests per second per integration
+DEFAULT_RATE = 3.0
+DEFAULT_BURST = 3
+
+# Tracing is switched on from the environment, so no script needs changing:
+# NOTION_TRACE_FILE writes one JSON line per request, NOTION_TRACE_EXPORTER=otel
+# also exports the spans through OpenTelemetry
+TRACE_FILE_ENV = "NOTION_TRACE_FILE"
+TRACE_EXPORTER_ENV = "NOTION_TRACE_EXPORTER"
+
+# Comma-separated extra integration tokens, each with its own rate limit budget
+TOKENS_ENV = "NOTION_TOKENS"
+
+# Processes using the same token share its budget through a lock file; set to 0 to
+# give every client its own budget again
+SHARED_RATE_LIMIT_ENV = "NOTION_SHARED_RATE_LIMIT"
+
+# Notion ids in request paths, with or without dashes
+ID_PATTERN = re.compile(r"[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}")
+
+class RateLimiter:
+    """Thread-safe token bucket shared by every request of a client"""
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent and return the seconds spent waiting"""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds):
+        """Hold every caller back, e.g. after the API answered 429 with Retry-After"""
+        with self.lock:
+            self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+class SharedRateLimiter:
+    """Rate limiter shared by every process on the host that uses the same token
+
+    The budget lives in a small file keyed by a hash of the token and is
+    updated under an exclusive file lock. Each request reserves the next free
+    slot (GCRA: a burst, then one slot every 1/rate seconds), so concurrent
+    scripts are served in the order they ask and split the budget between
+    them instead of each sending at the full rate.
+    """
+
+    def __init__(self, token, rate=DEFAULT_RATE, burst=DEFAULT_BURST, directory=None):
+        self.rate = rate
+        self.burst = burst
+        directory = directory or os.path.join(tempfile.gettempdir(), "notion_rate_limits")
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, hashlib.sha256(token.encode()).hexdigest()[:16])
+
+    @contextmanager
+    def budget(self):
+        """Lock the shared budget; yields [theoretical arrival time] (wall clock), saved on exit"""
+        with open(self.path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            try:
+                state = [float(f.read())]
+            except ValueError:
+                state = [0.0]
+            yield state
+            f.seek(0)
+            f.truncate()
+            f.write(repr(state[0]))
+
+    def acquire(self):
+        """Reserve the next slot of the shared budget, sleep until it and return the seconds waited"""
+        interval = 1 / self.rate
+        with self.budget() as state:
+            now = time.time()
+            # Up to burst slots may be taken ahead of the steady rate
+            slot = max(now, state[0] - (self.burst - 1) * interval)
+            state[0] = max(state[0], slot) + interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def pause(self, seconds):
+        """Hold back every process using the token, e.g. after the API answered 429 with Retry-After"""
+        with self.budget() as state:
+            state[0] = max(state[0], time.time() + seconds + (self.burst - 1) / self.rate)
+
+def shared_rate_limiting():
+    """Whether clients share their token's budget with other processes (file locks need fcntl)"""
+    return fcntl is not None and os.environ.get(SHARED_RATE_LIMIT_ENV, "1") != "0"
+
+def endpoint_name(method, path):
+    """Name a request by its method and path with ids replaced, e.g. POST databases/{id}/query"""
+    return f"{method.upper()} {ID_PATTERN.sub('{id}', path)}"
+
+def database_of(path, body):
+    """Return the database a request targets, if the path or the parent says so"""
+    parts = path.split("/")
+    if parts[0] == "databases" and len(parts) > 1:
+        return parts[1]
+    return ((body or {}).get("parent") or {}).get("database_id")
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers (None when empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+def otel_tracer():
+    """Return an OpenTelemetry tracer, or None if the package is not installed
+
+    When the SDK and the OTLP exporter are installed and nothing configured a
+    provider yet (e.g. opentelemetry-instrument), spans go to the OTLP endpoint
+    from the standard OTEL_* environment variables.
+    """
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        print(f"⚠️ {TRACE_EXPORTER_ENV}=otel needs the opentelemetry-api package; spans are not exported",
+              file=sys.stderr)
+        return None
+
+    try:
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    except ImportError:
+        pass
+    else:
+        if not isinstance(trace.get_tracer_provider(), TracerProvider):
+            provider = TracerProvider()
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+            trace.set_tracer_provider(provider)
+    return trace.get_tracer("notion_learning_tracker")
+
+class Tracer:
+    """Records one span per API request: JSON lines, optional OpenTelemetry export and a summary"""
+
+    def __init__(self, path=None, exporter=None):
+        self.path = path
+        self.file = open(path, "a") if path else None
+        self.otel = otel_tracer() if exporter == "otel" else None
+        self.spans = []
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+
+    def start(self, method, path, body):
+        """Open a span for a request about to be sent"""
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "endpoint": endpoint_name(method, path),
+            "path": path,
+            "database": database_of(path, body),
+            "payload_bytes": len(json.dumps(body)) if body else 0,
+            "status": None,
+            "retries": 0,
+            "queue_wait": 0.0,
+            "error": None,
+            "thread": threading.current_thread().name,
+            "_start": time.monotonic(),
+            "_start_ns": time.time_ns()
+        }
+
+    def finish(self, span):
+        """Close a span: latency excludes the time spent waiting for the rate limiter"""
+        start, start_ns = span.pop("_start"), span.pop("_start_ns")
+        span["duration"] = time.monotonic() - start
+        span["latency"] = span["duration"] - span["queue_wait"]
+        with self.lock:
+            self.spans.append(span)
+            if self.file:
+                self.file.write(json.dumps(span) + "\n")
+                self.file.flush()
+        if self.otel:
+            attributes = {f"notion.{key}": value for key, value in span.items()
+                          if value is not None and key not in ("timestamp", "endpoint")}
+            otel_span = self.otel.start_span(span["endpoint"], start_time=start_ns, attributes=attributes)
+            otel_span.end(end_time=start_ns + int(span["duration"] * 1e9))
+
+    def summary(self):
+        """Aggregate the spans per endpoint: calls, errors, retries, waits, bytes and latency"""
+        endpoints = {}
+        for span in self.spans:
+            endpoints.setdefault(span["endpoint"], []).append(span)
+        rows = []
+        for endpoint, spans in endpoints.items():
+            latencies = [span["latency"] for span in spans]
+            rows.append({
+                "endpoint": endpoint,
+                "calls": len(spans),
+                "errors": sum(1 for span in spans if span["error"]),
+                "retries": sum(span["retries"] for span in spans),
+                "queue_wait": sum(span["queue_wait"] for span in spans),
+                "payload_bytes": sum(span["payload_bytes"] for span in spans),
+                "total": sum(latencies),
+                "p50": percentile(latencies, 0.50),
+                "p95": percentile(latencies, 0.95)
+            })
+        return sorted(rows, key=lambda row: row["total"], reverse=True)
+
+    def print_summary(self, file=sys.stderr):
+        """Print the per-endpoint summary (to stderr, so piped output stays clean)"""
+        rows = self.summary()
+        if not rows:
+            return
+        print(f"\n🔎 Notion API trace ({len(self.spans)} requests, {time.monotonic() - self.started:.1f}s wall time)",
+              file=file)
+        print(f"{'Endpoint':<36} {'Calls':>6} {'Errors':>6} {'Retries':>7} {'Wait':>7} {'API time':>8} "
+              f"{'p50':>7} {'p95':>7} {'KB sent':>8}", file=file)
+        for row in rows:
+            print(f"{row['endpoint']:<36} {row['calls']:>6} {row['errors']:>6} {row['retries']:>7} "
+                  f"{row['queue_wait']:>6.1f}s {row['total']:>7.1f}s {row['p50'] * 1000:>5.0f}ms "
+                  f"{row['p95'] * 1000:>5.0f}ms {row['payload_bytes'] / 1024:>8.1f}", file=file)
+        if self.path:
+            print(f"📝 Spans written to {self.path}", file=file)
+
+    def close(self):
+        """Print the summary and close the trace file"""
+        self.print_summary()
+        if self.file:
+            self.file.close()
+            self.file = None
+
+# Every client created so far, and the transport they all use during a dry run
+_clients = weakref.WeakSet()
+_transport = None
+
+def use_transport(transport):
+    """Send the requests of every client, existing and future, through an httpx transport"""
+    global _transport
+    _transport = transport
+    for client in list(_clients):
+        client.attach(transport)
+
+# Process-wide tracer created from the environment on first use
+_tracer = None
+_tracer_lock = threading.Lock()
+
+def default_tracer():
+    """Return the tracer configured by NOTION_TRACE_FILE / NOTION_TRACE_EXPORTER, or None"""
+    global _tracer
+    path = os.environ.get(TRACE_FILE_ENV)
+    exporter = os.environ.get(TRACE_EXPORTER_ENV)
+    if not path and not exporter:
+        return None
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer(path, exporter)
+            atexit.register(_tracer.close)
+    return _tracer
+
+class RateLimitedClient(Client):
+    """Notion client whose requests all go through a shared rate limiter, retrying 429s"""
+
+    def __init__(self, limiter=None, max_retries=3, tracer=None, **kwargs):
+        super().__init__(**kwargs)
+        self.limiter = limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.tracer = tracer
+        _clients.add(self)
+        if _transport is not None:
+            self.attach(_transport)
+
+    def attach(self, transport):
+        """Route requests through an httpx transport (e.g. a local stand-in) without rate limiting"""
+        self.client = httpx.Client(transport=transport)
+        self.limiter = None
+
+    def request(self, path, method, query=None, body=None, auth=None):
+        """Send an HTTP request once the rate limiter allows it, recording a span when tracing"""
+        if not self.tracer:
+            return self.send(path, method, query, body, auth)
+
+        span = self.tracer.start(method, path, body)
+        try:
+            response = self.send(path, method, query, body, auth, span)
+            span["status"] = 200
+            return response
+        except Exception as e:
+            span["status"] = getattr(e, "status", None)
+            span["error"] = getattr(e, "code", None) or type(e).__name__
+            raise
+        finally:
+            self.tracer.finish(span)
+
+    def send(self, path, method, query=None, body=None, auth=None, span=None):
+        """Send a request, pausing every caller and retrying when the API answers 429"""
+        attempt = 0
+        while True:
+            waited = self.limiter.acquire() if self.limiter else 0.0
+            if span:
+                span["queue_wait"] += waited
+            try:
+                return super().request(path, method, query, body, auth)
+            except (APIResponseError, HTTPResponseError) as e:
+                if e.status != 429 or attempt >= self.max_retries:
+                    raise
+                retry_after = float(e.headers.get("Retry-After", 1))
+                if self.limiter:
+                    self.limiter.pause(retry_after)
+                attempt += 1
+                if span:
+                    span["retries"] = attempt
+
+def available_tokens():
+    """NOTION_TOKEN followed by the other integration tokens listed in NOTION_TOKENS, without duplicates"""
+    tokens = [os.environ["NOTION_TOKEN"]] + os.environ.get(TOKENS_ENV, "").split(",")
+    return list(dict.fromkeys(token.strip() for token in tokens if token.strip()))
+
+def create_client(rate=DEFAULT_RATE, limiter=None, tracer=None, token=None):
+    """Create a rate-limited Notion client (NOTION_TOKEN by default), traced when the environment asks for it
+
+    Unless a limiter is given, the client takes its permits from the budget
+    its token shares with every other process on the host.
+    """
+    token = token or os.environ["NOTION_TOKEN"]
+    if limiter is None:
+        limiter = SharedRateLimiter(token, rate=rate) if shared_rate_limiting() else RateLimiter(rate=rate)
+    return RateLimitedClient(limiter=limiter, tracer=tracer or default_tracer(), auth=token)
+
+# Serialises the progress lines of concurrent requests
+_print_lock = threading.Lock()
+
+def report(message):
+    """Print one line at a time while requests run in several threads"""
+    with _print_lock:
+        print(message)
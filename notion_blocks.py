@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Notion Learning Tracker Block Writer
+Packs block children into as few API requests as the Notion limits allow,
+and diffs existing block trees so re-renders only write what changed
+"""
+
+import copy
+import json
+import difflib
+import hashlib
+
+# Notion accepts at most 100 children per list and two levels of nesting per request
+MAX_BLOCKS_PER_REQUEST = 100
+MAX_NESTING_DEPTH = 2
+# ... and at most 1000 block elements in one request body
+MAX_ELEMENTS_PER_REQUEST = 1000
+# A rich text array holds at most 100 items of at most 2000 characters each
+MAX_RICH_TEXT_ITEMS = 100
+MAX_RICH_TEXT_LENGTH = 2000
+
+def get_children(block):
+    """Return the children of a block (stored under its type key), if any"""
+    return block.get(block.get("type"), {}).get("children") or []
+
+def without_children(block):
+    """Copy a block, dropping its children"""
+    block = copy.deepcopy(block)
+    block.get(block.get("type"), {}).pop("children", None)
+    return block
+
+def count_blocks(block):
+    """Count a block and all of its descendants"""
+    return 1 + sum(count_blocks(child) for child in get_children(block))
+
+def fits_inline(block, depth=0):
+    """Whether a block's whole subtree can be sent in one request"""
+    children = get_children(block)
+    if not children:
+        return True
+    if depth >= MAX_NESTING_DEPTH or len(children) > MAX_BLOCKS_PER_REQUEST:
+        return False
+    return all(fits_inline(child, depth + 1) for child in children)
+
+def split_blocks(blocks):
+    """Split blocks into (payload, deferred children) pairs
+
+    A subtree that is too wide or too deep for one request is sent without its
+    children; the children are appended to the new block in follow-up requests.
+    """
+    return [(block, []) if fits_inline(block) else (without_children(block), get_children(block))
+            for block in blocks]
+
+def pack_batches(pairs):
+    """Group (payload, deferred) pairs into request-sized batches"""
+    batches = []
+    batch, elements = [], 0
+    for pair in pairs:
+        size = count_blocks(pair[0])
+        if batch and (len(batch) == MAX_BLOCKS_PER_REQUEST or elements + size > MAX_ELEMENTS_PER_REQUEST):
+            batches.append(batch)
+            batch, elements = [], 0
+        batch.append(pair)
+        elements += size
+    if batch:
+        batches.append(batch)
+    return batches
+
+def write_deferred(notion, batch, results):
+    """Append the children held back from a batch to the blocks just created"""
+    for (_, deferred), result in zip(batch, results):
+        if deferred:
+            append_blocks(notion, result["id"], deferred)
+
+def append_blocks(notion, block_id, blocks, after=None):
+    """Append blocks under a page or block with as few requests as possible
+
+    Returns the created top-level blocks in order. With after, the blocks are
+    inserted after that child instead of at the end.
+    """
+    created = []
+    for batch in pack_batches(split_blocks(blocks)):
+        kwargs = {"after": after} if after else {}
+        response = notion.blocks.children.append(
+            block_id=block_id,
+            children=[payload for payload, _ in batch],
+            **kwargs
+        )
+        # The response lists the new first-level blocks (older API versions: all children)
+        results = response["results"][-len(batch):]
+        write_deferred(notion, batch, results)
+        created.extend(results)
+        if after:
+            after = results[-1]["id"]
+    return created
+
+def inline_count(children):
+    """Number of leading children that can be sent with the request creating their page"""
+    count, elements = 0, 0
+    for block in children[:MAX_BLOCKS_PER_REQUEST]:
+        if not fits_inline(block) or elements + count_blocks(block) > MAX_ELEMENTS_PER_REQUEST:
+            break
+        count += 1
+        elements += count_blocks(block)
+    return count
+
+def create_page(notion, parent, properties, children=None, **kwargs):
+    """Create a page, sending the leading children inline and appending the rest"""
+    children = children or []
+    inline = inline_count(children)
+
+    page = notion.pages.create(parent=parent, properties=properties, children=children[:inline], **kwargs)
+    if inline < len(children):
+        append_blocks(notion, page["id"], children[inline:])
+    return page
+
+def append_requests(blocks):
+    """Number of requests append_blocks needs for these blocks, deferred children included"""
+    return sum(1 + sum(append_requests(deferred) for _, deferred in batch)
+               for batch in pack_batches(split_blocks(blocks)))
+
+# Block content keys that never take part in the diff: children are written
+# separately, to-do state belongs to the user and database_id is not returned
+IGNORED_KEYS = {"children", "checked", "database_id"}
+
+def list_children(notion, block_id):
+    """Fetch every child block of a page or block"""
+    blocks = []
+    cursor = None
+    while True:
+        kwargs = {"start_cursor": cursor} if cursor else {}
+        response = notion.blocks.children.list(block_id=block_id, page_size=MAX_BLOCKS_PER_REQUEST, **kwargs)
+        blocks.extend(response["results"])
+        if not response.get("has_more"):
+            return blocks
+        cursor = response["next_cursor"]
+
+def normalize_rich_text(items):
+    """Reduce rich text to (content, link, non-default annotations), merging equal neighbours"""
+    normalized = []
+    for item in items or []:
+        text = item.get("text", {})
+        content = text.get("content", item.get("plain_text", ""))
+        link = (text.get("link") or {}).get("url")
+        annotations = {key: value for key, value in (item.get("annotations") or {}).items()
+                       if value not in (False, "default")}
+        if normalized and normalized[-1][1:] == [link, annotations]:
+            normalized[-1][0] += content
+        else:
+            normalized.append([content, link, annotations])
+    return normalized
+
+def normalize_block(block):
+    """Reduce a request payload or an API block object to the content that matters"""
+    content = {}
+    for key, value in block.get(block["type"], {}).items():
+        if key in IGNORED_KEYS:
+            continue
+        if key in ("rich_text", "caption"):
+            value = normalize_rich_text(value)
+        elif key == "cells":
+            value = [normalize_rich_text(cell) for cell in value]
+        elif key == "icon" and value:
+            value = value.get("emoji") or value
+        elif value in (False, None, "default", []):
+            continue
+        content[key] = value
+    has_children = block.get("has_children", bool(get_children(block)))
+    return [block["type"], content, has_children]
+
+def block_before(blocks, block):
+    """Id of the block listed just before block, or None if it comes first (or is not listed)"""
+    ids = [item.get("id") for item in blocks]
+    index = ids.index(block["id"]) if block.get("id") in ids else 0
+    return ids[index - 1] if index > 0 else None
+
+def block_hash(block):
+    """Content hash of a block, equal for a payload and the block it created"""
+    return hashlib.sha256(json.dumps(normalize_block(block), sort_keys=True).encode()).hexdigest()
+
+def diff_blocks(existing, desired):
+    """Plan the operations that turn the existing top-level blocks into the desired ones
+
+    Returns a list of ("keep", old, new), ("update", old, new), ("delete", old)
+    and ("insert", new) actions in page order. Blocks are matched on their own
+    content and on whether they have children; kept blocks with children are
+    diffed recursively by sync_children.
+    """
+    matcher = difflib.SequenceMatcher(None, [block_hash(b) for b in existing],
+                                      [block_hash(b) for b in desired], autojunk=False)
+    actions = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        old, new = existing[i1:i2], desired[j1:j2]
+        if tag == "equal":
+            actions.extend(("keep", before, after) for before, after in zip(old, new))
+            continue
+        for k in range(max(len(old), len(new))):
+            before = old[k] if k < len(old) else None
+            after = new[k] if k < len(new) else None
+            if before and after and before["type"] == after["type"] \
+                    and not before.get("has_children", bool(get_children(before))) and not get_children(after):
+                actions.append(("update", before, after))
+                continue
+            if before:
+                actions.append(("delete", before))
+            if after:
+                actions.append(("insert", after))
+    return actions
+
+def plan_actions(existing, desired, after=None):
+    """The actions sync_children performs: diff_blocks, or a full rewrite when it cannot insert"""
+    existing = [block for block in existing if not block.get("archived")]
+    actions = diff_blocks(existing, desired)
+
+    # Blocks can only be inserted after another block, so a change at the very
+    # top of a page (or of a section with no block before it) that keeps later
+    # blocks is written as a full rewrite
+    first = next((action for action in actions if action[0] != "delete"), None)
+    if after is None and first and first[0] == "insert" and any(action[0] in ("keep", "update") for action in actions):
+        actions = [("delete", block) for block in existing] + [("insert", block) for block in desired]
+    return actions
+
+def plan_sync(existing, desired, after=None):
+    """Count the requests sync_children would send, without sending any
+
+    existing can be blocks listed from Notion or the payloads of an earlier
+    render, after as for sync_children. Returns a dict counting list, append, update and delete requests
+    (the listing of the page itself is not included).
+    """
+    counts = {"list": 0, "append": 0, "update": 0, "delete": 0}
+    pending = []
+    for action in plan_actions(existing, desired, after) + [("end",)]:
+        if action[0] == "delete":
+            counts["delete"] += 1
+            continue
+        if action[0] == "insert":
+            pending.append(action[1])
+            continue
+        if pending:
+            counts["append"] += append_requests(pending)
+            pending.clear()
+        if action[0] == "update":
+            counts["update"] += 1
+        elif action[0] == "keep" and get_children(action[2]):
+            counts["list"] += 1
+            for key, count in plan_sync(get_children(action[1]), get_children(action[2])).items():
+                counts[key] += count
+    return counts
+
+def sync_children(notion, block_id, desired, existing=None, after=None):
+    """Make the children of a page match the desired blocks with the fewest writes
+
+    existing can be passed when the children were already listed, or to limit
+    the diff to a section of the page (blocks outside it are never touched).
+    after is the id of the block just before such a section, so blocks
+    inserted at its top stay in place. Returns a dict counting updated,
+    inserted and deleted blocks.
+    """
+    if existing is None:
+        existing = list_children(notion, block_id)
+    actions = plan_actions(existing, desired, after)
+    counts = {"updated": 0, "inserted": 0, "deleted": 0}
+
+    previous = after
+    pending = []
+
+    def flush():
+        nonlocal previous
+        if pending:
+            created = append_blocks(notion, block_id, pending, after=previous)
+            counts["inserted"] += len(pending)
+            previous = created[-1]["id"] if created else previous
+            pending.clear()
+
+    for action in actions:
+        if action[0] == "delete":
+            notion.blocks.delete(block_id=action[1]["id"])
+            counts["deleted"] += 1
+        elif action[0] == "insert":
+            pending.append(action[1])
+        else:
+            flush()
+            old, new = action[1], action[2]
+            if action[0] == "update":
+                content = {key: value for key, value in new[new["type"]].items() if key not in ("children", "checked")}
+                notion.blocks.update(block_id=old["id"], **{new["type"]: content})
+                counts["updated"] += 1
+            elif get_children(new):
+                # Same block, possibly different children (e.g. the rows of a table)
+                for key, count in sync_children(notion, old["id"], get_children(new)).items():
+                    counts[key] += count
+            previous = old["id"]
+    flush()
+    return counts
+
+# Marker ending a rich text property whose remaining text was moved to the page body
+CONTINUED_MARKER = "… (continued in the page body)"
+
+def text_length(text):
+    """Length of text as Notion counts it (UTF-16 code units)"""
+    return len(text.encode("utf-16-le")) // 2
+
+def split_text(text, limit=MAX_RICH_TEXT_LENGTH):
+    """Split text into chunks of at most limit characters, breaking at a newline or space when possible
+
+    Joining the chunks gives back the original text.
+    """
+    chunks = []
+    while text_length(text) > limit:
+        end, length = 0, 0
+        while length + text_length(text[end]) <= limit:
+            length += text_length(text[end])
+            end += 1
+        # Break after the last newline (or else space) in the second half of the chunk
+        cut = text.rfind("\n", end // 2, end) + 1 or text.rfind(" ", end // 2, end) + 1 or end
+        chunks.append(text[:cut])
+        text = text[cut:]
+    return chunks + [text]
+
+def rich_text(text):
+    """Rich text items for a plain string, split into 2000-character segments"""
+    return [{"text": {"content": chunk}} for chunk in split_text(text or "")]
+
+def spill_rich_text(properties):
+    """Move the text that does not fit into a rich text property into page body blocks
+
+    A property keeps its first 99 segments and a marker; the rest becomes a
+    heading and paragraphs to add to the page. Returns (properties, children,
+    moved) where moved maps property names to the number of characters moved.
+    """
+    properties = dict(properties)
+    children, moved = [], {}
+    for name, value in properties.items():
+        items = value.get("rich_text") if isinstance(value, dict) else None
+        if not items or len(items) <= MAX_RICH_TEXT_ITEMS:
+            continue
+        kept, rest = items[:MAX_RICH_TEXT_ITEMS - 1], items[MAX_RICH_TEXT_ITEMS - 1:]
+        properties[name] = {"rich_text": kept + [{"text": {"content": CONTINUED_MARKER}}]}
+        moved[name] = sum(len(item["text"]["content"]) for item in rest)
+        children.append({"type": "heading_3", "heading_3": {"rich_text": rich_text(f"{name} (continued)")}})
+        children.extend({"type": "paragraph", "paragraph": {"rich_text": [item]}} for item in rest)
+    return properties, children, moved
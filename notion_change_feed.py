@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Notion Learning Tracker Change Feed
+Polls each database for recently edited pages and emits structured change events
+"""
+
+import sys
+import json
+import time
+import argparse
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+import notion_mirror
+from notion_api import create_client
+from notion_state import StateStore
+from notion_mirror import MIRRORED_DATABASES, flatten_property, query_pages
+
+# Load environment variables
+load_dotenv()
+
+class DatabaseFeed:
+    """Polling state of one database: cursor, adaptive interval and last-seen values"""
+
+    def __init__(self, db_key, database_id, cursor, min_interval, max_interval):
+        self.db_key = db_key
+        self.database_id = database_id
+        self.cursor = cursor
+        self.started_at = cursor
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.next_poll = 0.0
+        self.known = {}
+
+    def schedule(self, changed):
+        """Speed up after edits, back off exponentially while idle"""
+        if changed:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * 2, self.max_interval)
+        self.next_poll = time.monotonic() + self.interval
+
+class ChangeFeed:
+    """Adaptive polling change feed over the learning tracker databases"""
+
+    def __init__(self, notion, database_ids, min_interval=5.0, max_interval=300.0, conn=None, only=None):
+        self.notion = notion
+        self.conn = conn
+        self.handlers = []
+        self.feeds = []
+
+        # Start from the mirror's high-water mark when there is one, otherwise from now
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:00.000Z")
+        for db_key in MIRRORED_DATABASES:
+            if db_key not in database_ids or (only and db_key not in only):
+                continue
+            cursor = (notion_mirror.get_high_water_mark(conn, db_key) if conn else None) or now
+            feed = DatabaseFeed(db_key, database_ids[db_key], cursor, min_interval, max_interval)
+            if conn:
+                for row in notion_mirror.read_pages(conn, db_key):
+                    properties = json.loads(row["_properties"])
+                    feed.known[row["_page_id"]] = {name: flatten_property(prop) for name, prop in properties.items()}
+            self.feeds.append(feed)
+
+    def on(self, handler, database=None):
+        """Register a handler called with every change event (optionally for one database only)"""
+        self.handlers.append((handler, database))
+
+    def emit(self, event):
+        """Deliver an event to the registered handlers, or print it as a JSON line"""
+        if not self.handlers:
+            print(json.dumps(event), flush=True)
+        for handler, database in self.handlers:
+            if database is None or database == event["database"]:
+                handler(event)
+
+    def poll(self, feed):
+        """Fetch pages edited since the feed's cursor and emit events for real changes"""
+        events = []
+        for page in query_pages(self.notion, feed.database_id, since=feed.cursor):
+            values = {name: flatten_property(prop) for name, prop in page.get("properties", {}).items()}
+            previous = feed.known.get(page["id"])
+
+            # The cursor has minute precision, so boundary pages come back on every
+            # poll; only differences from the last-seen values count as changes
+            if previous == values:
+                continue
+
+            changes = {}
+            if previous is not None:
+                for name in set(values) | set(previous):
+                    if values.get(name) != previous.get(name):
+                        changes[name] = {"old": previous.get(name), "new": values.get(name)}
+
+            feed.known[page["id"]] = values
+            if page.get("last_edited_time", "") > feed.cursor:
+                feed.cursor = page["last_edited_time"]
+            if self.conn:
+                with self.conn:
+                    notion_mirror.upsert_page(self.conn, feed.db_key, page)
+
+            events.append({
+                "database": feed.db_key,
+                "page_id": page["id"],
+                "event": "created" if previous is None and page.get("created_time", "") >= feed.started_at else "updated",
+                "last_edited_time": page.get("last_edited_time"),
+                "changes": changes,
+                "properties": values
+            })
+
+        for event in events:
+            self.emit(event)
+        return len(events)
+
+    def run(self, max_polls=None):
+        """Poll each database when it is due, forever or for max_polls polls"""
+        if not self.feeds:
+            raise ValueError("no databases to follow")
+        polls = 0
+        while max_polls is None or polls < max_polls:
+            feed = min(self.feeds, key=lambda f: f.next_poll)
+            delay = feed.next_poll - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+            try:
+                changed = self.poll(feed)
+            except Exception as e:
+                print(f"❌ {feed.db_key}: poll failed - {e}", file=sys.stderr)
+                changed = 0
+            feed.schedule(changed)
+            polls += 1
+
+def main(argv=None):
+    """Command line entry point: stream change events as JSON lines"""
+    parser = argparse.ArgumentParser(description="Stream Notion database changes as JSON lines")
+    parser.add_argument("--database", action="append", choices=list(MIRRORED_DATABASES),
+                        help="Only follow this database (can be repeated)")
+    parser.add_argument("--min-interval", type=float, default=5.0, help="Polling interval right after an edit (seconds)")
+    parser.add_argument("--max-interval", type=float, default=300.0, help="Longest polling interval when idle (seconds)")
+    parser.add_argument("--mirror", action="store_true", help="Seed from and write through to the local mirror")
+    args = parser.parse_args(argv)
+
+    database_ids = StateStore().get_database_ids()
+    notion = create_client()
+    conn = notion_mirror.connect() if args.mirror else None
+    feed = ChangeFeed(notion, database_ids, args.min_interval, args.max_interval, conn=conn, only=args.database)
+    if not feed.feeds:
+        print("❌ None of the databases to follow has an ID in the state store; "
+              "run 'python notion_database_creator.py' first", file=sys.stderr)
+        return False
+
+    print(f"👀 Following {len(feed.feeds)} databases (polling every {args.min_interval}s-{args.max_interval}s)...",
+          file=sys.stderr)
+    try:
+        feed.run()
+    except KeyboardInterrupt:
+        print("\n👋 Change feed stopped", file=sys.stderr)
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
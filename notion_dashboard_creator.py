@@ -5,23 +5,111 @@ Creates dashboard pages with embedded database views
 """
 
 import os
-import json
-from notion_client import Client
+import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from dotenv import load_dotenv
 
+import notion_analytics
+from notion_api import create_client, report
+from notion_blocks import block_before, block_hash, create_page, list_children, sync_children
+from notion_schema import SchemaCache
+from notion_state import StateStore
+
 # Load environment variables
 load_dotenv()
 
-# Initialize Notion client
-notion = Client(auth=os.environ["NOTION_TOKEN"])
+# Initialize rate-limited Notion client (safe to share between threads)
+notion = create_client()
 PARENT_PAGE_ID = os.environ["NOTION_PARENT_PAGE_ID"]
 
+# Shared state store: database ids and the content each dashboard was last rendered with
+state = StateStore()
+
 # Load database IDs
-with open("database_ids.json", "r") as f:
-    database_ids = json.load(f)
+database_ids = state.get_database_ids()
 
-def create_learning_dashboard():
-    """Create the main learning dashboard page"""
+# Database schemas, fetched at most once per cache TTL
+schemas = SchemaCache(notion)
+
+# Key under which the navigation section of the parent page is remembered
+NAVIGATION_KEY = "main_navigation"
+
+# Dashboard page key -> (emoji, name, description) shown on the navigation page
+NAVIGATION_LINKS = [
+    ("learning_dashboard", "📚 ", "Learning Dashboard",
+     "Your main hub for tracking current modules, priority resources, and active projects"),
+    ("progress_analytics", "📊 ", "Progress Analytics",
+     "Analyze your learning trends, confidence levels, and study patterns"),
+    ("project_showcase", "🚀 ", "Project Portfolio",
+     "Showcase your hands-on projects and track practical skill application")
+]
+
+def check_linked_databases():
+    """Check that every database the dashboards embed exists before creating pages"""
+    all_found = True
+    for db_key in ["learning_modules", "resources_library", "projects_portfolio", "weekly_reflections"]:
+        try:
+            schema = schemas.retrieve(database_ids[db_key])
+            print(f"✅ {db_key}: {len(schema['properties'])} properties")
+        except Exception as e:
+            print(f"❌ {db_key}: {e}")
+            all_found = False
+    return all_found
+
+def child_page_ids(parent_blocks):
+    """Map the titles of the parent page's child pages to their ids"""
+    return {block["child_page"]["title"]: block["id"] for block in parent_blocks if block["type"] == "child_page"}
+
+def describe_changes(counts):
+    """Summarise the block operations of a re-render"""
+    return f"{counts['updated']} changed, {counts['inserted']} added, {counts['deleted']} removed"
+
+def render_page(title, name, content, parent_blocks=None):
+    """Create a dashboard page, or bring the existing page with that title in line with its content"""
+    if parent_blocks is None:
+        parent_blocks = list_children(notion, PARENT_PAGE_ID)
+    page_id = child_page_ids(parent_blocks).get(title)
+
+    if page_id is None:
+        response = create_page(
+            notion,
+            parent={"type": "page_id", "page_id": PARENT_PAGE_ID},
+            properties={
+                "title": [{"type": "text", "text": {"content": title}}]
+            },
+            children=content
+        )
+        state.set_rendered(title, response["id"], content)
+        report(f"✅ {name} created successfully!")
+        return response["id"]
+
+    counts = sync_children(notion, page_id, content)
+    state.set_rendered(title, page_id, content)
+    if any(counts.values()):
+        report(f"✅ {name} updated ({describe_changes(counts)})")
+    else:
+        report(f"✅ {name} is up to date")
+    return page_id
+
+def navigation_section(parent_blocks, heading):
+    """Return the parent page blocks written by earlier navigation runs
+
+    The section starts at the navigation heading and ends at the next other
+    top-level heading; child pages and databases inside it are left alone.
+    """
+    heading_hash = block_hash(heading)
+    section = []
+    inside = False
+    for block in parent_blocks:
+        if block["type"] == "heading_1":
+            inside = block_hash(block) == heading_hash
+        if inside and block["type"] not in ("child_page", "child_database"):
+            section.append(block)
+    return section
+
+def learning_dashboard_content():
+    """Blocks of the main learning dashboard page"""
 
     # Create the dashboard page
     dashboard_content = [
@@ -130,22 +218,26 @@ def create_learning_dashboard():
         }
     ]
 
+    return dashboard_content
+
+def create_learning_dashboard(parent_blocks=None):
+    """Create the main learning dashboard page"""
     try:
-        response = notion.pages.create(
-            parent={"type": "page_id", "page_id": PARENT_PAGE_ID},
-            properties={
-                "title": [{"type": "text", "text": {"content": "📚 Learning Dashboard"}}]
-            },
-            children=dashboard_content
-        )
-        print("✅ Learning Dashboard created successfully!")
-        return response["id"]
+        return render_page("📚 Learning Dashboard", "Learning Dashboard", learning_dashboard_content(), parent_blocks)
     except Exception as e:
-        print(f"❌ Error creating Learning Dashboard: {e}")
+        report(f"❌ Error creating Learning Dashboard: {e}")
         return None
 
-def create_progress_analytics():
-    """Create the progress analytics dashboard"""
+def computed_analytics():
+    """Analytics blocks computed locally from the mirror or the JSON data"""
+    try:
+        return notion_analytics.analytics_blocks(notion_analytics.compute())
+    except Exception as e:
+        report(f"⚠️ Could not compute analytics: {e}")
+        return []
+
+def progress_analytics_content():
+    """Blocks of the progress analytics dashboard"""
 
     analytics_content = [
         {
@@ -162,6 +254,7 @@ def create_progress_analytics():
                 "rich_text": [{"type": "text", "text": {"content": "Track your learning progress, confidence levels, and study patterns over time."}}]
             }
         },
+        *computed_analytics(),
         {
             "object": "block",
             "type": "heading_2",
@@ -251,22 +344,18 @@ def create_progress_analytics():
         }
     ]
 
+    return analytics_content
+
+def create_progress_analytics(parent_blocks=None):
+    """Create the progress analytics dashboard"""
     try:
-        response = notion.pages.create(
-            parent={"type": "page_id", "page_id": PARENT_PAGE_ID},
-            properties={
-                "title": [{"type": "text", "text": {"content": "📊 Progress Analytics"}}]
-            },
-            children=analytics_content
-        )
-        print("✅ Progress Analytics dashboard created successfully!")
-        return response["id"]
+        return render_page("📊 Progress Analytics", "Progress Analytics dashboard", progress_analytics_content(), parent_blocks)
     except Exception as e:
-        print(f"❌ Error creating Progress Analytics dashboard: {e}")
+        report(f"❌ Error creating Progress Analytics dashboard: {e}")
         return None
 
-def create_project_showcase():
-    """Create the project portfolio showcase"""
+def project_showcase_content():
+    """Blocks of the project portfolio showcase"""
 
     showcase_content = [
         {
@@ -377,22 +466,42 @@ def create_project_showcase():
         }
     ]
 
+    return showcase_content
+
+def create_project_showcase(parent_blocks=None):
+    """Create the project portfolio showcase"""
     try:
-        response = notion.pages.create(
-            parent={"type": "page_id", "page_id": PARENT_PAGE_ID},
-            properties={
-                "title": [{"type": "text", "text": {"content": "🚀 Project Portfolio"}}]
-            },
-            children=showcase_content
-        )
-        print("✅ Project Portfolio showcase created successfully!")
-        return response["id"]
+        return render_page("🚀 Project Portfolio", "Project Portfolio showcase", project_showcase_content(), parent_blocks)
     except Exception as e:
-        print(f"❌ Error creating Project Portfolio showcase: {e}")
+        report(f"❌ Error creating Project Portfolio showcase: {e}")
         return None
 
-def create_main_navigation():
-    """Update the main parent page with navigation to all dashboards"""
+def navigation_links(page_ids):
+    """Build a link and a description for every dashboard page (plain text if it does not exist)"""
+    blocks = []
+    for key, emoji, name, description in NAVIGATION_LINKS:
+        if page_ids.get(key):
+            blocks.append({
+                "object": "block",
+                "type": "link_to_page",
+                "link_to_page": {"type": "page_id", "page_id": page_ids[key]}
+            })
+            rich_text = [{"type": "text", "text": {"content": description}}]
+        else:
+            rich_text = [
+                {"type": "text", "text": {"content": emoji}, "annotations": {"bold": True}},
+                {"type": "text", "text": {"content": name}, "annotations": {"bold": True}},
+                {"type": "text", "text": {"content": f" - {description}"}}
+            ]
+        blocks.append({
+            "object": "block",
+            "type": "paragraph",
+            "paragraph": {"rich_text": rich_text}
+        })
+    return blocks
+
+def main_navigation_content(page_ids=None):
+    """Blocks of the navigation section on the main parent page"""
 
     navigation_content = [
         {
@@ -416,23 +525,7 @@ def create_main_navigation():
                 "rich_text": [{"type": "text", "text": {"content": "🗺️ Navigation"}}]
             }
         },
-        {
-            "object": "block",
-            "type": "paragraph",
-            "paragraph": {
-                "rich_text": [
-                    {"type": "text", "text": {"content": "📚 "}, "annotations": {"bold": True}},
-                    {"type": "text", "text": {"content": "Learning Dashboard"}, "annotations": {"bold": True}},
-                    {"type": "text", "text": {"content": " - Your main hub for tracking current modules, priority resources, and active projects\n"}},
-                    {"type": "text", "text": {"content": "📊 "}, "annotations": {"bold": True}},
-                    {"type": "text", "text": {"content": "Progress Analytics"}, "annotations": {"bold": True}},
-                    {"type": "text", "text": {"content": " - Analyze your learning trends, confidence levels, and study patterns\n"}},
-                    {"type": "text", "text": {"content": "🚀 "}, "annotations": {"bold": True}},
-                    {"type": "text", "text": {"content": "Project Portfolio"}, "annotations": {"bold": True}},
-                    {"type": "text", "text": {"content": " - Showcase your hands-on projects and track practical skill application"}}
-                ]
-            }
-        },
+        *navigation_links(page_ids or {}),
         {
             "object": "block",
             "type": "heading_2",
@@ -498,50 +591,113 @@ def create_main_navigation():
         }
     ]
 
-    try:
-        # Get the existing page to preserve any existing content
-        page = notion.pages.retrieve(page_id=PARENT_PAGE_ID)
+    return navigation_content
 
-        # Append new content blocks
-        for block in navigation_content:
-            notion.blocks.children.append(
-                block_id=PARENT_PAGE_ID,
-                children=[block]
-            )
+def create_main_navigation(parent_blocks=None, page_ids=None):
+    """Update the main parent page with navigation to all dashboards"""
+    try:
+        # Only the navigation section is diffed; other content on the page is kept
+        navigation_content = main_navigation_content(page_ids)
+        if parent_blocks is None:
+            parent_blocks = list_children(notion, PARENT_PAGE_ID)
+        section = navigation_section(parent_blocks, navigation_content[0])
+        # Changes at the top of the section are inserted after the block before it, keeping its place
+        after = block_before(parent_blocks, section[0]) if section else None
+        counts = sync_children(notion, PARENT_PAGE_ID, navigation_content, existing=section, after=after)
+        state.set_rendered(NAVIGATION_KEY, PARENT_PAGE_ID, navigation_content)
 
-        print("✅ Main navigation page updated successfully!")
+        if any(counts.values()):
+            report(f"✅ Main navigation page updated successfully! ({describe_changes(counts)})")
+        else:
+            report("✅ Main navigation page is up to date")
         return True
     except Exception as e:
-        print(f"❌ Error updating main navigation: {e}")
+        report(f"❌ Error updating main navigation: {e}")
         return False
 
-def main():
+# Page key -> (title, content builder) of the pages rendered as child pages
+PAGE_CONTENT = {
+    "learning_dashboard": ("📚 Learning Dashboard", learning_dashboard_content),
+    "progress_analytics": ("📊 Progress Analytics", progress_analytics_content),
+    "project_showcase": ("🚀 Project Portfolio", project_showcase_content)
+}
+
+# Page key -> (name, keys of the pages it depends on, builder)
+DASHBOARD_PAGES = {
+    "learning_dashboard": ("Learning Dashboard", [], create_learning_dashboard),
+    "progress_analytics": ("Progress Analytics", [], create_progress_analytics),
+    "project_showcase": ("Project Portfolio", [], create_project_showcase),
+    "main_navigation": ("Main Navigation", ["learning_dashboard", "progress_analytics", "project_showcase"],
+                        create_main_navigation)
+}
+
+def build_pages(parent_blocks, pages=None):
+    """Build every page once its dependencies are done, running independent pages concurrently
+
+    Each builder gets the parent page listing and, if it has dependencies, the
+    results of those pages (page ids) keyed by page key. Returns key -> result.
+    """
+    pages = pages or DASHBOARD_PAGES
+    results = {}
+    waiting = dict(pages)
+    running = {}
+
+    def build(key):
+        _, dependencies, builder = pages[key]
+        if not dependencies:
+            return builder(parent_blocks)
+        return builder(parent_blocks, {dependency: results[dependency] for dependency in dependencies})
+
+    with ThreadPoolExecutor(max_workers=len(pages)) as pool:
+        while waiting or running:
+            for key in [key for key, (_, dependencies, _) in waiting.items()
+                        if all(dependency in results for dependency in dependencies)]:
+                running[pool.submit(build, key)] = key
+                del waiting[key]
+            if not running:
+                raise ValueError(f"Unresolvable page dependencies: {', '.join(waiting)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = running.pop(future)
+                try:
+                    results[key] = future.result()
+                except Exception as e:
+                    report(f"❌ Error building {pages[key][0]}: {e}")
+                    results[key] = None
+    return results
+
+def main(argv=None):
     """Main function to create all dashboard pages"""
-    print("🎨 Starting Notion Dashboard Creation...")
-    print("=" * 60)
+    parser = argparse.ArgumentParser(description="Create the Notion learning tracker dashboard pages")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Send every request to a local stand-in and record it instead of calling Notion")
+    parser.add_argument("--fixture", default="dry_run_fixture.jsonl",
+                        help="File the dry run records requests and responses to (default: dry_run_fixture.jsonl)")
+    args = parser.parse_args(argv)
 
-    # Create dashboard pages
-    dashboards_created = []
+    if args.dry_run:
+        import notion_dry_run
+        notion_dry_run.start(args.fixture)
 
-    # Create Learning Dashboard
-    print("\n📚 Creating Learning Dashboard...")
-    if create_learning_dashboard():
-        dashboards_created.append("Learning Dashboard")
+    print("🎨 Starting Notion Dashboard Creation...")
+    print("=" * 60)
 
-    # Create Progress Analytics
-    print("\n📊 Creating Progress Analytics...")
-    if create_progress_analytics():
-        dashboards_created.append("Progress Analytics")
+    print("\n🔎 Checking linked databases...")
+    if not check_linked_databases():
+        print("\n❌ Some databases are missing. Run notion_database_creator.py first.")
+        return False
 
-    # Create Project Showcase
-    print("\n🚀 Creating Project Portfolio...")
-    if create_project_showcase():
-        dashboards_created.append("Project Portfolio")
+    # Existing dashboards and navigation are found in one listing of the parent page
+    try:
+        parent_blocks = list_children(notion, PARENT_PAGE_ID)
+    except Exception as e:
+        print(f"\n❌ Could not read the parent page: {e}")
+        return False
 
-    # Update main navigation
-    print("\n🗺️ Updating main navigation...")
-    if create_main_navigation():
-        dashboards_created.append("Main Navigation")
+    # Independent pages are built concurrently; the navigation waits for the pages it links to
+    print(f"\n🏗️ Building {len(DASHBOARD_PAGES)} pages...")
+    results = build_pages(parent_blocks)
+    dashboards_created = [DASHBOARD_PAGES[key][0] for key in DASHBOARD_PAGES if results.get(key)]
 
     # Summary
     print(f"\n🎉 Dashboard creation completed!")
@@ -555,8 +711,9 @@ def main():
         print("2. Explore the three dashboard pages")
         print("3. Start logging your first weekly reflection")
         print("4. Begin tracking your learning progress!")
-    else:
-        print(f"\n⚠️ Some components failed to create. Please check the errors above.")
+        return True
+    print(f"\n⚠️ Some components failed to create. Please check the errors above.")
+    return False
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(0 if main() else 1)
\ No newline at end of file
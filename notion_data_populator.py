@@ -4,22 +4,41 @@ Notion Learning Tracker Data Populator
 Reads data from JSON files and populates Notion databases
 """
 
-import os
 import json
-from datetime import datetime, timedelta
-from notion_client import Client
+import hashlib
+import argparse
+import tempfile
+import threading
+import multiprocessing
+from contextlib import ExitStack
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from dotenv import load_dotenv
 from pathlib import Path
 
+from notion_api import available_tokens, create_client, report
+from notion_pipeline import DEFAULT_QUEUE_SIZE, Pipeline, PriorityQueue, iter_json_array
+from notion_blocks import (block_before, block_hash, create_page, list_children, rich_text, spill_rich_text,
+                           sync_children)
+from notion_profile import Profiler, stage
+from notion_schema import SchemaCache
+from notion_state import StateStore
+from validate_data import DataValidator
+
 # Load environment variables
 load_dotenv()
 
-# Initialize Notion client
-notion = Client(auth=os.environ["NOTION_TOKEN"])
+# Initialize rate-limited Notion client
+notion = create_client()
+
+# Shared state store: database ids, record id -> page id map and payload hashes
+state = StateStore()
 
 # Load database IDs
-with open("database_ids.json", "r") as f:
-    database_ids = json.load(f)
+database_ids = state.get_database_ids()
+
+# Database schemas, fetched at most once per cache TTL
+schemas = SchemaCache(notion, state)
 
 def load_json_data(filename):
     """Load data from a JSON file in the data directory"""
@@ -419,258 +438,602 @@ def parse_learning_plan():
     
     return learning_modules, resources, projects
 
-def populate_learning_modules(learning_modules):
-    """Populate the Learning Modules database"""
-    print(f"\n📚 Populating {len(learning_modules)} learning modules...")
-    
-    for module in learning_modules:
-        # Convert skills list to multi-select format
-        skills_options = []
-        for skill in module.get("skills", []):
-            skills_options.append({"name": skill})
-        
-        # Priority color mapping
-        priority_colors = {
-            "Critical": "red",
-            "High": "orange",
-            "Medium": "yellow",
-            "Low": "gray"
-        }
-        
-        # Status color mapping
-        status_colors = {
-            "Not Started": "gray",
-            "In Progress": "blue",
-            "Completed": "green",
-            "On Hold": "yellow"
+def build_module_properties(module):
+    """Build the Notion page properties for a learning module"""
+    # Convert skills list to multi-select format
+    skills_options = []
+    for skill in module.get("skills", []):
+        skills_options.append({"name": skill})
+    
+    # Priority color mapping
+    priority_colors = {
+        "Critical": "red",
+        "High": "orange",
+        "Medium": "yellow",
+        "Low": "gray"
+    }
+    
+    # Status color mapping
+    status_colors = {
+        "Not Started": "gray",
+        "In Progress": "blue",
+        "Completed": "green",
+        "On Hold": "yellow"
+    }
+    
+    return {
+        "Module Name": {
+            "title": [{"text": {"content": module["name"]}}]
+        },
+        "Category": {
+            "select": {"name": module["category"]}
+        },
+        "Phase": {
+            "select": {"name": module.get("phase", "Phase 1 (Months 1-3)")}
+        },
+        "Status": {
+            "select": {
+                "name": module.get("status", "Not Started"),
+                "color": status_colors.get(module.get("status", "Not Started"), "gray")
+            }
+        },
+        "Priority Level": {
+            "select": {
+                "name": module["priority"],
+                "color": priority_colors.get(module["priority"], "gray")
+            }
+        },
+        "Estimated Hours": {
+            "number": module["estimated_hours"]
+        },
+        "Skills": {
+            "multi_select": skills_options
+        },
+        "Notes": {
+            "rich_text": rich_text(module.get("notes", ""))
         }
-        
-        try:
-            response = notion.pages.create(
-                parent={"database_id": database_ids["learning_modules"]},
-                properties={
-                    "Module Name": {
-                        "title": [{"text": {"content": module["name"]}}]
-                    },
-                    "Category": {
-                        "select": {"name": module["category"]}
-                    },
-                    "Phase": {
-                        "select": {"name": module.get("phase", "Phase 1 (Months 1-3)")}
-                    },
-                    "Status": {
-                        "select": {
-                            "name": module.get("status", "Not Started"),
-                            "color": status_colors.get(module.get("status", "Not Started"), "gray")
-                        }
-                    },
-                    "Priority Level": {
-                        "select": {
-                            "name": module["priority"],
-                            "color": priority_colors.get(module["priority"], "gray")
-                        }
-                    },
-                    "Estimated Hours": {
-                        "number": module["estimated_hours"]
-                    },
-                    "Skills": {
-                        "multi_select": skills_options
-                    },
-                    "Notes": {
-                        "rich_text": [{"text": {"content": module.get("notes", "")}}]
-                    }
-                }
-            )
-            print(f"  ✅ Added: {module['name']}")
-        except Exception as e:
-            print(f"  ❌ Failed to add {module['name']}: {e}")
-
-def populate_resources(resources):
-    """Populate the Resources Library database"""
-    print(f"\n📖 Populating {len(resources)} resources...")
-    
-    for resource in resources:
-        # Priority color mapping
-        priority_colors = {
-            "Must Read": "red",
-            "Must Take": "red",
-            "Must Have": "red",
-            "High Value": "orange",
-            "Good to Have": "yellow",
-            "Good Practice": "yellow",
-            "Reference": "blue",
-            "Optional": "gray"
+    }
+
+def build_resource_properties(resource):
+    """Build the Notion page properties for a resource"""
+    # Priority color mapping
+    priority_colors = {
+        "Must Read": "red",
+        "Must Take": "red",
+        "Must Have": "red",
+        "High Value": "orange",
+        "Good to Have": "yellow",
+        "Good Practice": "yellow",
+        "Reference": "blue",
+        "Optional": "gray"
+    }
+    
+    # Status color mapping
+    status_colors = {
+        "Not Started": "gray",
+        "In Progress": "blue",
+        "Completed": "green",
+        "Reference": "purple"
+    }
+    
+    # Type color mapping
+    type_colors = {
+        "Book": "blue",
+        "Online Course": "green",
+        "Video Series": "purple",
+        "Interactive Platform": "orange",
+        "Documentation": "gray",
+        "Tutorial": "yellow",
+        "Workshop": "pink",
+        "Conference": "red"
+    }
+    
+    # Cost color mapping
+    cost_colors = {
+        "Free": "green",
+        "Paid": "red",
+        "Subscription": "orange",
+        "Freemium": "yellow"
+    }
+    
+    properties = {
+        "Resource Name": {
+            "title": [{"text": {"content": resource["name"]}}]
+        },
+        "Type": {
+            "select": {
+                "name": resource["type"],
+                "color": type_colors.get(resource["type"], "gray")
+            }
+        },
+        "Provider": {
+            "rich_text": rich_text(resource.get("provider", ""))
+        },
+        "Status": {
+            "select": {
+                "name": resource.get("status", "Not Started"),
+                "color": status_colors.get(resource.get("status", "Not Started"), "gray")
+            }
+        },
+        "Priority": {
+            "select": {
+                "name": resource["priority"],
+                "color": priority_colors.get(resource["priority"], "gray")
+            }
+        },
+        "Difficulty": {
+            "select": {"name": resource.get("difficulty", "Intermediate")}
+        },
+        "Cost": {
+            "select": {
+                "name": resource.get("cost", "Paid"),
+                "color": cost_colors.get(resource.get("cost", "Paid"), "gray")
+            }
+        },
+        "Estimated Time": {
+            "rich_text": rich_text(resource.get("estimated_time", ""))
+        },
+        "Notes": {
+            "rich_text": rich_text(resource.get("notes", ""))
         }
-        
-        # Status color mapping
-        status_colors = {
-            "Not Started": "gray",
-            "In Progress": "blue",
-            "Completed": "green",
-            "Reference": "purple"
+    }
+    
+    # Add URL if available
+    if resource.get("url"):
+        properties["URL"] = {"url": resource["url"]}
+    
+    # Add rating if available
+    if resource.get("rating"):
+        properties["Rating"] = {"number": resource["rating"]}
+    
+    return properties
+
+def build_project_properties(project):
+    """Build the Notion page properties for a project"""
+    # Convert lists to multi-select format
+    tech_options = []
+    for tech in project.get("technologies", []):
+        tech_options.append({"name": tech})
+    
+    skills_options = []
+    for skill in project.get("skills_applied", []):
+        skills_options.append({"name": skill})
+    
+    # Status color mapping
+    status_colors = {
+        "Not Started": "gray",
+        "Planning": "yellow",
+        "In Development": "blue",
+        "Testing": "orange",
+        "Completed": "green",
+        "Deployed": "purple",
+        "Archived": "brown"
+    }
+    
+    properties = {
+        "Project Name": {
+            "title": [{"text": {"content": project["name"]}}]
+        },
+        "Description": {
+            "rich_text": rich_text(project.get("description", ""))
+        },
+        "Status": {
+            "select": {
+                "name": project.get("status", "Not Started"),
+                "color": status_colors.get(project.get("status", "Not Started"), "gray")
+            }
+        },
+        "Technologies Used": {
+            "multi_select": tech_options
+        },
+        "Skills Applied": {
+            "multi_select": skills_options
+        },
+        "Timeline": {
+            "rich_text": rich_text(project.get("timeline", ""))
         }
-        
-        # Type color mapping
-        type_colors = {
-            "Book": "blue",
-            "Online Course": "green",
-            "Video Series": "purple",
-            "Interactive Platform": "orange",
-            "Documentation": "gray",
-            "Tutorial": "yellow",
-            "Workshop": "pink",
-            "Conference": "red"
+    }
+    
+    # Add URLs if available
+    if project.get("github_link"):
+        properties["GitHub Link"] = {"url": project["github_link"]}
+    
+    if project.get("demo_link"):
+        properties["Demo Link"] = {"url": project["demo_link"]}
+    
+    # Add lessons learned as a rich text field
+    if project.get("lessons_learned"):
+        lessons_text = "\n".join(f"• {lesson}" for lesson in project["lessons_learned"])
+        properties["Lessons Learned"] = {
+            "rich_text": rich_text(lessons_text)
         }
-        
-        # Cost color mapping
-        cost_colors = {
-            "Free": "green",
-            "Paid": "red",
-            "Subscription": "orange",
-            "Freemium": "yellow"
+    
+    # Add next steps
+    if project.get("next_steps"):
+        steps_text = "\n".join(f"• {step}" for step in project["next_steps"])
+        properties["Next Steps"] = {
+            "rich_text": rich_text(steps_text)
         }
-        
+    
+    return properties
+
+# Record kinds handled by the write path: database key and property builder
+RECORD_TYPES = {
+    "modules": ("learning_modules", build_module_properties),
+    "resources": ("resources_library", build_resource_properties),
+    "projects": ("projects_portfolio", build_project_properties)
+}
+
+# Record kind -> (data file, array key, legacy data) read by the streaming populator
+DATA_SOURCES = {
+    "modules": ("learning_modules.json", "modules", get_legacy_modules),
+    "resources": ("resources.json", "resources", get_legacy_resources),
+    "projects": ("projects.json", "projects", get_legacy_projects)
+}
+
+# Printed with each written record
+KIND_NAMES = {
+    "modules": "📚 module",
+    "resources": "📖 resource",
+    "projects": "🚀 project"
+}
+
+# Concurrent page writes; the shared rate limiter still caps the request rate
+DEFAULT_WRITERS = 3
+
+# Record kind -> (JSON field, value -> write priority); level 0 is written first
+RECORD_PRIORITIES = {
+    "modules": ("priority", {"Critical": 0, "High": 1, "Medium": 2, "Low": 3}),
+    "resources": ("priority", {"Must Read": 1, "Must Take": 1, "Must Have": 1, "High Value": 2,
+                               "Good to Have": 3, "Good Practice": 3, "Reference": 3, "Optional": 3}),
+    "projects": ("status", {"In Development": 1, "Testing": 1, "Planning": 2, "Not Started": 2,
+                            "Completed": 3, "Deployed": 3, "Archived": 3})
+}
+PRIORITY_LEVELS = 4
+DEFAULT_PRIORITY = 2
+
+# Seconds a queued write waits before it moves up one priority level
+WRITE_AGING = 30.0
+
+def load_page_ids():
+    """Load the record id -> Notion page id map written by previous runs"""
+    return state.get_page_ids()
+
+def payload_hash(properties):
+    """Stable hash of a page payload, used to skip writes that would change nothing"""
+    return hashlib.sha256(json.dumps(properties, sort_keys=True).encode()).hexdigest()
+
+def moved_text_key(db_key, record_id):
+    """Key under which the text moved to the body of a record page is remembered"""
+    return f"{db_key}/{record_id}"
+
+def report_moved(record, moved):
+    """Say which properties were too long for Notion and went to the page body"""
+    for name, characters in moved.items():
+        report(f"  ↪️ {record.get('name', record.get('id'))}: {characters} characters of '{name}' "
+              f"moved to the page body")
+
+def moved_text_section(blocks, written):
+    """Blocks of a record page written by earlier runs; anything else on the page is left alone"""
+    hashes = {block_hash(block) for block in written}
+    return [block for block in blocks if block_hash(block) in hashes]
+
+def moved_text_groups(blocks):
+    """Split moved-text blocks into {property name: blocks}, each group starting with its heading"""
+    groups, name = {}, None
+    for block in blocks:
+        if block["type"] == "heading_3":
+            heading = "".join(item["text"]["content"] for item in block["heading_3"]["rich_text"])
+            name = heading[:-len(" (continued)")]
+        groups.setdefault(name, []).append(block)
+    return groups
+
+def sync_moved_text(db_key, record_id, page_id, children, properties=None):
+    """Keep the moved-text section of a record page in step with the text moved out of its properties
+
+    With properties, only the text moved from those properties is replaced
+    and the rest of the section is kept (e.g. when only some properties are
+    written).
+    """
+    key = moved_text_key(db_key, record_id)
+    written = state.get_rendered(key)
+    old = written[1] if written else []
+    if properties is not None:
+        groups = moved_text_groups(old)
+        for name in properties:
+            groups.pop(name, None)
+        groups.update(moved_text_groups(children))
+        children = [block for blocks in groups.values() for block in blocks]
+    if children == old:
+        return
+    section, after = [], None
+    if old:
+        blocks = list_children(notion, page_id)
+        section = moved_text_section(blocks, old)
+        after = block_before(blocks, section[0]) if section else None
+    sync_children(notion, page_id, children, existing=section, after=after)
+    state.set_rendered(key, page_id, children)
+
+def build_record(kind, record):
+    """Build the page write of a record: the payload, the page body for moved text and the payload hash"""
+    db_key, build_properties = RECORD_TYPES[kind]
+    properties = build_properties(record)
+    # Text beyond the rich text limits goes to the page body instead of failing the write
+    payload, children, moved = spill_rich_text(properties)
+    return {"kind": kind, "db_key": db_key, "record": record, "properties": payload, "children": children,
+            "moved": moved, "hash": payload_hash(properties)}
+
+def write_record(write):
+    """Create the Notion page of a built record"""
+    parent = {"database_id": database_ids[write["db_key"]]}
+    if write["children"]:
+        return create_page(notion, parent, write["properties"], write["children"])
+    return notion.pages.create(parent=parent, properties=write["properties"])
+
+def journal_record(write, response, page_ids):
+    """Remember the page created for a record"""
+    record, db_key = write["record"], write["db_key"]
+    report_moved(record, write["moved"])
+    if record.get("id"):
+        page_ids.setdefault(db_key, {})[record["id"]] = response["id"]
+        state.set_page(db_key, record["id"], response["id"], write["hash"])
+        if write["children"]:
+            state.set_rendered(moved_text_key(db_key, record["id"]), response["id"], write["children"])
+
+def create_record(kind, record, page_ids):
+    """Create a Notion page for a record and remember its page id"""
+    write = build_record(kind, record)
+    response = write_record(write)
+    journal_record(write, response, page_ids)
+    return response
+
+def update_record(kind, record, page_ids):
+    """Update the Notion page of a record, creating it if it was never synced"""
+    db_key, build_properties = RECORD_TYPES[kind]
+    page_id = page_ids.get(db_key, {}).get(record.get("id"))
+    if not page_id:
+        return create_record(kind, record, page_ids)
+    
+    properties = build_properties(record)
+    new_hash = payload_hash(properties)
+    stored = state.get_page(db_key, record["id"])
+    if stored is not None and stored["payload_hash"] == new_hash:
+        return None
+    
+    payload, children, moved = spill_rich_text(properties)
+    response = notion.pages.update(page_id=page_id, properties=payload)
+    report_moved(record, moved)
+
+    # Keep the moved text in the page body in step with the record
+    sync_moved_text(db_key, record["id"], page_id, children)
+    state.set_page(db_key, record["id"], page_id, new_hash)
+    return response
+
+def archive_record(kind, record_id, page_ids):
+    """Archive the Notion page of a record removed from the JSON data"""
+    db_key, _ = RECORD_TYPES[kind]
+    page_id = page_ids.get(db_key, {}).pop(record_id, None)
+    if not page_id:
+        return None
+    
+    response = notion.pages.update(page_id=page_id, archived=True)
+    state.delete_page(db_key, record_id)
+    return response
+
+def schema_property_names(kind):
+    """Property names of the database of a record kind (cached schema), or None if it cannot be read"""
+    db_key, _ = RECORD_TYPES[kind]
+    try:
+        return set(schemas.properties(database_ids[db_key]))
+    except Exception as e:
+        report(f"  ⚠️ Could not check {db_key} properties: {e}")
+        return None
+
+def iter_records(kinds=None):
+    """Yield (kind, record) pairs one at a time from the data files, falling back to legacy data"""
+    for kind, (filename, key, get_legacy) in DATA_SOURCES.items():
+        if kinds is not None and kind not in kinds:
+            continue
+        data_path = Path("data") / filename
+        if data_path.exists():
+            records = iter_json_array(data_path, key)
+        else:
+            report(f"⚠️ {filename} not found. Using legacy data extraction...")
+            records = get_legacy()
+        for record in records:
+            yield kind, record
+
+def record_priority(kind, record):
+    """Write priority of a record from its priority (or project status) value; 0 goes first"""
+    field, levels = RECORD_PRIORITIES[kind]
+    return levels.get(record.get(field), DEFAULT_PRIORITY)
+
+def iter_prioritized(kinds=None):
+    """Yield (kind, record) pairs most important first, reading each data file once
+
+    Records of the first level are yielded as they are read. The others are
+    set aside in temporary JSON lines files, one per database and level, and
+    read back level by level, so memory stays flat whatever the input size.
+    Within a level the databases take turns, so none waits for another to
+    finish. Only one record per database is held at a time.
+    """
+    kinds = [kind for kind in DATA_SOURCES if kinds is None or kind in kinds]
+    with ExitStack() as files:
+        later = {}
+
+        def first_level(kind):
+            for item in iter_records([kind]):
+                level = record_priority(*item)
+                if level == 0:
+                    yield item
+                    continue
+                if (kind, level) not in later:
+                    later[(kind, level)] = files.enter_context(tempfile.TemporaryFile("w+"))
+                later[(kind, level)].write(json.dumps(item[1]) + "\n")
+
+        def set_aside(kind, level):
+            f = later.get((kind, level))
+            if f is None:
+                return
+            f.seek(0)
+            for line in f:
+                yield kind, json.loads(line)
+
+        for level in range(PRIORITY_LEVELS):
+            streams = [first_level(kind) if level == 0 else set_aside(kind, level) for kind in kinds]
+            while streams:
+                for stream in list(streams):
+                    item = next(stream, None)
+                    if item is None:
+                        streams.remove(stream)
+                    else:
+                        yield item
+
+def populate_stream(records, page_ids, writers=DEFAULT_WRITERS, queue_size=DEFAULT_QUEUE_SIZE, prioritize=True,
+                    profiler=None):
+    """Create a page for every record as it is read: validate → build → write → journal
+
+    The stages run concurrently with bounded queues between them, so memory
+    stays flat whatever the input size and slow writes hold the reader back.
+    With prioritize, the writers take the most important queued record first,
+    taking turns between databases and aging writes that wait too long.
+    With a profiler, each stage is profiled in its worker threads.
+    Returns the finished pipeline and a dict counting records, failures and
+    writes moved ahead by aging.
+    """
+    counts = {"records": 0, "failures": 0, "promoted": 0}
+    counts_lock = threading.Lock()
+    known = {}
+    validator = DataValidator()
+    # Legacy records are built in code without ids, so only records read from a data file are checked
+    from_file = {kind: (Path("data") / filename).exists() for kind, (filename, _, _) in DATA_SOURCES.items()}
+
+    def count_failure():
+        with counts_lock:
+            counts["failures"] += 1
+
+    def validate(item):
+        # A bad record is reported and skipped; only errors outside a record stop the run
+        kind, record = item
+        counts["records"] += 1
+        validator.errors, validator.warnings = [], []
+        valid = validator.validate_record(kind, record) if from_file[kind] else bool(record.get("name"))
+        label = f"{KIND_NAMES[kind]} {record.get('name') or record.get('id') or '(no name or id)'}"
+        for warning in validator.warnings:
+            report(f"  ⚠️ {warning}")
+        if not valid:
+            report(f"  ❌ Skipped {label}: {'; '.join(validator.errors) or 'no name'}")
+            count_failure()
+            return None
+        return item
+
+    def build(item):
+        kind, record = item
         try:
-            properties = {
-                "Resource Name": {
-                    "title": [{"text": {"content": resource["name"]}}]
-                },
-                "Type": {
-                    "select": {
-                        "name": resource["type"],
-                        "color": type_colors.get(resource["type"], "gray")
-                    }
-                },
-                "Provider": {
-                    "rich_text": [{"text": {"content": resource.get("provider", "")}}]
-                },
-                "Status": {
-                    "select": {
-                        "name": resource.get("status", "Not Started"),
-                        "color": status_colors.get(resource.get("status", "Not Started"), "gray")
-                    }
-                },
-                "Priority": {
-                    "select": {
-                        "name": resource["priority"],
-                        "color": priority_colors.get(resource["priority"], "gray")
-                    }
-                },
-                "Difficulty": {
-                    "select": {"name": resource.get("difficulty", "Intermediate")}
-                },
-                "Cost": {
-                    "select": {
-                        "name": resource.get("cost", "Paid"),
-                        "color": cost_colors.get(resource.get("cost", "Paid"), "gray")
-                    }
-                },
-                "Estimated Time": {
-                    "rich_text": [{"text": {"content": resource.get("estimated_time", "")}}]
-                },
-                "Notes": {
-                    "rich_text": [{"text": {"content": resource.get("notes", "")}}]
-                }
-            }
-            
-            # Add URL if available
-            if resource.get("url"):
-                properties["URL"] = {"url": resource["url"]}
-            
-            # Add rating if available
-            if resource.get("rating"):
-                properties["Rating"] = {"number": resource["rating"]}
-            
-            response = notion.pages.create(
-                parent={"database_id": database_ids["resources_library"]},
-                properties=properties
-            )
-            print(f"  ✅ Added: {resource['name']}")
+            write = build_record(kind, record)
         except Exception as e:
-            print(f"  ❌ Failed to add {resource['name']}: {e}")
-
-def populate_projects(projects):
-    """Populate the Projects Portfolio database"""
-    print(f"\n🚀 Populating {len(projects)} projects...")
-    
-    for project in projects:
-        # Convert lists to multi-select format
-        tech_options = []
-        for tech in project.get("technologies", []):
-            tech_options.append({"name": tech})
-        
-        skills_options = []
-        for skill in project.get("skills_applied", []):
-            skills_options.append({"name": skill})
-        
-        # Status color mapping
-        status_colors = {
-            "Not Started": "gray",
-            "Planning": "yellow",
-            "In Development": "blue",
-            "Testing": "orange",
-            "Completed": "green",
-            "Deployed": "purple",
-            "Archived": "brown"
-        }
-        
+            report(f"  ❌ Could not build {KIND_NAMES[kind]} {record.get('name') or record.get('id')}: "
+                  f"{type(e).__name__}: {e}")
+            count_failure()
+            return None
+        # Warn once per property the database does not have (schema read on the first record of a kind)
+        kind = write["kind"]
+        if kind not in known:
+            known[kind] = schema_property_names(kind)
+        missing = sorted(set(write["properties"]) - known[kind]) if known[kind] is not None else []
+        if missing:
+            report(f"  ⚠️ {write['db_key']}: properties not in the database schema: {', '.join(missing)}")
+            known[kind] |= set(missing)
+        return write
+
+    def send(write):
         try:
-            properties = {
-                "Project Name": {
-                    "title": [{"text": {"content": project["name"]}}]
-                },
-                "Description": {
-                    "rich_text": [{"text": {"content": project.get("description", "")}}]
-                },
-                "Status": {
-                    "select": {
-                        "name": project.get("status", "Not Started"),
-                        "color": status_colors.get(project.get("status", "Not Started"), "gray")
-                    }
-                },
-                "Technologies Used": {
-                    "multi_select": tech_options
-                },
-                "Skills Applied": {
-                    "multi_select": skills_options
-                },
-                "Timeline": {
-                    "rich_text": [{"text": {"content": project.get("timeline", "")}}]
-                }
-            }
-            
-            # Add URLs if available
-            if project.get("github_link"):
-                properties["GitHub Link"] = {"url": project["github_link"]}
-            
-            if project.get("demo_link"):
-                properties["Demo Link"] = {"url": project["demo_link"]}
-            
-            # Add lessons learned as a rich text field
-            if project.get("lessons_learned"):
-                lessons_text = "\n".join(f"• {lesson}" for lesson in project["lessons_learned"])
-                properties["Lessons Learned"] = {
-                    "rich_text": [{"text": {"content": lessons_text}}]
-                }
-            
-            # Add next steps
-            if project.get("next_steps"):
-                steps_text = "\n".join(f"• {step}" for step in project["next_steps"])
-                properties["Next Steps"] = {
-                    "rich_text": [{"text": {"content": steps_text}}]
-                }
-            
-            response = notion.pages.create(
-                parent={"database_id": database_ids["projects_portfolio"]},
-                properties=properties
-            )
-            print(f"  ✅ Added: {project['name']}")
+            return write, write_record(write), None
         except Exception as e:
-            print(f"  ❌ Failed to add {project['name']}: {e}")
+            return write, None, e
+
+    def journal(result):
+        write, response, error = result
+        if error:
+            report(f"  ❌ Failed to add {KIND_NAMES[write['kind']]} {write['record']['name']}: {error}")
+            count_failure()
+            return
+        journal_record(write, response, page_ids)
+        report(f"  ✅ Added {KIND_NAMES[write['kind']]}: {write['record']['name']}")
+
+    scheduler = PriorityQueue(lambda write: (record_priority(write["kind"], write["record"]), write["db_key"]),
+                              maxsize=queue_size, aging=WRITE_AGING) if prioritize else None
+    pipeline = Pipeline(records, queue_size, profiler, "populate")
+    pipeline.stage("validate", validate).stage("build", build)
+    pipeline.stage("write", send, workers=writers, inbox=scheduler).stage("journal", journal)
+    pipeline.run()
+    counts["promoted"] = scheduler.promoted if scheduler else 0
+    return pipeline, counts
+
+def partition_of(kind, record, partitions, mode="hash"):
+    """Worker that writes a record: by database, or by a stable hash of the record id"""
+    if mode == "database":
+        return list(DATA_SOURCES).index(kind) % partitions
+    key = str(record.get("id") or record.get("name"))
+    return int(hashlib.sha256(key.encode()).hexdigest(), 16) % partitions
+
+def read_records(order="priority", kinds=None):
+    """Record source of a populate run: most important first, or in file order"""
+    return iter_prioritized(kinds) if order == "priority" else iter_records(kinds)
+
+def partition_records(partition, partitions, mode, order="priority"):
+    """Records of one partition, in the order they are written"""
+    kinds = [kind for kind in DATA_SOURCES if partition_of(kind, None, partitions, "database") == partition] \
+        if mode == "database" else None
+    return ((kind, record) for kind, record in read_records(order, kinds)
+            if mode == "database" or partition_of(kind, record, partitions, mode) == partition)
+
+def populate_partition(token, partition, partitions, mode, writers, queue_size, order="priority"):
+    """Process pool worker: populate one partition with its own client and rate limiter
+
+    Pages are journaled straight into the shared state store, whose
+    transactions serialise the workers. Returns (counts, pipeline summary).
+    """
+    global notion
+    notion = create_client(token=token)
+    schemas.notion = notion
+    records = partition_records(partition, partitions, mode, order)
+    pipeline, counts = populate_stream(records, load_page_ids(), writers, queue_size, order == "priority")
+    return counts, pipeline.summary()
+
+def populate_parallel(tokens, mode, writers=DEFAULT_WRITERS, queue_size=DEFAULT_QUEUE_SIZE, order="priority"):
+    """Populate with one process per integration token, each writing its own partition of the records
+
+    Returns the merged counts and the pipeline summary of every worker. A
+    worker that crashed counts every record of its partition as failed (its
+    pages written before the crash are still in the state store) and is
+    counted in failed_workers.
+    """
+    counts = {"records": 0, "failures": 0, "promoted": 0, "failed_workers": 0}
+    summaries = []
+    # Spawned workers start with fresh clients and database connections instead of forked copies
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(tokens), mp_context=context) as pool:
+        futures = [pool.submit(populate_partition, token, partition, len(tokens), mode, writers, queue_size, order)
+                   for partition, token in enumerate(tokens)]
+        for partition, future in enumerate(futures):
+            try:
+                worker_counts, summary = future.result()
+            except Exception as e:
+                records = sum(1 for _ in partition_records(partition, len(tokens), mode, order))
+                print(f"  ❌ Worker {partition + 1} failed, {records} records not confirmed: {e}")
+                counts["records"] += records
+                counts["failures"] += records
+                counts["failed_workers"] += 1
+                continue
+            for key, value in worker_counts.items():
+                counts[key] += value
+            summaries.append((partition, summary))
+    return counts, summaries
 
 def populate_weekly_reflections():
     """Create initial weekly reflection entries"""
-    print(f"\n📊 Creating sample weekly reflections...")
+    print("\n📊 Creating sample weekly reflections...")
     
     # Create a few sample weekly reflections
     current_week = datetime.now()
@@ -693,7 +1056,7 @@ def populate_weekly_reflections():
     
     for reflection in sample_reflections:
         try:
-            response = notion.pages.create(
+            notion.pages.create(
                 parent={"database_id": database_ids["weekly_reflections"]},
                 properties={
                     "Week Date": {
@@ -703,16 +1066,16 @@ def populate_weekly_reflections():
                         "number": reflection["hours_studied"]
                     },
                     "Concepts Learned": {
-                        "rich_text": [{"text": {"content": reflection["concepts"]}}]
+                        "rich_text": rich_text(reflection["concepts"])
                     },
                     "Challenges Faced": {
-                        "rich_text": [{"text": {"content": reflection["challenges"]}}]
+                        "rich_text": rich_text(reflection["challenges"])
                     },
                     "Goals for Next Week": {
-                        "rich_text": [{"text": {"content": reflection["next_week_goals"]}}]
+                        "rich_text": rich_text(reflection["next_week_goals"])
                     },
                     "Breakthrough Moments": {
-                        "rich_text": [{"text": {"content": reflection.get("breakthrough", "")}}]
+                        "rich_text": rich_text(reflection.get("breakthrough", ""))
                     },
                     "Confidence - Backend": {
                         "number": reflection["confidence_backend"]
@@ -735,22 +1098,53 @@ def populate_weekly_reflections():
         except Exception as e:
             print(f"  ❌ Failed to add reflection: {e}")
 
-def main():
-    """Main function to populate all databases"""
+def populate_all(profiler=None, writers=DEFAULT_WRITERS, queue_size=DEFAULT_QUEUE_SIZE, tokens=None, partition="hash",
+                 order="priority"):
+    """Populate all databases from the JSON data, profiling each stage when a profiler is given
+
+    With more than one integration token, the records are split across one
+    process per token, each with its own rate limit budget. In priority
+    order, Critical/High modules, Must Read resources and projects in
+    progress are written first, so a run cut short leaves the most important
+    part of the workspace complete.
+    """
     print("📊 Starting Notion Data Population...")
     print("=" * 60)
+    tokens = tokens or [None]
     
-    # Parse learning plan
-    print("\n📖 Loading data from JSON files (with legacy fallback)...")
-    learning_modules, resources, projects = parse_learning_plan()
+    # Records stream from the JSON files (with legacy fallback) straight into the writers
+    print(f"\n📖 Streaming records from the JSON files (with legacy fallback), "
+          f"{'most important first' if order == 'priority' else 'in file order'}...")
+    with stage(profiler, "load_page_index"):
+        page_ids = load_page_ids()
+    # The pipeline's worker threads profile their own functions, and only one
+    # cProfile can be active at a time, so this stage only records time and memory
+    with state.run("populate") as run, stage(profiler, "populate", functions=len(tokens) > 1):
+        if len(tokens) > 1:
+            print(f"🔀 Splitting the records by {partition} across {len(tokens)} processes, one per token")
+            counts, summaries = populate_parallel(tokens, partition, writers, queue_size, order)
+        else:
+            pipeline, counts = populate_stream(read_records(order), page_ids, writers, queue_size,
+                                               order == "priority", profiler)
+            summaries = [(0, pipeline.summary())]
+        populate_weekly_reflections()
+        run["records"] = counts["records"]
+        run["failures"] = counts["failures"]
+        if counts.get("failed_workers"):
+            # Part of the records never went through a pipeline
+            run["failed_workers"] = counts["failed_workers"]
+            run["status"] = "failed"
     
-    print(f"Found: {len(learning_modules)} modules, {len(resources)} resources, {len(projects)} projects")
-    
-    # Populate databases
-    populate_learning_modules(learning_modules)
-    populate_resources(resources)
-    populate_projects(projects)
-    populate_weekly_reflections()
+    print(f"\n⏱️ Pipeline ({counts['records']} records, {counts['failures']} failed)")
+    if counts.get("failed_workers"):
+        print(f"   ❌ {counts['failed_workers']} of {len(tokens)} workers crashed before finishing their records")
+    if counts["promoted"]:
+        print(f"   {counts['promoted']} writes moved ahead of more important ones after waiting {WRITE_AGING:.0f}s")
+    for partition_index, summary in summaries:
+        if len(tokens) > 1:
+            print(f"   Worker {partition_index + 1}:")
+        for line in summary:
+            print(f"   {line}")
     
     print("\n" + "=" * 60)
     print("✅ Data population complete!")
@@ -760,5 +1154,50 @@ def main():
     print("3. Update weekly reflections regularly")
     print("4. Customize the data by editing the JSON files in the 'data' directory")
 
+def main(argv=None):
+    """Main function to populate all databases"""
+    parser = argparse.ArgumentParser(description="Populate the Notion learning tracker databases")
+    parser.add_argument("command", nargs="?", default="populate", choices=["populate", "watch"],
+                        help="'populate' pushes all data once, 'watch' syncs edits to data/*.json as they happen")
+    parser.add_argument("--debounce", type=float, default=1.0,
+                        help="Seconds of quiet to wait for before syncing a burst of saves (watch mode)")
+    parser.add_argument("--poll-interval", type=float, default=1.0,
+                        help="Polling interval in seconds when inotify is unavailable (watch mode)")
+    parser.add_argument("--profile", nargs="?", const="populate_profile", metavar="PREFIX",
+                        help="Profile each stage; writes PREFIX.txt and PREFIX.prof (default prefix: populate_profile)")
+    parser.add_argument("--writers", type=int, default=DEFAULT_WRITERS,
+                        help=f"Concurrent page writes (default: {DEFAULT_WRITERS})")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f"Records buffered between pipeline stages (default: {DEFAULT_QUEUE_SIZE})")
+    parser.add_argument("--processes", type=int,
+                        help="Worker processes, one per token in NOTION_TOKEN and NOTION_TOKENS (default: all tokens)")
+    parser.add_argument("--partition", choices=["hash", "database"], default="hash",
+                        help="Split records across processes by a hash of the record id, or by database")
+    parser.add_argument("--order", choices=["priority", "file"], default="priority",
+                        help="Write the most important records first (default), or in the order of the data files")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Send every request to a local stand-in and record it instead of calling Notion")
+    parser.add_argument("--fixture", default="dry_run_fixture.jsonl",
+                        help="File the dry run records requests and responses to (default: dry_run_fixture.jsonl)")
+    args = parser.parse_args(argv)
+
+    if args.dry_run:
+        import notion_dry_run
+        notion_dry_run.start(args.fixture)
+
+    if args.command == "watch":
+        from data_watcher import watch
+        watch(debounce=args.debounce, poll_interval=args.poll_interval)
+    else:
+        tokens = available_tokens()[:args.processes]
+        if args.dry_run and len(tokens) > 1:
+            # The stand-in and the scratch state live in this process
+            print("🧪 Dry run: populating in a single process")
+            tokens = tokens[:1]
+        profiler = Profiler(args.profile) if args.profile else None
+        populate_all(profiler, args.writers, args.queue_size, tokens, args.partition, args.order)
+        if profiler:
+            profiler.write()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
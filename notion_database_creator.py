@@ -5,489 +5,237 @@ Automatically creates all databases for the learning management system
 """
 
 import os
-from notion_client import Client
+import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-import json
+
+from notion_api import create_client, report
+from notion_schema import (SchemaCache, diff_database_schema, load_workspace_spec, normalize_id,
+                           print_schema_diff, property_payload, relation_properties)
+from notion_state import STATE_DB, StateStore
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Notion client
-notion = Client(auth=os.environ["NOTION_TOKEN"])
+# Initialize rate-limited Notion client (safe to share between threads)
+notion = create_client()
 PARENT_PAGE_ID = os.environ["NOTION_PARENT_PAGE_ID"]
+state = StateStore()
+schemas = SchemaCache(notion, state)
 
-def create_learning_modules_database():
-    """Create the Learning Modules database with all properties"""
-
-    properties = {
-        "Module Name": {"title": {}},
-        "Category": {
-            "select": {
-                "options": [
-                    {"name": "Backend Development", "color": "blue"},
-                    {"name": "Database Management", "color": "green"},
-                    {"name": "System Design", "color": "purple"},
-                    {"name": "Algorithms & Data Structures", "color": "orange"},
-                    {"name": "AI/ML Development", "color": "red"},
-                    {"name": "DevOps & Infrastructure", "color": "yellow"},
-                    {"name": "Design Patterns", "color": "gray"}
-                ]
-            }
-        },
-        "Phase": {
-            "select": {
-                "options": [
-                    {"name": "Phase 1 (Months 1-3)", "color": "blue"},
-                    {"name": "Phase 2 (Months 4-6)", "color": "green"},
-                    {"name": "Phase 3 (Months 3-5)", "color": "orange"},
-                    {"name": "Phase 4 (Months 6-12)", "color": "red"}
-                ]
-            }
-        },
-        "Status": {
-            "select": {
-                "options": [
-                    {"name": "Not Started", "color": "gray"},
-                    {"name": "In Progress", "color": "yellow"},
-                    {"name": "Completed", "color": "green"},
-                    {"name": "On Hold", "color": "orange"},
-                    {"name": "Archived", "color": "red"}
-                ]
-            }
-        },
-        "Priority Level": {
-            "select": {
-                "options": [
-                    {"name": "Critical", "color": "red"},
-                    {"name": "High", "color": "orange"},
-                    {"name": "Medium", "color": "yellow"},
-                    {"name": "Low", "color": "gray"}
-                ]
-            }
-        },
-        "Estimated Hours": {"number": {"format": "number"}},
-        "Actual Hours": {"number": {"format": "number"}},
-        "Progress %": {
-            "formula": {
-                "expression": "if(prop(\"Estimated Hours\") > 0, round(prop(\"Actual Hours\") / prop(\"Estimated Hours\") * 100), 0)"
-            }
-        },
-        "Start Date": {"date": {}},
-        "Target Completion": {"date": {}},
-        "Actual Completion": {"date": {}},
-        "Skills Gained": {
-            "multi_select": {
-                "options": [
-                    {"name": "API Design", "color": "blue"},
-                    {"name": "Database Optimization", "color": "green"},
-                    {"name": "System Architecture", "color": "purple"},
-                    {"name": "Algorithm Analysis", "color": "orange"},
-                    {"name": "Machine Learning", "color": "red"},
-                    {"name": "Cloud Infrastructure", "color": "yellow"},
-                    {"name": "Code Quality", "color": "gray"}
-                ]
-            }
-        },
-        "Notes": {"rich_text": {}}
-    }
+def create_database(db_key, spec=None):
+    """Create one database from the workspace spec and return its id"""
+    spec = spec or load_workspace_spec()
+    db_spec = spec["databases"][db_key]
+    title = db_spec["title"]
+    properties = {name: property_payload(definition) for name, definition in db_spec["properties"].items()}
 
     try:
         response = notion.databases.create(
             parent={"type": "page_id", "page_id": PARENT_PAGE_ID},
-            title=[{"type": "text", "text": {"content": "Learning Modules"}}],
+            title=[{"type": "text", "text": {"content": title}}],
             properties=properties
         )
-        print("✅ Learning Modules database created successfully!")
+        schemas.store(response)
+        report(f"✅ {title} database created successfully!")
         return response["id"]
     except Exception as e:
-        print(f"❌ Error creating Learning Modules database: {e}")
+        report(f"❌ Error creating {title} database: {e}")
         return None
 
+def create_learning_modules_database():
+    """Create the Learning Modules database with all properties"""
+    return create_database("learning_modules")
+
 def create_resources_library_database():
     """Create the Resources Library database with all properties"""
-
-    properties = {
-        "Resource Name": {"title": {}},
-        "Type": {
-            "select": {
-                "options": [
-                    {"name": "Book", "color": "blue"},
-                    {"name": "Online Course", "color": "green"},
-                    {"name": "Video Tutorial", "color": "orange"},
-                    {"name": "Article/Blog", "color": "yellow"},
-                    {"name": "Documentation", "color": "gray"},
-                    {"name": "Interactive Platform", "color": "purple"},
-                    {"name": "Podcast", "color": "red"}
-                ]
-            }
-        },
-        "Provider": {
-            "select": {
-                "options": [
-                    {"name": "Udemy", "color": "purple"},
-                    {"name": "Coursera", "color": "blue"},
-                    {"name": "Pluralsight", "color": "orange"},
-                    {"name": "YouTube", "color": "red"},
-                    {"name": "Book Publisher", "color": "gray"},
-                    {"name": "Official Documentation", "color": "green"},
-                    {"name": "Blog/Medium", "color": "yellow"}
-                ]
-            }
-        },
-        "Status": {
-            "select": {
-                "options": [
-                    {"name": "To Read/Watch", "color": "gray"},
-                    {"name": "In Progress", "color": "yellow"},
-                    {"name": "Completed", "color": "green"},
-                    {"name": "Reference Only", "color": "blue"},
-                    {"name": "Abandoned", "color": "red"}
-                ]
-            }
-        },
-        "Priority": {
-            "select": {
-                "options": [
-                    {"name": "Must Read", "color": "red"},
-                    {"name": "High Value", "color": "orange"},
-                    {"name": "Useful", "color": "yellow"},
-                    {"name": "Nice to Have", "color": "gray"}
-                ]
-            }
-        },
-        "Difficulty Level": {
-            "select": {
-                "options": [
-                    {"name": "Beginner", "color": "green"},
-                    {"name": "Intermediate", "color": "yellow"},
-                    {"name": "Advanced", "color": "orange"},
-                    {"name": "Expert", "color": "red"}
-                ]
-            }
-        },
-        "Rating": {
-            "select": {
-                "options": [
-                    {"name": "⭐⭐⭐⭐⭐", "color": "green"},
-                    {"name": "⭐⭐⭐⭐", "color": "yellow"},
-                    {"name": "⭐⭐⭐", "color": "orange"},
-                    {"name": "⭐⭐", "color": "red"},
-                    {"name": "⭐", "color": "gray"}
-                ]
-            }
-        },
-        "URL": {"url": {}},
-        "Cost": {
-            "select": {
-                "options": [
-                    {"name": "Free", "color": "green"},
-                    {"name": "Paid", "color": "orange"},
-                    {"name": "Subscription", "color": "red"}
-                ]
-            }
-        },
-        "Estimated Time": {"rich_text": {}},
-        "Key Takeaways": {"rich_text": {}},
-        "Practical Applications": {"rich_text": {}},
-        "Review Notes": {"rich_text": {}},
-        "Date Added": {"created_time": {}},
-        "Last Updated": {"last_edited_time": {}}
-    }
-
-    try:
-        response = notion.databases.create(
-            parent={"type": "page_id", "page_id": PARENT_PAGE_ID},
-            title=[{"type": "text", "text": {"content": "Resources Library"}}],
-            properties=properties
-        )
-        print("✅ Resources Library database created successfully!")
-        return response["id"]
-    except Exception as e:
-        print(f"❌ Error creating Resources Library database: {e}")
-        return None
+    return create_database("resources_library")
 
 def create_projects_portfolio_database():
     """Create the Projects Portfolio database with all properties"""
-
-    properties = {
-        "Project Name": {"title": {}},
-        "Project Type": {
-            "select": {
-                "options": [
-                    {"name": "Backend API", "color": "blue"},
-                    {"name": "Full-Stack Application", "color": "green"},
-                    {"name": "System Design Implementation", "color": "purple"},
-                    {"name": "AI/ML Application", "color": "red"},
-                    {"name": "Algorithm Implementation", "color": "orange"},
-                    {"name": "DevOps/Infrastructure", "color": "yellow"},
-                    {"name": "Learning Exercise", "color": "gray"}
-                ]
-            }
-        },
-        "Status": {
-            "select": {
-                "options": [
-                    {"name": "Planning", "color": "gray"},
-                    {"name": "In Development", "color": "yellow"},
-                    {"name": "Testing", "color": "orange"},
-                    {"name": "Completed", "color": "green"},
-                    {"name": "Deployed", "color": "blue"},
-                    {"name": "Archived", "color": "red"}
-                ]
-            }
-        },
-        "Complexity": {
-            "select": {
-                "options": [
-                    {"name": "Simple", "color": "green"},
-                    {"name": "Moderate", "color": "yellow"},
-                    {"name": "Complex", "color": "orange"},
-                    {"name": "Advanced", "color": "red"}
-                ]
-            }
-        },
-        "Technologies Used": {
-            "multi_select": {
-                "options": [
-                    {"name": "React", "color": "blue"},
-                    {"name": "Next.js", "color": "gray"},
-                    {"name": "TypeScript", "color": "blue"},
-                    {"name": "Node.js", "color": "green"},
-                    {"name": "Python", "color": "yellow"},
-                    {"name": "FastAPI", "color": "green"},
-                    {"name": "PostgreSQL", "color": "blue"},
-                    {"name": "Redis", "color": "red"},
-                    {"name": "Docker", "color": "blue"},
-                    {"name": "AWS", "color": "orange"},
-                    {"name": "GraphQL", "color": "purple"},
-                    {"name": "Machine Learning", "color": "red"}
-                ]
-            }
-        },
-        "GitHub Repository": {"url": {}},
-        "Live Demo": {"url": {}},
-        "Start Date": {"date": {}},
-        "Completion Date": {"date": {}},
-        "Time Invested": {"number": {"format": "number"}},
-        "Project Description": {"rich_text": {}},
-        "Key Features": {"rich_text": {}},
-        "Technical Challenges": {"rich_text": {}},
-        "Lessons Learned": {"rich_text": {}},
-        "Next Steps/Improvements": {"rich_text": {}},
-        "Portfolio Worthy": {"checkbox": {}}
-    }
-
-    try:
-        response = notion.databases.create(
-            parent={"type": "page_id", "page_id": PARENT_PAGE_ID},
-            title=[{"type": "text", "text": {"content": "Projects Portfolio"}}],
-            properties=properties
-        )
-        print("✅ Projects Portfolio database created successfully!")
-        return response["id"]
-    except Exception as e:
-        print(f"❌ Error creating Projects Portfolio database: {e}")
-        return None
+    return create_database("projects_portfolio")
 
 def create_weekly_reflections_database():
     """Create the Weekly Reflections database with all properties"""
+    return create_database("weekly_reflections")
+
+def missing_relations(db_key, live, database_ids, spec):
+    """Return the relation payloads of a database that the live schema lacks"""
+    live_properties = (live or {}).get("properties", {})
+    missing = {}
+    for name, payload in relation_properties(db_key, database_ids, spec).items():
+        live_prop = live_properties.get(name)
+        if (live_prop is None or live_prop.get("type") != "relation"
+                or normalize_id(live_prop["relation"].get("database_id")) != normalize_id(payload["relation"]["database_id"])):
+            missing[name] = payload
+    return missing
+
+def setup_database_relations(database_ids, live_schemas=None, spec=None):
+    """Add the missing relation properties, one update per database, concurrently"""
+    spec = spec or load_workspace_spec()
+    live_schemas = live_schemas or {}
+
+    updates = {}
+    for db_key in spec["databases"]:
+        properties = missing_relations(db_key, live_schemas.get(db_key), database_ids, spec)
+        if properties:
+            updates[db_key] = properties
+
+    def apply(db_key):
+        title = spec["databases"][db_key]["title"]
+        try:
+            schemas.store(notion.databases.update(database_id=database_ids[db_key], properties=updates[db_key]),
+                          database_ids[db_key])
+            return True, f"✅ {title} relations added!"
+        except Exception as e:
+            return False, f"❌ Error adding {title} relations: {e}"
+
+    if not updates:
+        print("✅ All relations already in place")
+        return True
+    with ThreadPoolExecutor(max_workers=len(updates)) as pool:
+        results = list(pool.map(apply, updates))
+    for _, message in results:
+        print(message)
+    return all(ok for ok, _ in results)
+
+def discover_databases():
+    """Return id -> title of the databases directly under the parent page"""
+    found = {}
+    kwargs = {"block_id": PARENT_PAGE_ID, "page_size": 100}
+    while True:
+        response = notion.blocks.children.list(**kwargs)
+        for block in response["results"]:
+            if block["type"] == "child_database":
+                found[block["id"]] = block["child_database"]["title"]
+        if not response.get("has_more"):
+            return found
+        kwargs["start_cursor"] = response["next_cursor"]
+
+def load_stored_database_ids():
+    """Load database ids saved by a previous run, if any"""
+    return state.get_database_ids()
+
+def migrate(dry_run=False, allow_removals=False):
+    """Bring the live databases in line with the workspace spec with one update per database"""
+    spec = load_workspace_spec()
+    print(f"🧬 Migrating workspace to schema v{spec['version']}...")
+    print("=" * 60)
 
-    properties = {
-        "Week Of": {"title": {}},
-        "Week Start Date": {"date": {}},
-        "Total Study Hours": {"number": {"format": "number"}},
-        "Study Goal Hours": {"number": {"format": "number"}},
-        "Goal Achievement": {
-            "formula": {
-                "expression": "if(prop(\"Study Goal Hours\") > 0, round(prop(\"Total Study Hours\") / prop(\"Study Goal Hours\") * 100), 0)"
-            }
-        },
-        "Focus Areas": {
-            "multi_select": {
-                "options": [
-                    {"name": "Backend Development", "color": "blue"},
-                    {"name": "Database Skills", "color": "green"},
-                    {"name": "System Design", "color": "purple"},
-                    {"name": "Algorithms", "color": "orange"},
-                    {"name": "AI/ML", "color": "red"},
-                    {"name": "Project Work", "color": "yellow"},
-                    {"name": "Reading", "color": "gray"}
-                ]
-            }
-        },
-        "Concepts Learned": {"rich_text": {}},
-        "Challenges Faced": {"rich_text": {}},
-        "Breakthrough Moments": {"rich_text": {}},
-        "Overall Confidence": {
-            "select": {
-                "options": [
-                    {"name": "Very Confident", "color": "green"},
-                    {"name": "Confident", "color": "yellow"},
-                    {"name": "Neutral", "color": "gray"},
-                    {"name": "Need Improvement", "color": "orange"},
-                    {"name": "Struggling", "color": "red"}
-                ]
-            }
-        },
-        "Backend Confidence": {
-            "select": {
-                "options": [
-                    {"name": "5 - Expert", "color": "green"},
-                    {"name": "4 - Advanced", "color": "yellow"},
-                    {"name": "3 - Intermediate", "color": "gray"},
-                    {"name": "2 - Beginner", "color": "orange"},
-                    {"name": "1 - Learning", "color": "red"}
-                ]
-            }
-        },
-        "Database Confidence": {
-            "select": {
-                "options": [
-                    {"name": "5 - Expert", "color": "green"},
-                    {"name": "4 - Advanced", "color": "yellow"},
-                    {"name": "3 - Intermediate", "color": "gray"},
-                    {"name": "2 - Beginner", "color": "orange"},
-                    {"name": "1 - Learning", "color": "red"}
-                ]
-            }
-        },
-        "System Design Confidence": {
-            "select": {
-                "options": [
-                    {"name": "5 - Expert", "color": "green"},
-                    {"name": "4 - Advanced", "color": "yellow"},
-                    {"name": "3 - Intermediate", "color": "gray"},
-                    {"name": "2 - Beginner", "color": "orange"},
-                    {"name": "1 - Learning", "color": "red"}
-                ]
-            }
-        },
-        "AI/ML Confidence": {
-            "select": {
-                "options": [
-                    {"name": "5 - Expert", "color": "green"},
-                    {"name": "4 - Advanced", "color": "yellow"},
-                    {"name": "3 - Intermediate", "color": "gray"},
-                    {"name": "2 - Beginner", "color": "orange"},
-                    {"name": "1 - Learning", "color": "red"}
-                ]
-            }
-        },
-        "Goals for Next Week": {"rich_text": {}},
-        "Action Items": {"rich_text": {}}
-    }
-
-    try:
-        response = notion.databases.create(
-            parent={"type": "page_id", "page_id": PARENT_PAGE_ID},
-            title=[{"type": "text", "text": {"content": "Weekly Reflections"}}],
-            properties=properties
-        )
-        print("✅ Weekly Reflections database created successfully!")
-        return response["id"]
-    except Exception as e:
-        print(f"❌ Error creating Weekly Reflections database: {e}")
-        return None
-
-def setup_database_relations(learning_modules_id, resources_library_id, projects_portfolio_id, weekly_reflections_id):
-    """Add relation properties between databases"""
-
-    # Add relations to Learning Modules
-    try:
-        notion.databases.update(
-            database_id=learning_modules_id,
-            properties={
-                "Related Resources": {
-                    "relation": {"database_id": resources_library_id}
-                },
-                "Related Projects": {
-                    "relation": {"database_id": projects_portfolio_id}
-                }
-            }
-        )
-        print("✅ Learning Modules relations added!")
-    except Exception as e:
-        print(f"❌ Error adding Learning Modules relations: {e}")
-
-    # Add relations to Resources Library
-    try:
-        notion.databases.update(
-            database_id=resources_library_id,
-            properties={
-                "Module Links": {
-                    "relation": {"database_id": learning_modules_id}
-                }
-            }
-        )
-        print("✅ Resources Library relations added!")
-    except Exception as e:
-        print(f"❌ Error adding Resources Library relations: {e}")
-
-    # Add relations to Projects Portfolio
-    try:
-        notion.databases.update(
-            database_id=projects_portfolio_id,
-            properties={
-                "Skills Applied": {
-                    "relation": {"database_id": learning_modules_id}
-                }
-            }
-        )
-        print("✅ Projects Portfolio relations added!")
-    except Exception as e:
-        print(f"❌ Error adding Projects Portfolio relations: {e}")
-
-    # Add relations to Weekly Reflections
-    try:
-        notion.databases.update(
-            database_id=weekly_reflections_id,
-            properties={
-                "Resources Used": {
-                    "relation": {"database_id": resources_library_id}
-                },
-                "Projects Worked On": {
-                    "relation": {"database_id": projects_portfolio_id}
-                }
-            }
-        )
-        print("✅ Weekly Reflections relations added!")
-    except Exception as e:
-        print(f"❌ Error adding Weekly Reflections relations: {e}")
-
-def main():
-    """Main function to create all databases and relations"""
+    database_ids = state.get_database_ids()
+
+    success = True
+    updates = 0
+    for db_key, db_spec in spec["databases"].items():
+        title = db_spec["title"]
+        if db_key not in database_ids:
+            print(f"❌ {title}: ID not found in {STATE_DB}")
+            success = False
+            continue
+
+        try:
+            # Diff against the live schema, never a cached one: the update is built from it
+            live = schemas.retrieve(database_ids[db_key], refresh=True)
+            diff, payload = diff_database_schema(db_key, live, database_ids, spec, allow_removals)
+            print_schema_diff(title, diff)
+            if diff["removed"] and not allow_removals:
+                print("   ⚠️ Removals skipped (use --allow-removals to delete these properties)")
+
+            if payload and not dry_run:
+                schemas.store(notion.databases.update(database_id=database_ids[db_key], properties=payload),
+                              database_ids[db_key])
+                updates += 1
+                print(f"   ✅ Applied {len(payload)} property changes in one update")
+        except Exception as e:
+            print(f"❌ {title}: migration failed - {e}")
+            success = False
+
+    print(f"\n📋 {updates} database updates {'planned' if dry_run else 'applied'}")
+    return success
+
+def provision():
+    """Create missing databases concurrently, reuse existing ones and add missing relations"""
     print("🚀 Starting Notion Learning Tracker Database Creation...")
     print("=" * 60)
 
-    # Create databases
-    learning_modules_id = create_learning_modules_database()
-    resources_library_id = create_resources_library_database()
-    projects_portfolio_id = create_projects_portfolio_database()
-    weekly_reflections_id = create_weekly_reflections_database()
-
-    # Check if all databases were created successfully
-    if all([learning_modules_id, resources_library_id, projects_portfolio_id, weekly_reflections_id]):
-        print("\n🔗 Setting up database relations...")
-        setup_database_relations(learning_modules_id, resources_library_id, projects_portfolio_id, weekly_reflections_id)
-
-        # Save database IDs for future scripts
-        database_ids = {
-            "learning_modules": learning_modules_id,
-            "resources_library": resources_library_id,
-            "projects_portfolio": projects_portfolio_id,
-            "weekly_reflections": weekly_reflections_id
-        }
-
-        with open("database_ids.json", "w") as f:
-            json.dump(database_ids, f, indent=2)
-
-        print("\n🎉 All databases created successfully!")
-        print("📋 Database IDs saved to 'database_ids.json'")
-        print("\nNext steps:")
-        print("1. Run 'python notion_data_populator.py' to add sample data")
-        print("2. Run 'python notion_dashboard_creator.py' to create dashboard pages")
-    else:
+    spec = load_workspace_spec()
+    stored = load_stored_database_ids()
+    try:
+        existing = discover_databases()
+    except Exception as e:
+        print(f"❌ Could not list the parent page: {e}")
+        return False
+
+    # Reuse databases found under the parent page: first by stored id, then by title
+    existing_ids = {normalize_id(database_id): database_id for database_id in existing}
+    database_ids = {}
+    for db_key, db_spec in spec["databases"].items():
+        stored_id = existing_ids.get(normalize_id(stored.get(db_key)))
+        by_title = [database_id for database_id, title in existing.items() if title == db_spec["title"]]
+        if stored_id or by_title:
+            database_ids[db_key] = stored_id or by_title[0]
+            print(f"♻️ {db_spec['title']}: reusing existing database")
+            if not stored_id and len(by_title) > 1:
+                print(f"   ⚠️ {len(by_title)} databases are titled '{db_spec['title']}', using the first one")
+
+    # Create the missing databases concurrently
+    missing = [db_key for db_key in spec["databases"] if db_key not in database_ids]
+    if missing:
+        with ThreadPoolExecutor(max_workers=len(missing)) as pool:
+            for db_key, database_id in zip(missing, pool.map(lambda key: create_database(key, spec), missing)):
+                if database_id:
+                    database_ids[db_key] = database_id
+
+    if len(database_ids) != len(spec["databases"]):
         print("\n❌ Some databases failed to create. Please check the errors above.")
+        return False
+
+    # Save database IDs for future scripts
+    state.set_database_ids(database_ids)
+
+    # Newly created databases have no relations yet; reused ones are checked first
+    reused = [db_key for db_key in spec["databases"] if db_key not in missing]
+    with ThreadPoolExecutor(max_workers=len(reused) or 1) as pool:
+        live_schemas = dict(zip(reused, pool.map(
+            lambda key: schemas.retrieve(database_ids[key], refresh=True), reused)))
+
+    print("\n🔗 Setting up database relations...")
+    relations_ok = setup_database_relations(database_ids, live_schemas, spec)
+
+    print(f"\n🎉 Databases ready: {len(missing)} created, {len(reused)} reused")
+    print(f"📋 Database IDs saved to '{STATE_DB}'")
+    print("\nNext steps:")
+    print("1. Run 'python notion_data_populator.py' to add sample data")
+    print("2. Run 'python notion_dashboard_creator.py' to create dashboard pages")
+    return relations_ok
+
+def main(argv=None):
+    """Main function to create or migrate all databases"""
+    parser = argparse.ArgumentParser(description="Create or migrate the Notion learning tracker databases")
+    parser.add_argument("command", nargs="?", default="create", choices=["create", "migrate"],
+                        help="'create' provisions new databases, 'migrate' applies spec changes to existing ones")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="create: send every request to a local stand-in and record it instead of calling Notion; "
+                             "migrate: only show the schema diff against the live databases")
+    parser.add_argument("--fixture", default="dry_run_fixture.jsonl",
+                        help="File a create dry run records requests and responses to (default: dry_run_fixture.jsonl)")
+    parser.add_argument("--allow-removals", action="store_true",
+                        help="Delete live properties that are no longer in the spec (migrate)")
+    args = parser.parse_args(argv)
+
+    # A migrate dry run reads the live schemas and writes nothing, so it needs no stand-in
+    if args.dry_run and args.command == "create":
+        import notion_dry_run
+        notion_dry_run.start(args.fixture)
+
+    with state.run(args.command) as run:
+        if args.command == "migrate":
+            success = migrate(dry_run=args.dry_run, allow_removals=args.allow_removals)
+        else:
+            success = provision()
+        run["status"] = "completed" if success else "failed"
+    return success
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(0 if main() else 1)
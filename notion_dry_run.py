@@ -0,0 +1,607 @@
+#!/usr/bin/env python3
+"""
+Notion Learning Tracker Dry Runs
+Recording transport and local stand-in for the Notion API, fixture replay and fixture diffs
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import atexit
+import argparse
+import threading
+
+import httpx
+from notion_client.errors import APIResponseError, HTTPResponseError
+
+import notion_state
+from notion_api import RateLimitedClient, create_client, use_transport
+from notion_blocks import (MAX_BLOCKS_PER_REQUEST, MAX_ELEMENTS_PER_REQUEST, MAX_RICH_TEXT_ITEMS,
+                           MAX_RICH_TEXT_LENGTH, count_blocks, fits_inline, get_children, without_children)
+from notion_schema import SchemaCache, normalize_id
+
+FIXTURE_FILE = "dry_run_fixture.jsonl"
+FIXTURE_VERSION = 1
+
+# Ids and timestamps are derived from the requests, so the same run always records the same fixture
+ID_NAMESPACE = uuid.UUID("6f1c2b8e-3d4a-5e6f-8a9b-0c1d2e3f4a5b")
+FIXED_TIME = "2024-01-01T00:00:00.000Z"
+
+# Notion rejects request bodies over 500 KB and URLs over 2000 characters
+MAX_PAYLOAD_BYTES = 500 * 1000
+MAX_URL_LENGTH = 2000
+
+class LocalError(Exception):
+    """An error answered by the stand-in the way the Notion API would"""
+
+    def __init__(self, status, code, message):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+def rich_text_errors(items, where):
+    """Problems Notion would report for a rich text array"""
+    if not isinstance(items, list):
+        return [f"{where} should be an array"]
+    errors = []
+    if len(items) > MAX_RICH_TEXT_ITEMS:
+        errors.append(f"{where} has {len(items)} items (max {MAX_RICH_TEXT_ITEMS})")
+    for item in items:
+        content = (item.get("text") or {}).get("content", "")
+        if len(content) > MAX_RICH_TEXT_LENGTH:
+            errors.append(f"{where}.text.content length is {len(content)} (max {MAX_RICH_TEXT_LENGTH})")
+    return errors
+
+def property_errors(name, value, prop_type):
+    """Problems Notion would report for one page property value"""
+    if isinstance(value, list):
+        # Pages under a page take their title as a bare rich text array
+        return rich_text_errors(value, name)
+    if not isinstance(value, dict):
+        return [f"{name} should be an object"]
+    prop_type = prop_type or next(iter(value), None)
+    if prop_type not in value:
+        return [f"{name} is expected to be {prop_type}"]
+    payload = value[prop_type]
+    if prop_type in ("title", "rich_text"):
+        return rich_text_errors(payload, name)
+    if prop_type == "select":
+        options = [payload] if payload else []
+    elif prop_type == "multi_select":
+        options = payload or []
+    elif prop_type == "number":
+        return [] if payload is None or (isinstance(payload, (int, float)) and not isinstance(payload, bool)) \
+            else [f"{name} should be a number"]
+    elif prop_type == "url":
+        return [f"{name} is longer than {MAX_URL_LENGTH} characters"] if payload and len(payload) > MAX_URL_LENGTH else []
+    elif prop_type == "date":
+        return [f"{name}.date.start is missing"] if payload and not payload.get("start") else []
+    else:
+        return []
+    return [f"{name} option '{option.get('name')}' contains a comma" for option in options if "," in option.get("name", "")]
+
+def block_errors(blocks, where="children"):
+    """Problems Notion would report for the blocks of one request"""
+    if len(blocks) > MAX_BLOCKS_PER_REQUEST:
+        return [f"{where} has {len(blocks)} blocks (max {MAX_BLOCKS_PER_REQUEST})"]
+    if sum(count_blocks(block) for block in blocks) > MAX_ELEMENTS_PER_REQUEST:
+        return [f"{where} has more than {MAX_ELEMENTS_PER_REQUEST} block elements"]
+    errors = []
+    for i, block in enumerate(blocks):
+        block_type = block.get("type")
+        if not block_type or block_type not in block:
+            errors.append(f"{where}[{i}] has no content for its type")
+            continue
+        if not fits_inline(block):
+            errors.append(f"{where}[{i}] nests children deeper than the API allows in one request")
+        for key in ("rich_text", "caption"):
+            if key in block[block_type]:
+                errors += rich_text_errors(block[block_type][key], f"{where}[{i}].{block_type}.{key}")
+        for j, cell in enumerate(block[block_type].get("cells", [])):
+            errors += rich_text_errors(cell, f"{where}[{i}].{block_type}.cells[{j}]")
+        errors += block_errors(get_children(block), f"{where}[{i}].{block_type}.children")
+    return errors
+
+def typed_rich_text(items):
+    """Rich text as the API returns it"""
+    return [{
+        "type": "text",
+        "text": {"content": (item.get("text") or {}).get("content", ""), "link": (item.get("text") or {}).get("link")},
+        "annotations": {"bold": False, "italic": False, "strikethrough": False, "underline": False,
+                        "code": False, "color": "default", **(item.get("annotations") or {})},
+        "plain_text": (item.get("text") or {}).get("content", ""),
+        "href": None
+    } for item in items or []]
+
+class LocalNotion:
+    """In-memory stand-in for the Notion API with request-derived ids
+
+    It answers the endpoints the scripts use, keeps the databases, pages and
+    blocks they create, and rejects payloads Notion would reject with the
+    same status and error code.
+    """
+
+    ROUTES = [
+        ("POST", r"databases", "create_database"),
+        ("GET", r"databases/([^/]+)", "retrieve_database"),
+        ("PATCH", r"databases/([^/]+)", "update_database"),
+        ("POST", r"databases/([^/]+)/query", "query_database"),
+        ("POST", r"pages", "create_page"),
+        ("GET", r"pages/([^/]+)", "retrieve_page"),
+        ("PATCH", r"pages/([^/]+)", "update_page"),
+        ("GET", r"blocks/([^/]+)/children", "list_children"),
+        ("PATCH", r"blocks/([^/]+)/children", "append_children"),
+        ("GET", r"blocks/([^/]+)", "retrieve_block"),
+        ("PATCH", r"blocks/([^/]+)", "update_block"),
+        ("DELETE", r"blocks/([^/]+)", "delete_block"),
+        ("POST", r"search", "search")
+    ]
+
+    def __init__(self, seed=None):
+        seed = seed or {}
+        self.databases = seed.get("databases", {})
+        self.pages = seed.get("pages", {})
+        self.blocks = seed.get("blocks", {})
+        self.children = seed.get("children", {})
+        self.seen = {}
+
+    def snapshot(self):
+        """Everything the stand-in holds, as JSON-serialisable data"""
+        return json.loads(json.dumps({"databases": self.databases, "pages": self.pages,
+                                      "blocks": self.blocks, "children": self.children}))
+
+    def new_id(self, *parts):
+        """Deterministic id from the request that creates an object (repeats get their own id)"""
+        key = json.dumps(parts, sort_keys=True)
+        occurrence = self.seen.get(key, 0)
+        self.seen[key] = occurrence + 1
+        return str(uuid.uuid5(ID_NAMESPACE, f"{key}#{occurrence}"))
+
+    def handle(self, method, path, query, body):
+        """Answer one request; returns (status, response)"""
+        try:
+            if len(json.dumps(body or {}).encode()) > MAX_PAYLOAD_BYTES:
+                raise LocalError(413, "payload_too_large", "Request body too large")
+            for route_method, pattern, handler in self.ROUTES:
+                match = re.fullmatch(pattern, path)
+                if match and method == route_method:
+                    return 200, getattr(self, handler)(*match.groups(), query=query or {}, body=body or {})
+            raise LocalError(400, "invalid_request_url", f"Invalid request URL: {method} {path}")
+        except LocalError as e:
+            return e.status, {"object": "error", "status": e.status, "code": e.code, "message": e.message}
+
+    def validate(self, errors):
+        """Reject a request with Notion's validation_error when it has problems"""
+        if errors:
+            # Sorted so the message does not depend on the key order of the request body
+            raise LocalError(400, "validation_error", "; ".join(sorted(errors)))
+
+    # Databases
+
+    def schema_property(self, name, definition, existing=None):
+        """A database property definition as the API returns it"""
+        prop_type = next(key for key in definition if key != "name")
+        config = dict(definition[prop_type] or {})
+        if prop_type in ("select", "multi_select"):
+            config["options"] = [{"id": str(uuid.uuid5(ID_NAMESPACE, f"{name}/{option['name']}"))[:8],
+                                  "name": option["name"], "color": option.get("color", "default")}
+                                 for option in config.get("options", [])]
+        prop_id = "title" if prop_type == "title" else (existing or {}).get("id") or \
+            str(uuid.uuid5(ID_NAMESPACE, name))[:4]
+        return {"id": prop_id, "name": name, "type": prop_type, prop_type: config}
+
+    def find_database(self, database_id):
+        """The stored database with this id, or object_not_found"""
+        database = self.databases.get(normalize_id(database_id))
+        if database is None:
+            raise LocalError(404, "object_not_found", f"Could not find database with ID: {database_id}.")
+        return database
+
+    def create_database(self, query, body):
+        self.validate(rich_text_errors(body.get("title", []), "title"))
+        database_id = self.new_id("database", body)
+        database = {
+            "object": "database",
+            "id": database_id,
+            "created_time": FIXED_TIME,
+            "last_edited_time": FIXED_TIME,
+            "title": typed_rich_text(body.get("title")),
+            "parent": body.get("parent"),
+            "properties": {name: self.schema_property(name, definition)
+                           for name, definition in body.get("properties", {}).items()},
+            "archived": False
+        }
+        self.databases[normalize_id(database_id)] = database
+        self.add_child(body.get("parent", {}).get("page_id"), {
+            "object": "block", "id": database_id, "type": "child_database",
+            "child_database": {"title": "".join(item["plain_text"] for item in database["title"])},
+            "has_children": False, "archived": False
+        })
+        return database
+
+    def retrieve_database(self, database_id, query, body):
+        return self.find_database(database_id)
+
+    def update_database(self, database_id, query, body):
+        database = self.find_database(database_id)
+        properties = database["properties"]
+        for name, change in body.get("properties", {}).items():
+            if change is None:
+                properties.pop(name, None)
+                continue
+            current = properties.pop(name, None)
+            new_name = change.get("name", name)
+            if any(key != "name" for key in change):
+                properties[new_name] = self.schema_property(new_name, change, current)
+            elif current:
+                properties[new_name] = {**current, "name": new_name}
+        if "title" in body:
+            database["title"] = typed_rich_text(body["title"])
+        return database
+
+    def query_database(self, database_id, query, body):
+        self.find_database(database_id)
+        key = normalize_id(database_id)
+        pages = [page for page in self.pages.values()
+                 if normalize_id(page["parent"].get("database_id")) == key and not page["archived"]]
+        return self.paginate(pages, body.get("start_cursor"), body.get("page_size", 100), "page_or_database")
+
+    # Pages
+
+    def typed_properties(self, properties, schema):
+        """Page property values as the API returns them"""
+        typed = {}
+        for name, value in properties.items():
+            if isinstance(value, list):
+                value = {"title": value}
+            prop_type = schema[name]["type"] if schema and name in schema else next(iter(value))
+            content = value.get(prop_type)
+            if prop_type in ("title", "rich_text"):
+                content = typed_rich_text(content)
+            typed[name] = {"id": schema[name]["id"] if schema and name in schema else name, "type": prop_type,
+                           prop_type: content}
+        return typed
+
+    def page_errors(self, properties, schema):
+        """Problems with the properties of a page write, checked against the database schema if known"""
+        errors = []
+        for name, value in properties.items():
+            if schema is not None and name not in schema:
+                errors.append(f"{name} is not a property that exists")
+            else:
+                errors += property_errors(name, value, schema[name]["type"] if schema else None)
+        return errors
+
+    def schema_of(self, parent):
+        """Properties of the database a page belongs to, or None when it is not known"""
+        database = self.databases.get(normalize_id((parent or {}).get("database_id")))
+        return database["properties"] if database else None
+
+    def create_page(self, query, body):
+        parent = body.get("parent") or {}
+        if not parent.get("database_id") and not parent.get("page_id"):
+            self.validate(["body.parent should have a database_id or a page_id"])
+        schema = self.schema_of(parent)
+        children = body.get("children", [])
+        self.validate(self.page_errors(body.get("properties", {}), schema) + block_errors(children))
+
+        page_id = self.new_id("page", body)
+        page = {
+            "object": "page",
+            "id": page_id,
+            "created_time": FIXED_TIME,
+            "last_edited_time": FIXED_TIME,
+            "parent": parent,
+            "archived": False,
+            "properties": self.typed_properties(body.get("properties", {}), schema),
+            "url": f"https://www.notion.so/{normalize_id(page_id)}"
+        }
+        self.pages[page_id] = page
+        if parent.get("page_id"):
+            title = "".join(item["plain_text"] for item in page["properties"].get("title", {}).get("title", []))
+            self.add_child(parent["page_id"], {"object": "block", "id": page_id, "type": "child_page",
+                                               "child_page": {"title": title}, "has_children": bool(children),
+                                               "archived": False})
+        self.store_blocks(page_id, children, ("page", page_id))
+        return page
+
+    def find_page(self, page_id):
+        """The stored page, or a stand-in for a page created before the dry run"""
+        if page_id not in self.pages:
+            self.pages[page_id] = {"object": "page", "id": page_id, "created_time": FIXED_TIME,
+                                   "last_edited_time": FIXED_TIME, "parent": {}, "archived": False, "properties": {}}
+        return self.pages[page_id]
+
+    def retrieve_page(self, page_id, query, body):
+        return self.find_page(page_id)
+
+    def update_page(self, page_id, query, body):
+        page = self.find_page(page_id)
+        schema = self.schema_of(page["parent"])
+        self.validate(self.page_errors(body.get("properties", {}), schema))
+        page["properties"].update(self.typed_properties(body.get("properties", {}), schema))
+        if "archived" in body:
+            page["archived"] = body["archived"]
+        return page
+
+    # Blocks
+
+    def add_child(self, parent_id, block, after=None):
+        """Store a block under its parent, at the end or after a sibling"""
+        if not parent_id:
+            return
+        self.blocks[block["id"]] = block
+        siblings = self.children.setdefault(parent_id, [])
+        siblings.insert(siblings.index(after) + 1 if after in siblings else len(siblings), block["id"])
+
+    def store_blocks(self, parent_id, blocks, seed, after=None):
+        """Store payload blocks (and their children) under a parent; returns the created block objects"""
+        created = []
+        for i, payload in enumerate(blocks):
+            block = without_children(payload)
+            block.update({
+                "object": "block",
+                "id": self.new_id("block", seed, i),
+                "created_time": FIXED_TIME,
+                "last_edited_time": FIXED_TIME,
+                "has_children": bool(get_children(payload)),
+                "archived": False
+            })
+            self.add_child(parent_id, block, after)
+            after = block["id"]
+            self.store_blocks(block["id"], get_children(payload), ("block", block["id"]))
+            created.append(block)
+        return created
+
+    def find_block(self, block_id):
+        """The stored block, or block object_not_found"""
+        if block_id not in self.blocks:
+            raise LocalError(404, "object_not_found", f"Could not find block with ID: {block_id}.")
+        return self.blocks[block_id]
+
+    def list_children(self, block_id, query, body):
+        children = [self.blocks[child] for child in self.children.get(block_id, [])]
+        return self.paginate(children, query.get("start_cursor"), int(query.get("page_size", 100)), "block")
+
+    def append_children(self, block_id, query, body):
+        children = body.get("children", [])
+        self.validate(block_errors(children))
+        created = self.store_blocks(block_id, children, ("append", block_id, body), after=body.get("after"))
+        return {"object": "list", "results": created, "next_cursor": None, "has_more": False, "type": "block",
+                "block": {}}
+
+    def retrieve_block(self, block_id, query, body):
+        return self.find_block(block_id)
+
+    def update_block(self, block_id, query, body):
+        block = self.find_block(block_id)
+        content = body.get(block["type"], {})
+        self.validate(block_errors([{"type": block["type"], block["type"]: content}]))
+        block[block["type"]].update(content)
+        return block
+
+    def delete_block(self, block_id, query, body):
+        block = self.find_block(block_id)
+        block["archived"] = True
+        for siblings in self.children.values():
+            if block_id in siblings:
+                siblings.remove(block_id)
+        return block
+
+    def search(self, query, body):
+        return self.paginate([], None, 100, "page_or_database")
+
+    def paginate(self, items, cursor, page_size, result_type):
+        """A list response, using the id of the next item as the cursor like the API"""
+        start = next((i for i, item in enumerate(items) if item["id"] == cursor), 0) if cursor else 0
+        page = items[start:start + min(page_size, 100)]
+        has_more = start + len(page) < len(items)
+        return {"object": "list", "results": page, "next_cursor": items[start + len(page)]["id"] if has_more else None,
+                "has_more": has_more, "type": result_type, result_type: {}}
+
+def seed_from_state(state, parent_page_id=None, notion=None):
+    """Stand-in contents matching the local state: database schemas and rendered page bodies
+
+    Database writes are then checked against the schemas Notion last reported,
+    and dashboard re-renders and moved record text diff against the blocks
+    they would find. With a client, schemas the cache lacks or holds past
+    their TTL are fetched first (read-only), so the stand-in knows every
+    database the state store does.
+    """
+    stand_in = LocalNotion()
+    schemas = SchemaCache(notion, state) if notion else None
+    for database_id in state.get_database_ids().values():
+        if schemas:
+            try:
+                schemas.retrieve(database_id)
+            except Exception as e:
+                print(f"⚠️ Dry run: could not fetch the schema of database {database_id}: {e}", file=sys.stderr)
+        cached = state.get_schema(normalize_id(database_id))
+        if cached:
+            stand_in.databases[normalize_id(database_id)] = cached[0]
+            title = "".join(item.get("plain_text", "") for item in cached[0].get("title", []))
+            stand_in.add_child(parent_page_id, {"object": "block", "id": database_id, "type": "child_database",
+                                                "child_database": {"title": title}, "has_children": False,
+                                                "archived": False})
+
+    database_ids = state.get_database_ids()
+    for page_key, (page_id, content) in state.get_rendered_pages().items():
+        if "/" in page_key:
+            # Text the populator moved to the body of a record page ("database key/record id")
+            parent = {"type": "database_id", "database_id": database_ids.get(page_key.split("/")[0])}
+            stand_in.pages[page_id] = {"object": "page", "id": page_id, "created_time": FIXED_TIME,
+                                       "last_edited_time": FIXED_TIME, "parent": parent, "archived": False,
+                                       "properties": {}}
+            stand_in.store_blocks(page_id, content, ("seed", page_key))
+            continue
+        if page_id == parent_page_id:
+            stand_in.store_blocks(page_id, content, ("seed", page_key))
+            continue
+        stand_in.pages[page_id] = {"object": "page", "id": page_id, "created_time": FIXED_TIME,
+                                   "last_edited_time": FIXED_TIME, "parent": {"type": "page_id", "page_id": parent_page_id},
+                                   "archived": False, "properties": {}}
+        stand_in.add_child(parent_page_id, {"object": "block", "id": page_id, "type": "child_page",
+                                            "child_page": {"title": page_key}, "has_children": bool(content),
+                                            "archived": False})
+        stand_in.store_blocks(page_id, content, ("seed", page_key))
+    return stand_in
+
+def request_parts(request):
+    """Split an httpx request into (method, API path, query, JSON body)"""
+    path = request.url.path.split("/v1/", 1)[-1]
+    query = {key: request.url.params.get_list(key) for key in request.url.params.keys()}
+    query = {key: values[0] if len(values) == 1 else values for key, values in query.items()}
+    body = json.loads(request.content) if request.content else None
+    return request.method, path, query, body
+
+def canonical(data):
+    """Byte-stable JSON of a request or response"""
+    return json.dumps(data, sort_keys=True, ensure_ascii=False)
+
+class RecordingTransport(httpx.BaseTransport):
+    """httpx transport answering from a LocalNotion and writing every exchange to a fixture file"""
+
+    def __init__(self, stand_in, path=FIXTURE_FILE, script=None):
+        self.stand_in = stand_in
+        self.path = path
+        self.lock = threading.Lock()
+        self.count = 0
+        self.rejected = 0
+        self.file = open(path, "w")
+        self.file.write(canonical({"fixture": FIXTURE_VERSION, "script": script, "seed": stand_in.snapshot()}) + "\n")
+
+    def handle_request(self, request):
+        method, path, query, body = request_parts(request)
+        with self.lock:
+            status, response = self.stand_in.handle(method, path, query, body)
+            self.count += 1
+            self.rejected += status != 200
+            self.file.write(canonical({"seq": self.count, "method": method, "path": path, "query": query,
+                                       "body": body, "status": status, "response": response}) + "\n")
+        return httpx.Response(status, content=canonical(response).encode(),
+                              headers={"Content-Type": "application/json"})
+
+    def close(self):
+        """Close the fixture and report what was recorded"""
+        if self.file:
+            self.file.close()
+            self.file = None
+            print(f"🧪 Dry run: {self.count} requests recorded to {self.path}"
+                  f"{f' ({self.rejected} rejected)' if self.rejected else ''}; Notion and {notion_state.STATE_DB} untouched",
+                  file=sys.stderr)
+
+class ReplayTransport(httpx.BaseTransport):
+    """httpx transport answering from a LocalNotion, used to replay fixtures"""
+
+    def __init__(self, stand_in):
+        self.stand_in = stand_in
+
+    def handle_request(self, request):
+        status, response = self.stand_in.handle(*request_parts(request))
+        return httpx.Response(status, content=canonical(response).encode(),
+                              headers={"Content-Type": "application/json"})
+
+def start(fixture=FIXTURE_FILE, script=None):
+    """Switch the process to a dry run: local state goes to a scratch copy, requests to a recording stand-in"""
+    notion_state.use_scratch_copies()
+    # Missing schemas are fetched into the scratch copy before requests are diverted
+    stand_in = seed_from_state(notion_state.StateStore(import_legacy=False), os.environ.get("NOTION_PARENT_PAGE_ID"),
+                               create_client())
+    transport = RecordingTransport(stand_in, fixture, script or os.path.basename(sys.argv[0]))
+    use_transport(transport)
+    atexit.register(transport.close)
+    print(f"🧪 Dry run: requests go to a local stand-in and are recorded to {fixture}", file=sys.stderr)
+    return transport
+
+def load_fixture(path):
+    """Return (header, exchanges) of a fixture file"""
+    with open(path, "r") as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines or lines[0].get("fixture") != FIXTURE_VERSION:
+        raise ValueError(f"{path} is not a dry-run fixture")
+    return lines[0], lines[1:]
+
+def replay(path, repeat=1):
+    """Replay a fixture through the client against a fresh stand-in; returns (mismatches, seconds per pass)"""
+    header, exchanges = load_fixture(path)
+    mismatches = []
+    timings = []
+    for _ in range(repeat):
+        client = RateLimitedClient(auth="dry-run", max_retries=0)
+        client.attach(ReplayTransport(LocalNotion(json.loads(canonical(header["seed"])))))
+        started = time.perf_counter()
+        for exchange in exchanges:
+            try:
+                response, status = client.request(exchange["path"], exchange["method"], exchange["query"] or None,
+                                                  exchange["body"]), 200
+            except (APIResponseError, HTTPResponseError) as e:
+                response, status = json.loads(e.body), e.status
+            if status != exchange["status"] or canonical(response) != canonical(exchange["response"]):
+                mismatches.append(exchange["seq"])
+        timings.append(time.perf_counter() - started)
+    return sorted(set(mismatches)), timings
+
+def request_key(exchange):
+    """What identifies a request when two fixtures are compared"""
+    return canonical({key: exchange[key] for key in ("method", "path", "query", "body")})
+
+def diff_fixtures(old_path, new_path):
+    """Compare the request streams of two fixtures regardless of order; returns (removed, added)"""
+    _, old = load_fixture(old_path)
+    _, new = load_fixture(new_path)
+    old_keys = [request_key(exchange) for exchange in old]
+    new_keys = [request_key(exchange) for exchange in new]
+    removed, added = list(old_keys), []
+    for key in new_keys:
+        if key in removed:
+            removed.remove(key)
+        else:
+            added.append(key)
+    return [json.loads(key) for key in removed], [json.loads(key) for key in added]
+
+def describe(request, width=120):
+    """One line describing a recorded request"""
+    text = f"{request['method']} {request['path']} {canonical(request['body']) if request['body'] else ''}"
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+def main(argv=None):
+    """Command line entry point for replaying and comparing dry-run fixtures"""
+    parser = argparse.ArgumentParser(description="Replay or compare dry-run fixtures")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    replay_parser = subparsers.add_parser("replay", help="Replay a fixture against the local stand-in")
+    replay_parser.add_argument("fixture")
+    replay_parser.add_argument("--repeat", type=int, default=1, help="Replay passes, for benchmarking")
+    diff_parser = subparsers.add_parser("diff", help="Compare the requests of two fixtures")
+    diff_parser.add_argument("old")
+    diff_parser.add_argument("new")
+    args = parser.parse_args(argv)
+
+    if args.command == "replay":
+        mismatches, timings = replay(args.fixture, args.repeat)
+        _, exchanges = load_fixture(args.fixture)
+        best = min(timings)
+        print(f"⏱️ {len(exchanges)} requests replayed {args.repeat}× — best pass {best * 1000:.1f}ms "
+              f"({len(exchanges) / best if best else 0:.0f} req/s)")
+        if mismatches:
+            print(f"❌ {len(mismatches)} responses differ from the fixture (seq {', '.join(map(str, mismatches[:20]))})")
+            return False
+        print("✅ Every response matches the fixture byte for byte")
+        return True
+
+    removed, added = diff_fixtures(args.old, args.new)
+    for request in removed:
+        print(f"- {describe(request)}")
+    for request in added:
+        print(f"+ {describe(request)}")
+    if removed or added:
+        print(f"\n❌ {len(removed)} requests removed, {len(added)} added")
+        return False
+    print("✅ Both fixtures send the same requests")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Notion Learning Tracker Local Mirror
+Pulls all four databases into a local SQLite mirror with flattened property columns
+"""
+
+import sys
+import json
+import sqlite3
+import argparse
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+from notion_api import create_client
+from notion_state import StateStore
+
+# Load environment variables
+load_dotenv()
+
+MIRROR_DB = "notion_mirror.db"
+
+# Database key -> display name, in pull order
+MIRRORED_DATABASES = {
+    "learning_modules": "Learning Modules",
+    "resources_library": "Resources Library",
+    "projects_portfolio": "Projects Portfolio",
+    "weekly_reflections": "Weekly Reflections"
+}
+
+# Columns every mirror table has before the flattened property columns. They are
+# underscore-prefixed because SQLite identifiers are case-insensitive and a
+# property such as "URL" would otherwise collide with them
+BASE_COLUMNS = ["_page_id", "_created_time", "_last_edited_time", "_url", "_properties"]
+
+def quote(identifier):
+    """Quote a property name for use as an SQLite identifier"""
+    return '"' + identifier.replace('"', '""') + '"'
+
+def connect(path=MIRROR_DB):
+    """Open the mirror database and make sure the bookkeeping tables exist"""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS mirror_state (
+            database_key TEXT PRIMARY KEY,
+            database_id TEXT NOT NULL,
+            high_water_mark TEXT,
+            last_pull_at TEXT
+        );
+        CREATE TABLE IF NOT EXISTS mirror_columns (
+            database_key TEXT NOT NULL,
+            property TEXT NOT NULL,
+            type TEXT NOT NULL,
+            PRIMARY KEY (database_key, property)
+        );
+    """)
+    return conn
+
+def flatten_property(prop):
+    """Flatten a Notion property value into a single SQLite-friendly value"""
+    prop_type = prop.get("type")
+    value = prop.get(prop_type)
+
+    if value is None:
+        return None
+    if prop_type in ("title", "rich_text"):
+        return "".join(part.get("plain_text", part.get("text", {}).get("content", "")) for part in value)
+    if prop_type in ("select", "status"):
+        return value.get("name")
+    if prop_type == "multi_select":
+        return json.dumps([option["name"] for option in value])
+    if prop_type == "date":
+        return value.get("start")
+    if prop_type == "checkbox":
+        return int(value)
+    if prop_type in ("relation", "people"):
+        return json.dumps([item["id"] for item in value])
+    if prop_type == "files":
+        return json.dumps([item.get("name") for item in value])
+    if prop_type == "formula":
+        return flatten_property(value)
+    if prop_type == "rollup":
+        if value.get("type") == "array":
+            return json.dumps([flatten_property(item) for item in value.get("array", [])])
+        return flatten_property(value)
+    if prop_type == "unique_id":
+        prefix = value.get("prefix")
+        return f"{prefix}-{value.get('number')}" if prefix else value.get("number")
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return value
+
+def column_type(prop):
+    """Return the flattened type stored for a property (formulas report their result type)"""
+    if prop.get("type") == "formula":
+        return prop["formula"].get("type", "formula")
+    return prop.get("type")
+
+def ensure_table(conn, db_key, properties):
+    """Create the mirror table for a database and add columns for unseen properties"""
+    columns = ", ".join(f"{name} TEXT" for name in BASE_COLUMNS[1:])
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {quote(db_key)} (_page_id TEXT PRIMARY KEY, {columns})")
+
+    existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({quote(db_key)})")}
+    for name, prop in properties.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {quote(db_key)} ADD COLUMN {quote(name)}")
+            existing.add(name)
+        conn.execute(
+            "INSERT OR REPLACE INTO mirror_columns (database_key, property, type) VALUES (?, ?, ?)",
+            (db_key, name, column_type(prop))
+        )
+
+def upsert_page(conn, db_key, page, known_columns=None):
+    """Insert or replace one page in its mirror table"""
+    properties = page.get("properties", {})
+    if known_columns is None or not known_columns.issuperset(properties):
+        ensure_table(conn, db_key, properties)
+        if known_columns is not None:
+            known_columns.update(properties)
+
+    row = {
+        "_page_id": page["id"],
+        "_created_time": page.get("created_time"),
+        "_last_edited_time": page.get("last_edited_time"),
+        "_url": page.get("url"),
+        "_properties": json.dumps(properties)
+    }
+    for name, prop in properties.items():
+        row[name] = flatten_property(prop)
+
+    columns = ", ".join(quote(name) for name in row)
+    placeholders = ", ".join("?" for _ in row)
+    conn.execute(f"INSERT OR REPLACE INTO {quote(db_key)} ({columns}) VALUES ({placeholders})", list(row.values()))
+
+def delete_page(conn, db_key, page_id):
+    """Drop a page from the mirror, e.g. after archiving it"""
+    with conn:
+        conn.execute(f"DELETE FROM {quote(db_key)} WHERE _page_id = ?", (page_id,))
+
+def get_high_water_mark(conn, db_key):
+    """Return the newest last_edited_time mirrored for a database, or None"""
+    row = conn.execute("SELECT high_water_mark FROM mirror_state WHERE database_key = ?", (db_key,)).fetchone()
+    return row["high_water_mark"] if row else None
+
+def query_pages(notion, database_id, since=None):
+    """Yield every page of a database, optionally only those edited since a timestamp"""
+    kwargs = {"database_id": database_id, "page_size": 100}
+    if since:
+        # last_edited_time is truncated to the minute, so re-read the boundary
+        # minute; upserts make the overlap harmless
+        kwargs["filter"] = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": since}}
+
+    while True:
+        response = notion.databases.query(**kwargs)
+        yield from response["results"]
+        if not response.get("has_more"):
+            break
+        kwargs["start_cursor"] = response["next_cursor"]
+
+def pull_database(notion, conn, db_key, database_id, full=False):
+    """Pull one database into the mirror and return the number of pages fetched"""
+    since = None if full else get_high_water_mark(conn, db_key)
+    high_water_mark = since
+    seen = set()
+    known_columns = set()
+    count = 0
+
+    with conn:
+        ensure_table(conn, db_key, {})
+        for page in query_pages(notion, database_id, since):
+            upsert_page(conn, db_key, page, known_columns)
+            seen.add(page["id"])
+            count += 1
+            edited = page.get("last_edited_time")
+            if edited and (high_water_mark is None or edited > high_water_mark):
+                high_water_mark = edited
+
+        # Archived pages never come back from a query, so only a full pull can prune them
+        if full:
+            stale = [row["_page_id"] for row in conn.execute(f"SELECT _page_id FROM {quote(db_key)}")
+                     if row["_page_id"] not in seen]
+            conn.executemany(f"DELETE FROM {quote(db_key)} WHERE _page_id = ?", [(page_id,) for page_id in stale])
+
+        conn.execute(
+            "INSERT OR REPLACE INTO mirror_state (database_key, database_id, high_water_mark, last_pull_at) VALUES (?, ?, ?, ?)",
+            (db_key, database_id, high_water_mark, datetime.now(timezone.utc).isoformat())
+        )
+
+    return count
+
+def pull(notion, database_ids, conn, full=False, only=None):
+    """Pull every mirrored database and return a database key -> pages fetched map"""
+    results = {}
+    for db_key, db_name in MIRRORED_DATABASES.items():
+        if only and db_key not in only:
+            continue
+        if db_key not in database_ids:
+            print(f"⚠️ {db_name}: ID not found in the state store, skipping")
+            continue
+        try:
+            count = pull_database(notion, conn, db_key, database_ids[db_key], full=full)
+            results[db_key] = count
+            print(f"✅ {db_name}: {count} {'pages' if full else 'changed pages'} pulled")
+        except Exception as e:
+            print(f"❌ {db_name}: pull failed - {e}")
+    return results
+
+def read_pages(conn, db_key):
+    """Return all mirrored pages of a database as dicts of flattened columns"""
+    try:
+        return [dict(row) for row in conn.execute(f"SELECT * FROM {quote(db_key)}")]
+    except sqlite3.OperationalError:
+        return []
+
+def print_status(conn):
+    """Print page counts and high-water marks of the mirror"""
+    for db_key, db_name in MIRRORED_DATABASES.items():
+        row = conn.execute("SELECT * FROM mirror_state WHERE database_key = ?", (db_key,)).fetchone()
+        if row is None:
+            print(f"⚪ {db_name}: never pulled")
+            continue
+        count = len(read_pages(conn, db_key))
+        print(f"📦 {db_name}: {count} pages, edited up to {row['high_water_mark']}, pulled {row['last_pull_at']}")
+
+def main(argv=None):
+    """Command line entry point for the local mirror"""
+    parser = argparse.ArgumentParser(description="Mirror the Notion learning tracker databases into SQLite")
+    parser.add_argument("command", choices=["pull", "status"])
+    parser.add_argument("--full", action="store_true", help="Re-fetch every page and prune archived ones")
+    parser.add_argument("--database", action="append", choices=list(MIRRORED_DATABASES),
+                        help="Only pull this database (can be repeated)")
+    parser.add_argument("--db", default=MIRROR_DB, help="Path of the SQLite mirror")
+    args = parser.parse_args(argv)
+
+    conn = connect(args.db)
+    if args.command == "status":
+        print_status(conn)
+        return True
+
+    database_ids = StateStore().get_database_ids()
+    notion = create_client()
+    print("🔄 Pulling Notion databases into the local mirror...")
+    print("=" * 60)
+    results = pull(notion, database_ids, conn, full=args.full, only=args.database)
+    print(f"\n📋 {sum(results.values())} pages pulled into {args.db}")
+    return len(results) == len(args.database or MIRRORED_DATABASES)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Notion Learning Tracker Pipeline
+Incremental JSON record reader and threaded stages connected by bounded queues
+"""
+
+import json
+import time
+import queue
+import threading
+
+from notion_profile import worker
+
+# Characters read from a data file at a time
+CHUNK_SIZE = 64 * 1024
+
+# Items waiting between two stages; a full queue blocks the stage feeding it
+DEFAULT_QUEUE_SIZE = 8
+
+# End of the stream, sent once to every worker of the next stage
+DONE = object()
+
+def iter_json_array(path, key, chunk_size=CHUNK_SIZE):
+    """Yield the items of the array under key in a JSON object file, reading the file in chunks
+
+    Only one item (and one chunk) is held at a time, so memory does not grow
+    with the file. Other top-level keys are decoded and skipped.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r") as f:
+        buffer, pos, eof = "", 0, False
+
+        def refill():
+            nonlocal buffer, pos, eof
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+
+        def peek():
+            """Skip whitespace and return the next character (empty at the end of the file)"""
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos].isspace():
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    return buffer[pos:pos + 1]
+                refill()
+
+        def expect(chars):
+            nonlocal pos
+            char = peek()
+            if not char or char not in chars:
+                raise ValueError(f"{path}: expected one of {chars!r}, found {char!r}")
+            pos += 1
+            return char
+
+        def value():
+            nonlocal pos
+            peek()
+            while True:
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                    # A number cut by the end of the buffer may continue in the next chunk
+                    if eof or (end < len(buffer) and buffer[end] not in "0123456789.eE+-"):
+                        pos = end
+                        return item
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                refill()
+
+        expect("{")
+        if peek() == "}":
+            return
+        while True:
+            name = value()
+            expect(":")
+            if name != key:
+                value()
+            elif peek() == "n":
+                value()
+            else:
+                expect("[")
+                if peek() != "]":
+                    while True:
+                        yield value()
+                        if expect(",]") == "]":
+                            break
+                else:
+                    expect("]")
+            if expect(",}") == "}":
+                return
+
+class PriorityQueue:
+    """Bounded queue handing out the most important item first, fairly across groups
+
+    key(item) returns (priority, group); a lower priority number goes first.
+    Every aging seconds an item waits counts as one priority level, so
+    low-priority work still moves when important work keeps arriving. Among
+    items of the same effective level, the group served least recently goes
+    first (e.g. one database per turn), then the oldest item.
+    """
+
+    def __init__(self, key, maxsize=DEFAULT_QUEUE_SIZE, aging=30.0):
+        self.key = key
+        self.maxsize = maxsize
+        self.aging = aging
+        self.items = []
+        self.served = {}
+        self.turn = 0
+        self.count = 0
+        self.promoted = 0
+        self.condition = threading.Condition()
+
+    def qsize(self):
+        with self.condition:
+            return len(self.items)
+
+    def put(self, item, timeout=None):
+        """Add an item, waiting while the queue is full (queue.Full after timeout)"""
+        with self.condition:
+            if not self.condition.wait_for(lambda: len(self.items) < self.maxsize, timeout):
+                raise queue.Full
+            # The end of the stream goes after every real item
+            priority, group = (float("inf"), None) if item is DONE else self.key(item)
+            self.count += 1
+            self.items.append((priority, group, time.monotonic(), self.count, item))
+            self.condition.notify_all()
+
+    def get(self, timeout=None):
+        """Remove and return the next item to handle (queue.Empty after timeout)"""
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.items, timeout):
+                raise queue.Empty
+            now = time.monotonic()
+
+            def order(entry):
+                priority, group, queued, count, _ = entry
+                level = priority - int((now - queued) / self.aging) if priority != float("inf") else priority
+                return level, self.served.get(group, 0), count
+
+            entry = min(self.items, key=order)
+            self.items.remove(entry)
+            if order(entry)[0] < entry[0] and any(other[0] < entry[0] for other in self.items):
+                self.promoted += 1
+            self.turn += 1
+            self.served[entry[1]] = self.turn
+            self.condition.notify_all()
+            return entry[4]
+
+class Pipeline:
+    """Stages running in their own threads, connected by bounded queues
+
+    Each stage function takes an item and returns the item for the next
+    stage, or None to drop it. When a stage is slower than the one before,
+    its queue fills up and the earlier stages (down to the reader) wait,
+    so at most a few items per stage are in flight at any time. With a
+    profiler, reading the source and every stage function are profiled in
+    the threads that run them, as rows named "<name>/<stage>".
+    """
+
+    def __init__(self, source, queue_size=DEFAULT_QUEUE_SIZE, profiler=None, name="pipeline"):
+        self.source = source
+        self.queue_size = queue_size
+        self.profiler = profiler
+        self.name = name
+        self.stages = []
+        self.error = None
+        self.failed = threading.Event()
+        self.started = None
+        self.first_output = None
+
+    def stage(self, name, function, workers=1, inbox=None):
+        """Add a stage run by a number of worker threads, fed by a FIFO queue or the given inbox"""
+        self.stages.append({"name": name, "function": function, "workers": workers, "inbox": inbox, "items": 0,
+                            "busy": 0.0, "blocked": 0.0, "max_depth": 0, "running": workers})
+        return self
+
+    def put(self, target, item, stats):
+        """Hand an item to the next stage, waiting while its queue is full"""
+        started = time.perf_counter()
+        while not self.failed.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                stats["blocked"] += time.perf_counter() - started
+                stats["max_depth"] = max(stats["max_depth"], target.qsize())
+                return
+            except queue.Full:
+                continue
+
+    def fail(self, error):
+        """Stop every stage after an unexpected error"""
+        if not self.failed.is_set():
+            self.error = error
+            self.failed.set()
+
+    def read(self, target, stats):
+        """Feed the items of the source to the first stage"""
+        try:
+            with worker(self.profiler, f"{self.name}/read") as call:
+                items = iter(self.source)
+                while not self.failed.is_set():
+                    item = call(next, items, DONE)
+                    if item is DONE:
+                        break
+                    stats["items"] += 1
+                    self.put(target, item, stats)
+        except Exception as e:
+            self.fail(e)
+        finally:
+            for _ in range(self.stages[0]["workers"]):
+                self.put(target, DONE, stats)
+
+    def work(self, index, inbox, outbox, lock):
+        """Run one worker of a stage until the stream ends"""
+        stats = self.stages[index]
+        next_workers = self.stages[index + 1]["workers"] if outbox else 0
+        try:
+            with worker(self.profiler, f"{self.name}/{stats['name']}") as call:
+                while not self.failed.is_set():
+                    try:
+                        item = inbox.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+                    if item is DONE:
+                        break
+                    started = time.perf_counter()
+                    result = call(stats["function"], item)
+                    with lock:
+                        stats["busy"] += time.perf_counter() - started
+                        stats["items"] += 1
+                    if outbox is None:
+                        if self.first_output is None:
+                            self.first_output = time.perf_counter() - self.started
+                    elif result is not None:
+                        self.put(outbox, result, stats)
+        except Exception as e:
+            self.fail(e)
+        finally:
+            with lock:
+                stats["running"] -= 1
+                last = stats["running"] == 0
+            # The last worker to finish passes the end of the stream on
+            if last and outbox is not None:
+                for _ in range(next_workers):
+                    self.put(outbox, DONE, stats)
+
+    def run(self):
+        """Run the pipeline to the end; re-raises the first unexpected error of any stage"""
+        self.started = time.perf_counter()
+        queues = [stats["inbox"] or queue.Queue(maxsize=self.queue_size) for stats in self.stages]
+        self.reader = {"name": "read", "items": 0, "blocked": 0.0, "max_depth": 0}
+        threads = [threading.Thread(target=self.read, args=(queues[0], self.reader), name="pipeline-read")]
+        for index, stats in enumerate(self.stages):
+            outbox = queues[index + 1] if index + 1 < len(self.stages) else None
+            lock = threading.Lock()
+            threads += [threading.Thread(target=self.work, args=(index, queues[index], outbox, lock),
+                                         name=f"pipeline-{stats['name']}-{worker}")
+                        for worker in range(stats["workers"])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.elapsed = time.perf_counter() - self.started
+        if self.error:
+            raise self.error
+        return self
+
+    def summary(self):
+        """Printable lines: items, busy time and time spent waiting on a full queue per stage"""
+        lines = [f"{'Stage':<12} {'Items':>6} {'Busy':>8} {'Blocked':>8} {'Max queue':>9}"]
+        for stats in [self.reader] + self.stages:
+            lines.append(f"{stats['name']:<12} {stats['items']:>6} {stats.get('busy', 0.0):>7.2f}s "
+                         f"{stats['blocked']:>7.2f}s {stats['max_depth']:>9}")
+        if self.first_output is not None:
+            lines.append(f"First record through after {self.first_output * 1000:.0f}ms, "
+                         f"all done after {self.elapsed:.1f}s")
+        return lines
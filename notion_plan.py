@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Notion Learning Tracker Run Planner
+Estimates the API calls and duration of a run from local state, without sending any request
+"""
+
+import sys
+import json
+import argparse
+
+import notion_data_populator as populator
+import notion_database_creator as creator
+import notion_dashboard_creator as dashboard
+from notion_api import DEFAULT_BURST, DEFAULT_RATE
+from notion_blocks import append_requests, inline_count, plan_sync, spill_rich_text
+from notion_schema import diff_database_schema, load_workspace_spec
+
+PLANNED_RUNS = ["populate", "update", "create", "migrate", "dashboard"]
+
+# plan_sync counters -> endpoint
+BLOCK_ENDPOINTS = {
+    "list": "GET blocks/{id}/children",
+    "append": "PATCH blocks/{id}/children",
+    "update": "PATCH blocks/{id}",
+    "delete": "DELETE blocks/{id}"
+}
+
+class Plan:
+    """The calls a run would make, by endpoint, with the records or pages that cause them"""
+
+    def __init__(self, run):
+        self.run = run
+        self.calls = {}
+        self.causes = []
+        self.warnings = []
+        self.skipped = 0
+
+    def add(self, endpoint, cause, count=1):
+        """Count calls to an endpoint and remember what causes them"""
+        if count:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + count
+            self.causes.append({"endpoint": endpoint, "count": count, "cause": cause})
+
+    def add_blocks(self, counts, cause):
+        """Count the block requests of a plan_sync result"""
+        for key, count in counts.items():
+            self.add(BLOCK_ENDPOINTS[key], cause, count)
+
+    def warn(self, message):
+        """Flag something the run would do that is probably not intended"""
+        self.warnings.append(message)
+
+    @property
+    def total(self):
+        """Total number of planned calls"""
+        return sum(self.calls.values())
+
+    def duration(self, rate=DEFAULT_RATE):
+        """Shortest time the calls can take through the rate limiter, in seconds"""
+        return max(0, self.total - DEFAULT_BURST) / rate
+
+    def to_dict(self, rate=DEFAULT_RATE):
+        """The plan as a JSON-serialisable dict"""
+        return {
+            "run": self.run,
+            "calls": dict(sorted(self.calls.items(), key=lambda item: -item[1])),
+            "total": self.total,
+            "rate": rate,
+            "estimated_seconds": round(self.duration(rate), 1),
+            "skipped": self.skipped,
+            "causes": self.causes,
+            "warnings": self.warnings
+        }
+
+def schema_fetch(plan, database_id, cause, refresh=False):
+    """Plan the databases.retrieve a SchemaCache lookup makes when the cached schema is missing, expired or refreshed"""
+    cached = populator.schemas.cached(database_id)
+    if refresh or not cached or not cached[1]:
+        plan.add("GET databases/{id}", cause)
+    return cached[0] if cached else None
+
+def plan_populate(plan):
+    """Plan notion_data_populator.py: the schema preflight, then one page per record"""
+    learning_modules, resources, projects = populator.parse_learning_plan()
+    page_ids = populator.load_page_ids()
+    for kind, records in (("modules", learning_modules), ("resources", resources), ("projects", projects)):
+        db_key, build_properties = populator.RECORD_TYPES[kind]
+        schema_fetch(plan, populator.database_ids.get(db_key, ""), f"{db_key} schema preflight")
+        mapped = 0
+        for record in records:
+            cause = f"{db_key}: {record.get('id') or record.get('name')}"
+            plan.add("POST pages", cause)
+            _, children, _ = spill_rich_text(build_properties(record))
+            plan.add("PATCH blocks/{id}/children", f"{cause} (long text moved to the page body)",
+                     append_requests(children[inline_count(children):]))
+            mapped += record.get("id") in page_ids.get(db_key, {})
+        if mapped:
+            plan.warn(f"{mapped} of {len(records)} {kind} already have pages; populate creates them again "
+                      f"(plan 'update' shows the incremental alternative)")
+    plan.add("POST pages", "weekly_reflections: sample reflection")
+
+def plan_moved_text(plan, db_key, record_id, properties):
+    """Plan the page body sync update_record makes for text too long for its property"""
+    _, children, _ = spill_rich_text(properties)
+    written = populator.state.get_rendered(populator.moved_text_key(db_key, record_id))
+    old = written[1] if written else []
+    if children == old:
+        return
+    if old:
+        plan.add("GET blocks/{id}/children", f"{db_key}: {record_id} (find the moved text)")
+    plan.add_blocks(plan_sync(old, children), f"{db_key}: {record_id} (moved text)")
+
+def plan_update(plan):
+    """Plan an incremental push of every record (update_record / archive_record, as the watcher does)"""
+    learning_modules, resources, projects = populator.parse_learning_plan()
+    page_ids = populator.load_page_ids()
+    for kind, records in (("modules", learning_modules), ("resources", resources), ("projects", projects)):
+        db_key, build_properties = populator.RECORD_TYPES[kind]
+        mapped = page_ids.get(db_key, {})
+        for record in records:
+            record_id = record.get("id")
+            if record_id not in mapped:
+                plan.add("POST pages", f"{db_key}: {record_id or record.get('name')} (new)")
+                continue
+            stored = populator.state.get_page(db_key, record_id)
+            if stored is not None and stored["payload_hash"] == populator.payload_hash(build_properties(record)):
+                plan.skipped += 1
+            else:
+                plan.add("PATCH pages/{id}", f"{db_key}: {record_id} (changed)")
+                plan_moved_text(plan, db_key, record_id, build_properties(record))
+        for record_id in set(mapped) - {record.get("id") for record in records}:
+            plan.add("PATCH pages/{id}", f"{db_key}: {record_id} (archived, removed from JSON)")
+
+def plan_create(plan):
+    """Plan notion_database_creator.py create: list the parent, create missing databases, add relations"""
+    spec = load_workspace_spec()
+    database_ids = creator.load_stored_database_ids()
+    plan.add("GET blocks/{id}/children", "discover databases under the parent page")
+    for db_key in spec["databases"]:
+        if db_key not in database_ids:
+            plan.add("POST databases", f"{db_key}: not created yet")
+            if spec["databases"][db_key].get("relations"):
+                plan.add("PATCH databases/{id}", f"{db_key}: relations of the new database")
+            continue
+        live = schema_fetch(plan, database_ids[db_key], f"{db_key}: check relations", refresh=True)
+        targets = spec["databases"][db_key].get("relations", {}).values()
+        if any(target not in database_ids for target in targets):
+            plan.add("PATCH databases/{id}", f"{db_key}: relations to new databases")
+        elif live is None:
+            plan.warn(f"{db_key}: schema not cached, a relation update may follow")
+        elif creator.missing_relations(db_key, live, database_ids, spec):
+            plan.add("PATCH databases/{id}", f"{db_key}: missing relations")
+
+def plan_migrate(plan):
+    """Plan notion_database_creator.py migrate: a fresh schema per database, then an update where the cached one drifted"""
+    spec = load_workspace_spec()
+    database_ids = creator.load_stored_database_ids()
+    for db_key in spec["databases"]:
+        if db_key not in database_ids:
+            plan.warn(f"{db_key}: no database id, migrate skips it")
+            continue
+        live = schema_fetch(plan, database_ids[db_key], f"{db_key}: compare with the spec", refresh=True)
+        if live is None:
+            plan.warn(f"{db_key}: schema not cached, an update may follow")
+            continue
+        diff, payload = diff_database_schema(db_key, live, database_ids, spec)
+        if payload:
+            changes = ", ".join(f"{len(value)} {key}" for key, value in diff.items() if value)
+            plan.add("PATCH databases/{id}", f"{db_key}: {changes}")
+
+def plan_dashboard(plan):
+    """Plan notion_dashboard_creator.py from the content each page was last rendered with"""
+    linked = ["learning_modules", "resources_library", "projects_portfolio", "weekly_reflections"]
+    for db_key in linked:
+        schema_fetch(plan, dashboard.database_ids.get(db_key, ""), f"{db_key}: linked database check")
+    missing = [db_key for db_key in linked if db_key not in dashboard.database_ids]
+    if missing:
+        plan.warn(f"no database id for {', '.join(missing)}; the dashboard creator stops after its checks")
+        return
+    plan.add("GET blocks/{id}/children", "list the parent page")
+
+    page_ids = {}
+    for key, (title, content_builder) in dashboard.PAGE_CONTENT.items():
+        content = content_builder()
+        rendered = dashboard.state.get_rendered(title)
+        if rendered is None:
+            # Never rendered from this machine: render_page creates the page
+            plan.add("POST pages", f"{title}: new page")
+            plan.add("PATCH blocks/{id}/children", f"{title}: blocks beyond the first request",
+                     append_requests(content[inline_count(content):]))
+            page_ids[key] = "planned"
+            continue
+        page_ids[key] = rendered[0]
+        plan.add("GET blocks/{id}/children", f"{title}: list blocks")
+        plan.add_blocks(plan_sync(rendered[1], content), f"{title}: changed blocks")
+
+    content = dashboard.main_navigation_content(page_ids)
+    rendered = dashboard.state.get_rendered(dashboard.NAVIGATION_KEY)
+    plan.add_blocks(plan_sync(rendered[1] if rendered else [], content), "main navigation: changed blocks")
+
+PLANNERS = {
+    "populate": plan_populate,
+    "update": plan_update,
+    "create": plan_create,
+    "migrate": plan_migrate,
+    "dashboard": plan_dashboard
+}
+
+def plan_run(run):
+    """Build the plan of one run"""
+    plan = Plan(run)
+    PLANNERS[run](plan)
+    return plan
+
+def print_plan(plan, rate=DEFAULT_RATE, top=10):
+    """Print the endpoint breakdown, the estimated duration and the biggest causes of work"""
+    print(f"\n📋 Plan for '{plan.run}': {plan.total} calls, ≈ {plan.duration(rate):.0f}s at {rate:g} req/s")
+    for endpoint, count in sorted(plan.calls.items(), key=lambda item: -item[1]):
+        print(f"   {count:>6}  {endpoint}")
+    if plan.causes:
+        print("   Caused by:")
+        for cause in sorted(plan.causes, key=lambda cause: -cause["count"])[:top]:
+            print(f"   • {cause['cause']} ({cause['count']} × {cause['endpoint']})")
+        if len(plan.causes) > top:
+            print(f"   • ... and {len(plan.causes) - top} more")
+    if plan.skipped:
+        print(f"   ⏭️ {plan.skipped} records unchanged since their last write (no call)")
+    for warning in plan.warnings:
+        print(f"   ⚠️ {warning}")
+
+def main(argv=None):
+    """Command line entry point for planning runs"""
+    parser = argparse.ArgumentParser(description="Estimate the API calls of a run without making any")
+    # Checked by hand: argparse rejects an empty optional positional list that has choices
+    parser.add_argument("runs", nargs="*", metavar="RUN",
+                        help=f"Runs to plan: {', '.join(PLANNED_RUNS)} (default: populate dashboard)")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Requests per second of the rate limiter")
+    parser.add_argument("--json", action="store_true", help="Print the plans as JSON")
+    args = parser.parse_args(argv)
+    unknown = [run for run in args.runs if run not in PLANNED_RUNS]
+    if unknown:
+        parser.error(f"unknown run {', '.join(unknown)} (choose from {', '.join(PLANNED_RUNS)})")
+
+    plans = [plan_run(run) for run in args.runs or ["populate", "dashboard"]]
+    if args.json:
+        print(json.dumps([plan.to_dict(args.rate) for plan in plans], indent=2, ensure_ascii=False))
+        return True
+
+    for plan in plans:
+        print_plan(plan, args.rate)
+    total = sum(plan.total for plan in plans)
+    print(f"\n🧮 Total: {total} calls, ≈ {max(0, total - DEFAULT_BURST) / args.rate:.0f}s")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
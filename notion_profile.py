@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Notion Learning Tracker Profiler
+Per-stage CPU and memory profiling for the local hot paths (--profile)
+"""
+
+import io
+import sys
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+# Entries listed per stage in the report
+TOP_FUNCTIONS = 15
+TOP_ALLOCATIONS = 10
+
+class Profiler:
+    """Wraps pipeline stages with cProfile and tracemalloc snapshots
+
+    Stages run one after another; each gets its own profile, CPU and wall
+    time, peak memory and the lines that allocated the most. Stages that run
+    in worker threads (see worker()) get a row of their own below the stage
+    that started them. write() saves a text report and one combined .prof
+    file for snakeviz, gprof2dot & co.
+    """
+
+    def __init__(self, prefix="profile"):
+        self.prefix = prefix
+        self.stages = []
+        self.active = False
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name, functions=True):
+        """Profile the code run inside the block as one stage
+
+        Without functions the stage only records time and memory, for stages
+        whose worker threads profile their own functions (see worker()): only
+        one cProfile can be active at a time on Python 3.12+.
+        """
+        if self.active:
+            # cProfile cannot nest; an inner stage is part of the outer one
+            yield
+            return
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        profile = cProfile.Profile() if functions else None
+        wall, cpu = time.perf_counter(), time.process_time()
+        index = len(self.stages)
+
+        self.active = True
+        if profile:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile:
+                profile.disable()
+            self.active = False
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+
+            # Leave out the profiler's own bookkeeping
+            ignored = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+            after, before = after.filter_traces(ignored), before.filter_traces(ignored)
+            allocations = [stat for stat in after.compare_to(before, "lineno") if stat.size_diff > 0]
+            # Worker rows recorded meanwhile stay below the stage that started them
+            self.stages.insert(index, {
+                "name": name,
+                "wall": wall,
+                "cpu": cpu,
+                "peak": peak,
+                "allocated": sum(stat.size_diff for stat in allocations),
+                "allocations": allocations[:TOP_ALLOCATIONS],
+                "profiles": [profile] if profile else []
+            })
+
+    @contextmanager
+    def worker(self, name):
+        """Profile the calls one worker thread makes through the yielded call(function, *args)
+
+        cProfile only sees the thread that enables it, so each worker thread
+        profiles itself, and only while it runs a call (not while it waits on
+        a queue). Workers of the same name are merged into one row: wall is
+        the time spent in calls summed over the workers, CPU their thread CPU
+        time. Memory cannot be told apart by thread and stays with the
+        enclosing stage. Python 3.12+ allows only one profiler at a time
+        across all threads: a call made while another one is active (an outer
+        stage, or a call in another worker) is timed but not profiled.
+        """
+        profile = cProfile.Profile()
+        totals = {"wall": 0.0, "cpu": 0.0, "profiled": False}
+
+        def call(function, *args):
+            wall, cpu = time.perf_counter(), time.thread_time()
+            try:
+                profile.enable()
+                profiling = totals["profiled"] = True
+            except ValueError:
+                profiling = False
+            try:
+                return function(*args)
+            finally:
+                if profiling:
+                    profile.disable()
+                totals["wall"] += time.perf_counter() - wall
+                totals["cpu"] += time.thread_time() - cpu
+
+        try:
+            yield call
+        finally:
+            with self.lock:
+                row = next((row for row in self.stages if row["name"] == name and row["allocations"] is None), None)
+                if row is None:
+                    row = {"name": name, "wall": 0.0, "cpu": 0.0, "peak": None, "allocated": None,
+                           "allocations": None, "profiles": []}
+                    self.stages.append(row)
+                row["wall"] += totals["wall"]
+                row["cpu"] += totals["cpu"]
+                if totals["profiled"]:
+                    row["profiles"].append(profile)
+
+    def report(self):
+        """Build the text report: a stage table, then the top functions and allocations of each stage"""
+        lines = [
+            f"{'Stage':<24} {'Wall':>9} {'CPU':>9} {'Peak MB':>9} {'Alloc MB':>9}",
+            "-" * 64
+        ]
+        for stage in self.stages:
+            memory = f"{'-':>9} {'-':>9}" if stage["allocations"] is None else \
+                f"{stage['peak'] / 2**20:>9.2f} {stage['allocated'] / 2**20:>9.2f}"
+            lines.append(f"{stage['name']:<24} {stage['wall']:>8.3f}s {stage['cpu']:>8.3f}s {memory}")
+
+        for stage in self.stages:
+            lines += ["", f"=== {stage['name']} ===", ""]
+            if not stage["profiles"] and stage["allocations"] is None:
+                lines.append("Functions: not profiled, another profiler was active during every call")
+            elif not stage["profiles"]:
+                lines.append("Functions: profiled in the worker threads of this stage")
+            else:
+                lines.append("Top functions (cumulative time):")
+                stream = io.StringIO()
+                pstats.Stats(*stage["profiles"], stream=stream).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+                # Skip the pstats preamble up to the column header
+                output = stream.getvalue().splitlines()
+                header = next((i for i, line in enumerate(output) if "ncalls" in line), 0)
+                lines += [line for line in output[header:] if line.strip()]
+
+            if stage["allocations"] is None:
+                lines += ["", "Memory: counted in the stage that started these worker threads"]
+                continue
+            lines += ["", "Top allocating lines (new memory held at the end of the stage):"]
+            for stat in stage["allocations"]:
+                frame = stat.traceback[0]
+                lines.append(f"  {frame.filename}:{frame.lineno}: {stat.size_diff / 1024:.1f} KiB "
+                             f"in {stat.count_diff} blocks")
+            if not stage["allocations"]:
+                lines.append("  (none)")
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        """Write <prefix>.txt and the combined <prefix>.prof, print the stage table and return the paths"""
+        if not self.stages:
+            return None
+        report_path, prof_path = f"{self.prefix}.txt", f"{self.prefix}.prof"
+        report = self.report()
+        with open(report_path, "w") as f:
+            f.write(report)
+
+        profiles = [profile for stage in self.stages for profile in stage["profiles"]]
+        if profiles:
+            pstats.Stats(*profiles).dump_stats(prof_path)
+        else:
+            prof_path = None
+
+        table = report.split("\n\n", 1)[0]
+        print(f"\n⏱️ Profile by stage\n{table}", file=sys.stderr)
+        print(f"📝 Profile report written to {report_path}"
+              f"{f', profile data to {prof_path}' if prof_path else ' (no functions were profiled)'}", file=sys.stderr)
+        return report_path, prof_path
+
+def stage(profiler, name, functions=True):
+    """Profile a stage when a profiler is given, otherwise do nothing"""
+    return profiler.stage(name, functions) if profiler else nullcontext()
+
+def call(function, *args):
+    """Call a function unprofiled (what worker() yields without a profiler)"""
+    return function(*args)
+
+def worker(profiler, name):
+    """Profile a worker thread when a profiler is given; yields call(function, *args) either way"""
+    return profiler.worker(name) if profiler else nullcontext(call)
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Notion Learning Tracker Local Query Engine
+Runs Notion-style filters and sorts against the local SQLite mirror
+"""
+
+import sys
+import json
+import argparse
+from datetime import date, timedelta
+
+from notion_mirror import MIRROR_DB, MIRRORED_DATABASES, connect, quote
+
+# Property types whose columns get an index for filtering and sorting
+INDEXED_TYPES = {"select", "status", "date", "number", "checkbox", "created_time", "last_edited_time"}
+
+# Property types stored as JSON arrays in the mirror
+ARRAY_TYPES = {"multi_select", "relation", "people", "files"}
+
+# Property types stored as plain text in the mirror
+TEXT_TYPES = {"title", "rich_text", "url", "email", "phone_number", "unique_id", "string"}
+
+# Timestamp filters map onto the mirror's base columns
+TIMESTAMP_COLUMNS = {"created_time": "_created_time", "last_edited_time": "_last_edited_time"}
+
+NUMBER_OPERATORS = {
+    "equals": "=",
+    "does_not_equal": "!=",
+    "greater_than": ">",
+    "less_than": "<",
+    "greater_than_or_equal_to": ">=",
+    "less_than_or_equal_to": "<="
+}
+
+DATE_OPERATORS = {
+    "before": "<",
+    "after": ">",
+    "on_or_before": "<=",
+    "on_or_after": ">="
+}
+
+def get_column_types(conn, db_key):
+    """Return the property -> flattened type map recorded by the mirror"""
+    rows = conn.execute("SELECT property, type FROM mirror_columns WHERE database_key = ?", (db_key,))
+    return {row["property"]: row["type"] for row in rows}
+
+def ensure_indexes(conn, db_key, column_types=None):
+    """Index the select, date and number columns of a mirrored database"""
+    column_types = column_types or get_column_types(conn, db_key)
+    with conn:
+        for prop, prop_type in column_types.items():
+            if prop_type in INDEXED_TYPES:
+                index_name = quote(f"idx_{db_key}_{prop}")
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {quote(db_key)} ({quote(prop)})")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {quote(f'idx_{db_key}__last_edited_time')} "
+                     f"ON {quote(db_key)} (_last_edited_time)")
+
+def _empty_condition(column, condition):
+    """Translate is_empty / is_not_empty for any column type"""
+    if condition == "is_empty":
+        return f"({column} IS NULL OR {column} = '' OR {column} = '[]')", []
+    return f"({column} IS NOT NULL AND {column} != '' AND {column} != '[]')", []
+
+def _relative_date_range(condition):
+    """Return the [start, end) ISO range of Notion's relative date conditions"""
+    today = date.today()
+    ranges = {
+        "past_week": (today - timedelta(days=7), today + timedelta(days=1)),
+        "past_month": (today - timedelta(days=30), today + timedelta(days=1)),
+        "past_year": (today - timedelta(days=365), today + timedelta(days=1)),
+        "next_week": (today, today + timedelta(days=8)),
+        "next_month": (today, today + timedelta(days=31)),
+        "next_year": (today, today + timedelta(days=366)),
+        "this_week": (today - timedelta(days=today.weekday()), today - timedelta(days=today.weekday()) + timedelta(days=7))
+    }
+    start, end = ranges[condition]
+    return start.isoformat(), end.isoformat()
+
+def _condition_sql(column, prop_type, condition, value):
+    """Translate a single type-specific condition into SQL"""
+    if condition in ("is_empty", "is_not_empty"):
+        return _empty_condition(column, condition)
+
+    if prop_type in TEXT_TYPES:
+        if condition == "equals":
+            return f"{column} = ?", [value]
+        if condition == "does_not_equal":
+            return f"({column} IS NULL OR {column} != ?)", [value]
+        if condition == "contains":
+            return f"instr(lower({column}), lower(?)) > 0", [value]
+        if condition == "does_not_contain":
+            return f"({column} IS NULL OR instr(lower({column}), lower(?)) = 0)", [value]
+        if condition == "starts_with":
+            return f"lower({column}) LIKE lower(?) || '%'", [value]
+        if condition == "ends_with":
+            return f"lower({column}) LIKE '%' || lower(?)", [value]
+
+    if prop_type in ("select", "status"):
+        if condition == "equals":
+            return f"{column} = ?", [value]
+        if condition == "does_not_equal":
+            return f"({column} IS NULL OR {column} != ?)", [value]
+
+    if prop_type == "number" and condition in NUMBER_OPERATORS:
+        return f"{column} {NUMBER_OPERATORS[condition]} ?", [value]
+
+    if prop_type in ("checkbox", "boolean"):
+        if condition == "equals":
+            return f"{column} = ?", [int(bool(value))]
+        if condition == "does_not_equal":
+            return f"{column} != ?", [int(bool(value))]
+
+    if prop_type in ARRAY_TYPES:
+        member = f"EXISTS (SELECT 1 FROM json_each({column}) WHERE json_each.value = ?)"
+        if condition == "contains":
+            return member, [value]
+        if condition == "does_not_contain":
+            return f"({column} IS NULL OR NOT {member})", [value]
+
+    if prop_type in ("date", "created_time", "last_edited_time"):
+        if condition == "equals":
+            return f"substr({column}, 1, 10) = substr(?, 1, 10)", [value]
+        if condition in DATE_OPERATORS:
+            return f"{column} {DATE_OPERATORS[condition]} ?", [value]
+        if condition in ("past_week", "past_month", "past_year", "next_week", "next_month", "next_year", "this_week"):
+            start, end = _relative_date_range(condition)
+            return f"({column} >= ? AND {column} < ?)", [start, end]
+
+    raise ValueError(f"Unsupported {prop_type} filter condition: {condition}")
+
+def build_where(filter_obj, column_types):
+    """Translate a Notion filter object into an SQL expression and its parameters"""
+    if "and" in filter_obj or "or" in filter_obj:
+        joiner = "and" if "and" in filter_obj else "or"
+        parts, params = [], []
+        for sub_filter in filter_obj[joiner]:
+            sql, sub_params = build_where(sub_filter, column_types)
+            parts.append(f"({sql})")
+            params.extend(sub_params)
+        if not parts:
+            return "1 = 1", []
+        return f" {joiner.upper()} ".join(parts), params
+
+    if "timestamp" in filter_obj:
+        timestamp = filter_obj["timestamp"]
+        ((condition, value),) = filter_obj[timestamp].items()
+        return _condition_sql(TIMESTAMP_COLUMNS[timestamp], timestamp, condition, value)
+
+    prop = filter_obj.get("property")
+    if prop not in column_types:
+        raise ValueError(f"Unknown property in filter: {prop}")
+
+    (filter_type,) = [key for key in filter_obj if key != "property"]
+    conditions = filter_obj[filter_type]
+    column = quote(prop)
+
+    # Formula filters nest the result type: {"formula": {"number": {...}}}
+    if filter_type == "formula":
+        ((filter_type, conditions),) = conditions.items()
+
+    ((condition, value),) = conditions.items()
+    return _condition_sql(column, filter_type, condition, value)
+
+def build_order_by(sorts, column_types):
+    """Translate Notion sorts into an SQL ORDER BY clause"""
+    clauses = []
+    for sort in sorts or []:
+        if "timestamp" in sort:
+            column = TIMESTAMP_COLUMNS[sort["timestamp"]]
+        elif sort.get("property") in column_types:
+            column = quote(sort["property"])
+        else:
+            raise ValueError(f"Unknown property in sort: {sort.get('property')}")
+        direction = "DESC" if sort.get("direction") == "descending" else "ASC"
+        # Notion puts empty values last in both directions
+        clauses.append(f"{column} IS NULL, {column} {direction}")
+    return f" ORDER BY {', '.join(clauses)}" if clauses else ""
+
+def query_database(conn, db_key, filter=None, sorts=None, limit=None):
+    """Run a Notion-style query against a mirrored database and return rows as dicts"""
+    column_types = get_column_types(conn, db_key)
+    if not column_types:
+        raise ValueError(f"{db_key} has not been pulled into the mirror yet")
+    ensure_indexes(conn, db_key, column_types)
+
+    sql = f"SELECT * FROM {quote(db_key)}"
+    params = []
+    if filter:
+        where, params = build_where(filter, column_types)
+        sql += f" WHERE {where}"
+    sql += build_order_by(sorts, column_types)
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+
+    return [dict(row) for row in conn.execute(sql, params)]
+
+def print_table(rows, columns):
+    """Print rows as a simple aligned text table"""
+    widths = {column: max([len(column)] + [len(str(row.get(column, ""))) for row in rows]) for column in columns}
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    print("  ".join("-" * widths[column] for column in columns))
+    for row in rows:
+        print("  ".join(str(row.get(column, "") if row.get(column) is not None else "").ljust(widths[column])
+                        for column in columns))
+
+def main(argv=None):
+    """Command line entry point for local queries"""
+    parser = argparse.ArgumentParser(description="Query the local Notion mirror with Notion filter/sort JSON")
+    parser.add_argument("database", choices=list(MIRRORED_DATABASES))
+    parser.add_argument("--filter", help='Notion filter JSON, e.g. \'{"property": "Status", "select": {"equals": "In Progress"}}\'')
+    parser.add_argument("--sorts", help='Notion sorts JSON, e.g. \'[{"property": "Estimated Hours", "direction": "descending"}]\'')
+    parser.add_argument("--columns", help="Comma-separated properties to show (table output)")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--json", action="store_true", help="Print matching rows as JSON lines")
+    parser.add_argument("--db", default=MIRROR_DB, help="Path of the SQLite mirror")
+    args = parser.parse_args(argv)
+
+    conn = connect(args.db)
+    try:
+        rows = query_database(
+            conn,
+            args.database,
+            filter=json.loads(args.filter) if args.filter else None,
+            sorts=json.loads(args.sorts) if args.sorts else None,
+            limit=args.limit
+        )
+    except (ValueError, json.JSONDecodeError) as e:
+        print(f"❌ {e}")
+        return False
+
+    if args.json:
+        for row in rows:
+            row.pop("_properties", None)
+            print(json.dumps(row))
+    else:
+        if args.columns:
+            columns = [column.strip() for column in args.columns.split(",")]
+        else:
+            columns = list(get_column_types(conn, args.database))
+        print_table(rows, columns)
+        print(f"\n📋 {len(rows)} rows")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
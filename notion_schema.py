@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Notion Learning Tracker Schemas
+Workspace schema spec, live schema diffs, and a cache of database schemas
+kept in the state store so repeated runs skip databases.retrieve
+"""
+
+import sys
+import json
+import time
+import argparse
+
+from notion_state import StateStore
+
+# Seconds a cached schema is trusted before it is fetched again
+SCHEMA_TTL = 900
+
+# Declarative, versioned schema of all databases, properties and relations
+WORKSPACE_SPEC_FILE = "notion_workspace.json"
+
+# Keys allowed in the spec that are not part of the Notion property payload
+SPEC_ONLY_KEYS = {"renamed_from"}
+
+def load_workspace_spec(path=WORKSPACE_SPEC_FILE):
+    """Load the declarative workspace schema"""
+    with open(path, "r") as f:
+        return json.load(f)
+
+def property_payload(definition):
+    """Strip spec-only keys from a property definition"""
+    return {key: value for key, value in definition.items() if key not in SPEC_ONLY_KEYS}
+
+def property_type(definition):
+    """Return the Notion type of a property definition"""
+    return next(key for key in definition if key not in SPEC_ONLY_KEYS)
+
+def relation_properties(db_key, database_ids, spec):
+    """Build the relation property payloads of one database"""
+    relations = spec["databases"][db_key].get("relations", {})
+    return {
+        name: {"relation": {"database_id": database_ids[target]}}
+        for name, target in relations.items()
+    }
+
+def normalize_id(object_id):
+    """Compare Notion ids regardless of dashes"""
+    return (object_id or "").replace("-", "")
+
+def diff_database_schema(db_key, live, database_ids, spec, allow_removals=False):
+    """Compute the minimal schema change for one database
+
+    Returns (diff, payload): a structured description of the drift and the
+    properties argument for a single databases.update call.
+    """
+    db_spec = spec["databases"][db_key]
+    live_properties = live["properties"]
+    desired = dict(db_spec["properties"])
+    desired.update(relation_properties(db_key, database_ids, spec))
+
+    diff = {"added": [], "removed": [], "renamed": [], "new_options": {}, "changed": []}
+    payload = {}
+    rename_sources = set()
+
+    for name, definition in desired.items():
+        prop_type = property_type(definition)
+        current_name = name
+
+        if name not in live_properties:
+            sources = [old for old in definition.get("renamed_from", [])
+                       if old in live_properties and old not in desired]
+            if not sources:
+                diff["added"].append(name)
+                payload[name] = property_payload(definition)
+                continue
+            current_name = sources[0]
+            rename_sources.add(current_name)
+            diff["renamed"].append({"from": current_name, "to": name})
+            payload[current_name] = {"name": name}
+
+        live_prop = live_properties[current_name]
+        change = None
+        if live_prop["type"] != prop_type:
+            diff["changed"].append({"property": name, "from": live_prop["type"], "to": prop_type})
+            change = property_payload(definition)
+        elif prop_type in ("select", "multi_select"):
+            live_options = live_prop[prop_type].get("options", [])
+            live_names = {option["name"] for option in live_options}
+            new_options = [option for option in definition[prop_type].get("options", [])
+                           if option["name"] not in live_names]
+            if new_options:
+                diff["new_options"][name] = [option["name"] for option in new_options]
+                # Send the existing options too so none of them is dropped
+                kept = [{"name": option["name"], "color": option.get("color", "default")} for option in live_options]
+                change = {prop_type: {"options": kept + new_options}}
+        elif prop_type == "formula":
+            expected = "".join(definition["formula"]["expression"].split())
+            actual = "".join(live_prop["formula"].get("expression", "").split())
+            if expected != actual:
+                diff["changed"].append({"property": name, "from": "formula", "to": "formula"})
+                change = property_payload(definition)
+        elif prop_type == "relation":
+            if normalize_id(live_prop["relation"].get("database_id")) != normalize_id(definition["relation"]["database_id"]):
+                diff["changed"].append({"property": name, "from": "relation", "to": "relation"})
+                change = property_payload(definition)
+
+        if change:
+            payload.setdefault(current_name, {}).update(change)
+
+    for name in live_properties:
+        if name not in desired and name not in rename_sources:
+            diff["removed"].append(name)
+            if allow_removals:
+                payload[name] = None
+
+    return diff, payload
+
+def format_schema_diff(title, diff):
+    """Describe the drift of one database as printable lines"""
+    if not any(diff.values()):
+        return [f"✅ {title}: up to date"]
+
+    lines = [f"🔧 {title}:"]
+    for name in diff["added"]:
+        lines.append(f"   + {name}")
+    for name in diff["removed"]:
+        lines.append(f"   - {name}")
+    for rename in diff["renamed"]:
+        lines.append(f"   ~ {rename['from']} → {rename['to']}")
+    for name, options in diff["new_options"].items():
+        lines.append(f"   + {name} options: {', '.join(options)}")
+    for change in diff["changed"]:
+        lines.append(f"   ! {change['property']}: {change['from']} → {change['to']}")
+    return lines
+
+def print_schema_diff(title, diff):
+    """Print the drift of one database"""
+    print("\n".join(format_schema_diff(title, diff)))
+
+class SchemaCache:
+    """TTL cache of databases.retrieve results, persisted between runs"""
+
+    def __init__(self, notion, state=None, ttl=SCHEMA_TTL):
+        self.notion = notion
+        self.state = state or StateStore()
+        self.ttl = ttl
+        self.fetched = 0
+
+    def retrieve(self, database_id, refresh=False):
+        """Return the schema of a database, fetching it only when missing, expired or refreshed"""
+        if not refresh:
+            cached = self.state.get_schema(normalize_id(database_id))
+            if cached and time.time() - cached[2] < self.ttl:
+                return cached[0]
+
+        schema = self.notion.databases.retrieve(database_id=database_id)
+        self.fetched += 1
+        self.store(schema, database_id)
+        return schema
+
+    def cached(self, database_id):
+        """Return (schema, fresh) from the cache without fetching, or None if it is not cached"""
+        cached = self.state.get_schema(normalize_id(database_id))
+        if not cached:
+            return None
+        return cached[0], time.time() - cached[2] < self.ttl
+
+    def properties(self, database_id, refresh=False):
+        """Return the property definitions of a database"""
+        return self.retrieve(database_id, refresh=refresh)["properties"]
+
+    def store(self, schema, database_id=None):
+        """Cache a database object returned by retrieve, create or update"""
+        self.state.set_schema(normalize_id(database_id or schema["id"]), schema, time.time())
+
+    def invalidate(self, database_id=None):
+        """Forget one cached schema, or all of them"""
+        self.state.delete_schemas(normalize_id(database_id) if database_id else None)
+
+def main(argv=None):
+    """Command line entry point for inspecting or clearing the schema cache"""
+    parser = argparse.ArgumentParser(description="Inspect or clear the cached database schemas")
+    parser.add_argument("command", choices=["show", "invalidate"])
+    parser.add_argument("--database", help="Only invalidate this database id")
+    args = parser.parse_args(argv)
+
+    state = StateStore()
+    if args.command == "invalidate":
+        state.delete_schemas(normalize_id(args.database) if args.database else None)
+        print("🧹 Schema cache cleared")
+        return True
+
+    names = {normalize_id(database_id): key for key, database_id in state.get_database_ids().items()}
+    for key in names:
+        cached = state.get_schema(key)
+        if not cached:
+            print(f"⚪ {names[key]}: not cached")
+            continue
+        schema, last_edited_time, fetched_at = cached
+        age = time.time() - fetched_at
+        status = "fresh" if age < SCHEMA_TTL else "expired"
+        print(f"🟢 {names[key]}: {len(schema['properties'])} properties, edited {last_edited_time}, "
+              f"fetched {age:.0f}s ago ({status})")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
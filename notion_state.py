@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Notion Learning Tracker State Store
+Transactional SQLite store for database ids, page ids, payload hashes, sync state, schemas,
+rendered dashboards and run history
+"""
+
+import os
+import sys
+import atexit
+import json
+import sqlite3
+import argparse
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+STATE_DB = "notion_state.db"
+
+# Files written by earlier versions of the scripts, imported on first use
+LEGACY_DATABASE_IDS_FILE = "database_ids.json"
+LEGACY_PAGE_IDS_FILE = "page_ids.json"
+LEGACY_SYNC_STATE_FILE = "sync_state.json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS databases (
+    database_key TEXT PRIMARY KEY,
+    database_id TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    database_key TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    page_id TEXT NOT NULL,
+    payload_hash TEXT,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (database_key, record_id)
+);
+CREATE INDEX IF NOT EXISTS idx_pages_page_id ON pages (page_id);
+CREATE TABLE IF NOT EXISTS sync_state (
+    database_key TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    property TEXT NOT NULL,
+    value TEXT,
+    source TEXT NOT NULL,
+    synced_at TEXT NOT NULL,
+    PRIMARY KEY (database_key, record_id, property)
+);
+CREATE TABLE IF NOT EXISTS schemas (
+    database_id TEXT PRIMARY KEY,
+    last_edited_time TEXT,
+    schema TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rendered (
+    page_key TEXT PRIMARY KEY,
+    page_id TEXT NOT NULL,
+    content TEXT NOT NULL,
+    rendered_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    script TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    status TEXT NOT NULL,
+    details TEXT
+);
+"""
+
+def now():
+    """Current UTC time as an ISO string"""
+    return datetime.now(timezone.utc).isoformat()
+
+# Store path -> throwaway copy used instead of it during a dry run (None: no dry run)
+_scratch_copies = None
+
+def use_scratch_copies():
+    """Send every store's reads and writes to a throwaway copy of its database from now on"""
+    global _scratch_copies
+    if _scratch_copies is None:
+        _scratch_copies = {}
+        atexit.register(remove_scratch_copies)
+
+def remove_scratch_copies():
+    """Delete the throwaway copies made for a dry run"""
+    for copy_path in (_scratch_copies or {}).values():
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(copy_path + suffix):
+                os.remove(copy_path + suffix)
+
+def active_path(path):
+    """The database file a store at path currently uses"""
+    if _scratch_copies is None:
+        return path
+    if path not in _scratch_copies:
+        fd, copy_path = tempfile.mkstemp(prefix="notion_state_dry_run_", suffix=".db")
+        os.close(fd)
+        if os.path.exists(path):
+            # The backup API includes pages still in the WAL
+            source, target = sqlite3.connect(path), sqlite3.connect(copy_path)
+            source.backup(target)
+            source.close()
+            target.close()
+        _scratch_copies[path] = copy_path
+    return _scratch_copies[path]
+
+class StateStore:
+    """Embedded state store shared by all scripts (WAL mode, one connection per thread)"""
+
+    def __init__(self, path=STATE_DB, import_legacy=True):
+        self.path = path
+        self.local = threading.local()
+        if import_legacy and not self.get_database_ids():
+            self.import_legacy_files(quiet=True)
+
+    @property
+    def conn(self):
+        """The calling thread's connection, opened on first use (or when a dry run starts)"""
+        path = active_path(self.path)
+        conn = getattr(self.local, "conn", None)
+        if conn is None or self.local.path != path:
+            # isolation_level=None leaves transaction control to transaction()
+            conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self.local.conn = conn
+            self.local.path = path
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Run a block of writes atomically; BEGIN IMMEDIATE serialises concurrent writers"""
+        conn = self.conn
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # Database ids
+
+    def get_database_ids(self):
+        """Return the database key -> Notion database id map"""
+        rows = self.conn.execute("SELECT database_key, database_id FROM databases")
+        return {row["database_key"]: row["database_id"] for row in rows}
+
+    def set_database_ids(self, database_ids):
+        """Store database ids, replacing existing entries for the same keys"""
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO databases (database_key, database_id, updated_at) VALUES (?, ?, ?)",
+                [(key, database_id, now()) for key, database_id in database_ids.items()]
+            )
+
+    # Record id -> page id map
+
+    def get_page_ids(self):
+        """Return the {database key: {record id: page id}} map"""
+        page_ids = {}
+        for row in self.conn.execute("SELECT database_key, record_id, page_id FROM pages"):
+            page_ids.setdefault(row["database_key"], {})[row["record_id"]] = row["page_id"]
+        return page_ids
+
+    def get_page(self, database_key, record_id):
+        """Return the page row (page_id, payload_hash) of a record, or None"""
+        return self.conn.execute(
+            "SELECT page_id, payload_hash FROM pages WHERE database_key = ? AND record_id = ?",
+            (database_key, record_id)
+        ).fetchone()
+
+    def find_record(self, page_id):
+        """Return (database key, record id) for a page id, or None"""
+        row = self.conn.execute("SELECT database_key, record_id FROM pages WHERE page_id = ?", (page_id,)).fetchone()
+        return (row["database_key"], row["record_id"]) if row else None
+
+    def set_page(self, database_key, record_id, page_id, payload_hash=None):
+        """Remember the page of a record and the hash of the payload last written to it"""
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (database_key, record_id, page_id, payload_hash, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (database_key, record_id, page_id, payload_hash, now())
+            )
+
+    def delete_page(self, database_key, record_id):
+        """Forget the page of a record"""
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM pages WHERE database_key = ? AND record_id = ?", (database_key, record_id))
+
+    def replace_page_ids(self, page_ids):
+        """Make the stored page map match a {database key: {record id: page id}} map, keeping hashes"""
+        with self.transaction() as conn:
+            stored = self.get_page_ids()
+            for database_key, records in stored.items():
+                for record_id in records:
+                    if record_id not in page_ids.get(database_key, {}):
+                        conn.execute("DELETE FROM pages WHERE database_key = ? AND record_id = ?", (database_key, record_id))
+            for database_key, records in page_ids.items():
+                for record_id, page_id in records.items():
+                    if stored.get(database_key, {}).get(record_id) != page_id:
+                        conn.execute(
+                            "INSERT OR REPLACE INTO pages (database_key, record_id, page_id, payload_hash, updated_at) VALUES (?, ?, ?, NULL, ?)",
+                            (database_key, record_id, page_id, now())
+                        )
+
+    # Two-way sync state
+
+    def get_sync_state(self):
+        """Return {database key: {record id: {"properties": {property: {value, source, synced_at}}}}}"""
+        state = {}
+        for row in self.conn.execute("SELECT * FROM sync_state"):
+            record = state.setdefault(row["database_key"], {}).setdefault(row["record_id"], {"properties": {}})
+            record["properties"][row["property"]] = {
+                "value": json.loads(row["value"]),
+                "source": row["source"],
+                "synced_at": row["synced_at"]
+            }
+        return state
+
+    def replace_sync_state(self, state):
+        """Replace the stored sync state with a map shaped like get_sync_state()"""
+        rows = [
+            (database_key, record_id, prop, json.dumps(entry["value"]), entry["source"], entry["synced_at"])
+            for database_key, records in state.items()
+            for record_id, record in records.items()
+            for prop, entry in record.get("properties", {}).items()
+        ]
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM sync_state")
+            conn.executemany("INSERT INTO sync_state VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    # Cached database schemas
+
+    def get_schema(self, database_id):
+        """Return (schema, last_edited_time, fetched_at) of a cached schema, or None"""
+        row = self.conn.execute("SELECT * FROM schemas WHERE database_id = ?", (database_id,)).fetchone()
+        return (json.loads(row["schema"]), row["last_edited_time"], row["fetched_at"]) if row else None
+
+    def set_schema(self, database_id, schema, fetched_at):
+        """Cache a schema unless a newer version (by last_edited_time) is already stored"""
+        last_edited_time = schema.get("last_edited_time")
+        with self.transaction() as conn:
+            row = conn.execute("SELECT last_edited_time FROM schemas WHERE database_id = ?", (database_id,)).fetchone()
+            if row and row["last_edited_time"] and last_edited_time and row["last_edited_time"] > last_edited_time:
+                return False
+            conn.execute("INSERT OR REPLACE INTO schemas VALUES (?, ?, ?, ?)",
+                         (database_id, last_edited_time, json.dumps(schema), fetched_at))
+        return True
+
+    def delete_schemas(self, database_id=None):
+        """Drop one cached schema, or all of them"""
+        with self.transaction() as conn:
+            if database_id:
+                conn.execute("DELETE FROM schemas WHERE database_id = ?", (database_id,))
+            else:
+                conn.execute("DELETE FROM schemas")
+
+    # Rendered dashboard content
+
+    def get_rendered(self, page_key):
+        """Return (page_id, content blocks) of the last render of a dashboard page, or None"""
+        row = self.conn.execute("SELECT page_id, content FROM rendered WHERE page_key = ?", (page_key,)).fetchone()
+        return (row["page_id"], json.loads(row["content"])) if row else None
+
+    def get_rendered_pages(self):
+        """Return {page key: (page_id, content blocks)} of every rendered dashboard page"""
+        return {row["page_key"]: (row["page_id"], json.loads(row["content"]))
+                for row in self.conn.execute("SELECT page_key, page_id, content FROM rendered ORDER BY rendered_at")}
+
+    def set_rendered(self, page_key, page_id, content):
+        """Remember the blocks a dashboard page was last rendered with"""
+        with self.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO rendered VALUES (?, ?, ?, ?)",
+                         (page_key, page_id, json.dumps(content), now()))
+
+    # Run history
+
+    @contextmanager
+    def run(self, script):
+        """Record a script run; the yielded dict is saved as the run details"""
+        with self.transaction() as conn:
+            cursor = conn.execute("INSERT INTO runs (script, started_at, status) VALUES (?, ?, 'running')", (script, now()))
+        run_id = cursor.lastrowid
+        details = {}
+        status = "failed"
+        try:
+            yield details
+            status = details.pop("status", "completed")
+        finally:
+            with self.transaction() as conn:
+                conn.execute("UPDATE runs SET finished_at = ?, status = ?, details = ? WHERE id = ?",
+                             (now(), status, json.dumps(details), run_id))
+
+    def recent_runs(self, limit=10):
+        """Return the most recent runs, newest first"""
+        return [dict(row) for row in self.conn.execute("SELECT * FROM runs ORDER BY id DESC LIMIT ?", (limit,))]
+
+    # Legacy JSON files
+
+    def import_legacy_files(self, quiet=False):
+        """Import database_ids.json, page_ids.json and sync_state.json in one transaction"""
+        imported = []
+        with self.transaction():
+            if os.path.exists(LEGACY_DATABASE_IDS_FILE):
+                with open(LEGACY_DATABASE_IDS_FILE, "r") as f:
+                    self.set_database_ids(json.load(f))
+                imported.append(LEGACY_DATABASE_IDS_FILE)
+            if os.path.exists(LEGACY_PAGE_IDS_FILE):
+                with open(LEGACY_PAGE_IDS_FILE, "r") as f:
+                    self.replace_page_ids(json.load(f))
+                imported.append(LEGACY_PAGE_IDS_FILE)
+            if os.path.exists(LEGACY_SYNC_STATE_FILE):
+                with open(LEGACY_SYNC_STATE_FILE, "r") as f:
+                    self.replace_sync_state(json.load(f))
+                imported.append(LEGACY_SYNC_STATE_FILE)
+
+        if imported and not quiet:
+            print(f"✅ Imported {', '.join(imported)} into {self.path}")
+        elif imported:
+            print(f"📦 Imported {', '.join(imported)} into {self.path}", file=sys.stderr)
+        return imported
+
+def main(argv=None):
+    """Command line entry point for inspecting the state store"""
+    parser = argparse.ArgumentParser(description="Inspect the learning tracker state store")
+    parser.add_argument("command", choices=["show", "import"])
+    parser.add_argument("--db", default=STATE_DB, help="Path of the state store")
+    args = parser.parse_args(argv)
+
+    store = StateStore(args.db, import_legacy=args.command == "show")
+    if args.command == "import":
+        if not store.import_legacy_files():
+            print("⚠️ No legacy JSON files found")
+        return True
+
+    print("🗄️ Databases:")
+    for key, database_id in store.get_database_ids().items():
+        print(f"   {key}: {database_id}")
+    page_ids = store.get_page_ids()
+    print(f"📄 Pages: {sum(len(records) for records in page_ids.values())} mapped records")
+    for key, records in page_ids.items():
+        print(f"   {key}: {len(records)}")
+    print("🕒 Recent runs:")
+    for run in store.recent_runs():
+        print(f"   #{run['id']} {run['script']} {run['started_at']} → {run['status']}")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Notion Learning Tracker Two-Way Sync
+Merges edits between data/*.json and Notion, property by property
+"""
+
+import re
+import sys
+import json
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+
+import notion_data_populator as populator
+import notion_mirror
+from notion_blocks import CONTINUED_MARKER, rich_text, spill_rich_text
+from notion_mirror import flatten_property
+
+CONFLICT_POLICIES = ["newest", "local", "remote", "report"]
+
+# Record kind -> data file (the top-level key inside the file is the kind)
+DATA_FILES = {
+    "modules": "learning_modules.json",
+    "resources": "resources.json",
+    "projects": "projects.json"
+}
+
+# Record kind -> (JSON field, Notion property, property type) pairs kept in sync
+SYNC_FIELDS = {
+    "modules": [
+        ("name", "Module Name", "title"),
+        ("category", "Category", "select"),
+        ("phase", "Phase", "select"),
+        ("status", "Status", "select"),
+        ("priority", "Priority Level", "select"),
+        ("estimated_hours", "Estimated Hours", "number"),
+        ("actual_hours", "Actual Hours", "number"),
+        ("skills", "Skills", "multi_select"),
+        ("notes", "Notes", "rich_text"),
+        ("start_date", "Start Date", "date"),
+        ("completion_date", "Actual Completion", "date")
+    ],
+    "resources": [
+        ("name", "Resource Name", "title"),
+        ("type", "Type", "select"),
+        ("provider", "Provider", "rich_text"),
+        ("status", "Status", "select"),
+        ("priority", "Priority", "select"),
+        ("difficulty", "Difficulty", "select"),
+        ("cost", "Cost", "select"),
+        ("estimated_time", "Estimated Time", "rich_text"),
+        ("url", "URL", "url"),
+        ("rating", "Rating", "number"),
+        ("notes", "Notes", "rich_text")
+    ],
+    "projects": [
+        ("name", "Project Name", "title"),
+        ("description", "Description", "rich_text"),
+        ("status", "Status", "select"),
+        ("technologies", "Technologies Used", "multi_select"),
+        ("skills_applied", "Skills Applied", "multi_select"),
+        ("timeline", "Timeline", "rich_text"),
+        ("github_link", "GitHub Link", "url"),
+        ("demo_link", "Demo Link", "url"),
+        ("start_date", "Start Date", "date"),
+        ("completion_date", "Completion Date", "date")
+    ]
+}
+
+def to_property(prop_type, value):
+    """Build a Notion property payload from a JSON field value"""
+    if prop_type in ("title", "rich_text"):
+        return {prop_type: rich_text(value)}
+    if prop_type == "select":
+        return {"select": {"name": value} if value else None}
+    if prop_type == "multi_select":
+        return {"multi_select": [{"name": name} for name in value or []]}
+    if prop_type == "date":
+        return {"date": {"start": value} if value else None}
+    return {prop_type: value}
+
+def from_property(prop):
+    """Read a JSON field value from a Notion property"""
+    value = flatten_property(prop)
+    if prop.get("type") == "multi_select":
+        return json.loads(value)
+    return value
+
+def normalize(prop_type, value):
+    """Normalize a value so JSON and Notion representations compare equal"""
+    if prop_type == "multi_select":
+        return sorted(value or [])
+    if prop_type in ("title", "rich_text"):
+        return value or ""
+    if prop_type == "date" and value:
+        return value[:10] if value.endswith("T00:00:00.000Z") else value
+    return value if value != "" else None
+
+def continues_in_body(remote, local):
+    """Whether a remote text is the local text cut short, the rest having been moved to the page body"""
+    return isinstance(remote, str) and isinstance(local, str) and remote.endswith(CONTINUED_MARKER) \
+        and local.startswith(remote[:-len(CONTINUED_MARKER)])
+
+def reconcile(local, remote, base, policy, local_is_newer):
+    """Decide what to do with one property: None, "push", "pull" or "conflict"
+
+    Returns (action, winner) where winner is the side whose value is kept when
+    a conflict is resolved by the policy, or None if it is only reported.
+    """
+    if local == remote:
+        return None, None
+    if base is not None and local == base["value"]:
+        return "pull", None
+    if base is not None and remote == base["value"]:
+        return "push", None
+
+    # Both sides moved away from the last synced value (or there is none yet)
+    if policy == "local" or (policy == "newest" and local_is_newer):
+        return "conflict", "local"
+    if policy == "remote" or policy == "newest":
+        return "conflict", "remote"
+    return "conflict", None
+
+def load_sync_state():
+    """Load the last-synced property values and their provenance"""
+    return populator.state.get_sync_state()
+
+def save_sync_state(state):
+    """Persist the last-synced property values and their provenance"""
+    populator.state.replace_sync_state(state)
+
+def slugify(name):
+    """Turn a page title into a kebab-case record id"""
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+def title_key(name):
+    """Normalize a title so a record and its page match despite case and spacing"""
+    return " ".join((name or "").split()).casefold()
+
+def remember(record_state, prop, value, source):
+    """Record the synced value of a property and which side it came from"""
+    record_state.setdefault("properties", {})[prop] = {
+        "value": value,
+        "source": source,
+        "synced_at": datetime.now(timezone.utc).isoformat()
+    }
+
+def confirm_archived(conn, db_key, page_id):
+    """Ask Notion whether a mapped page missing from the mirror was archived
+
+    Returns (archived, row). A page that still exists is added to the mirror
+    and its row returned, so it is merged like any other.
+    """
+    page = populator.notion.pages.retrieve(page_id=page_id)
+    if page.get("archived") or page.get("in_trash"):
+        return True, None
+    with conn:
+        notion_mirror.upsert_page(conn, db_key, page)
+    return False, {"_page_id": page["id"], "_last_edited_time": page.get("last_edited_time"),
+                   "_properties": json.dumps(page.get("properties", {}))}
+
+def sync_kind(kind, conn, page_ids, state, policy, dry_run=False):
+    """Sync one record kind in both directions and return a summary dict"""
+    db_key, _ = populator.RECORD_TYPES[kind]
+    fields = SYNC_FIELDS[kind]
+    data_path = Path("data") / DATA_FILES[kind]
+    summary = {"pushed": 0, "pulled": 0, "matched": 0, "created": 0, "archived": 0, "imported": 0, "removed": 0,
+               "conflicts": []}
+
+    with open(data_path, "r") as f:
+        data = json.load(f)
+    local_records = {record["id"]: record for record in data.get(kind, []) if record.get("id")}
+    local_mtime = datetime.fromtimestamp(data_path.stat().st_mtime, timezone.utc).isoformat()
+
+    remote_pages = {row["_page_id"]: row for row in notion_mirror.read_pages(conn, db_key)}
+    kind_pages = page_ids.setdefault(db_key, {})
+    kind_state = state.setdefault(db_key, {})
+    record_by_page = {page_id: record_id for record_id, page_id in kind_pages.items()}
+    data_changed = False
+
+    # Records and pages never linked (e.g. written by a populate without a page map)
+    # are matched by title, so neither side is copied over as a duplicate
+    title_prop = fields[0][1]
+    unlinked = {}
+    for page_id, row in remote_pages.items():
+        if page_id not in record_by_page:
+            unlinked.setdefault(title_key(row.get(title_prop)), []).append(page_id)
+    for record_id, record in local_records.items():
+        candidates = unlinked.get(title_key(record.get("name")))
+        if record_id in kind_pages or not candidates:
+            continue
+        page_id = candidates.pop(0)
+        print(f"  🔗 Matched by title: {record['name']}")
+        summary["matched"] += 1
+        kind_pages[record_id] = page_id
+        record_by_page[page_id] = record_id
+        if not dry_run:
+            populator.state.set_page(db_key, record_id, page_id)
+
+    for record_id, record in local_records.items():
+        page_id = kind_pages.get(record_id)
+        record_state = kind_state.setdefault(record_id, {})
+
+        # Never synced: create the page and take every value from the JSON
+        if not page_id:
+            print(f"  ➕ Create in Notion: {record['name']}")
+            summary["created"] += 1
+            if not dry_run:
+                populator.create_record(kind, record, page_ids)
+                for field, prop, prop_type in fields:
+                    remember(record_state, prop, normalize(prop_type, record.get(field)), "local")
+            continue
+
+        row = remote_pages.get(page_id)
+        if row is None:
+            # Not in the mirror: only remove the record once Notion confirms the page was archived
+            try:
+                archived, row = confirm_archived(conn, db_key, page_id)
+            except Exception as e:
+                print(f"  ⚠️ Skipped {record['name']}: its page is not in the mirror and could not be checked - {e}")
+                continue
+        if row is None:
+            print(f"  🗑️ Remove locally (archived in Notion): {record['name']}")
+            summary["removed"] += 1
+            if not dry_run:
+                data[kind] = [r for r in data[kind] if r.get("id") != record_id]
+                kind_pages.pop(record_id, None)
+                kind_state.pop(record_id, None)
+                populator.state.delete_page(db_key, record_id)
+                data_changed = True
+            continue
+
+        remote_properties = json.loads(row["_properties"])
+        local_is_newer = local_mtime > (row["_last_edited_time"] or "")
+        push = {}
+
+        for field, prop, prop_type in fields:
+            if prop not in remote_properties:
+                continue
+            local = normalize(prop_type, record.get(field))
+            remote = normalize(prop_type, from_property(remote_properties[prop]))
+            base = record_state.get("properties", {}).get(prop)
+            # A text cut short in Notion stands for the full text it was pushed from
+            for full in (local, base["value"] if base else None):
+                if continues_in_body(remote, full):
+                    remote = full
+                    break
+            action, winner = reconcile(local, remote, base, policy, local_is_newer)
+
+            if action == "conflict":
+                summary["conflicts"].append({
+                    "record": record_id, "property": prop, "local": local, "remote": remote,
+                    "base": base["value"] if base else None, "resolution": winner or "unresolved"
+                })
+                if winner is None:
+                    continue
+                action = "push" if winner == "local" else "pull"
+
+            if action == "push":
+                push[prop] = to_property(prop_type, record.get(field))
+                if not dry_run:
+                    remember(record_state, prop, local, "local")
+            elif action == "pull":
+                print(f"  ⬇️ {record['name']}: {prop} → {remote!r}")
+                summary["pulled"] += 1
+                if not dry_run:
+                    record[field] = remote
+                    remember(record_state, prop, remote, "remote")
+                    data_changed = True
+            elif action is None and (base is None or base["value"] != local):
+                remember(record_state, prop, local, (base or {}).get("source", "local"))
+
+        if push:
+            print(f"  ⬆️ {record['name']}: {', '.join(push)}")
+            summary["pushed"] += len(push)
+            if not dry_run:
+                # Text beyond the rich text limits goes to the page body, as in populate
+                payload, children, moved = spill_rich_text(push)
+                populator.notion.pages.update(page_id=page_id, properties=payload)
+                populator.report_moved(record, moved)
+                populator.sync_moved_text(db_key, record_id, page_id, children, properties=push)
+
+    # Records deleted from the JSON since the last sync
+    for record_id in [record_id for record_id in kind_state if record_id not in local_records]:
+        if record_id in kind_pages:
+            print(f"  🗑️ Archive in Notion (removed from JSON): {record_id}")
+            summary["archived"] += 1
+            if not dry_run:
+                notion_mirror.delete_page(conn, db_key, kind_pages[record_id])
+                populator.archive_record(kind, record_id, page_ids)
+        if not dry_run:
+            kind_state.pop(record_id, None)
+
+    # Pages created directly in Notion become new JSON records
+    for page_id, row in remote_pages.items():
+        if page_id in record_by_page:
+            continue
+        remote_properties = json.loads(row["_properties"])
+        record = {}
+        for field, prop, prop_type in fields:
+            if prop in remote_properties:
+                record[field] = from_property(remote_properties[prop])
+        if not record.get("name"):
+            continue
+        record = {"id": slugify(record["name"]), **record}
+        if record["id"] in local_records:
+            continue
+        print(f"  📥 Import from Notion: {record['name']}")
+        summary["imported"] += 1
+        if not dry_run:
+            data[kind].append(record)
+            kind_pages[record["id"]] = page_id
+            populator.state.set_page(db_key, record["id"], page_id)
+            for field, prop, prop_type in fields:
+                if prop in remote_properties:
+                    remember(kind_state.setdefault(record["id"], {}), prop, normalize(prop_type, record.get(field)), "remote")
+            data_changed = True
+
+    if data_changed:
+        with open(data_path, "w") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+
+    return summary
+
+def sync(policy="newest", dry_run=False):
+    """Pull remote changes into the mirror, then merge both directions for every record kind
+
+    Returns a summary per record kind, or None if the mirror could not be refreshed.
+    """
+    print("🔄 Starting two-way sync...")
+    print("=" * 60)
+
+    conn = notion_mirror.connect()
+    print("\n📥 Refreshing local mirror...")
+    only = [populator.RECORD_TYPES[kind][0] for kind in DATA_FILES]
+    pulled = notion_mirror.pull(populator.notion, populator.database_ids, conn, only=only)
+    # A stale mirror would make every record it lacks look archived in Notion
+    failed = [db_key for db_key in only if db_key not in pulled]
+    if failed:
+        print(f"\n❌ Sync aborted: could not refresh {', '.join(failed)}; nothing was changed")
+        return None
+
+    page_ids = populator.load_page_ids()
+    state = load_sync_state()
+    summaries = {}
+    with populator.state.run("sync") as run:
+        for kind in DATA_FILES:
+            print(f"\n🔁 Syncing {kind}...")
+            try:
+                summaries[kind] = sync_kind(kind, conn, page_ids, state, policy, dry_run=dry_run)
+            finally:
+                # Page map changes are written as they happen; the merge bases once per kind
+                if not dry_run:
+                    save_sync_state(state)
+        run["policy"] = policy
+        run["dry_run"] = dry_run
+        run["conflicts"] = sum(len(summary["conflicts"]) for summary in summaries.values())
+
+    print("\n📋 Sync Summary")
+    print("=" * 60)
+    conflicts = []
+    for kind, summary in summaries.items():
+        conflicts.extend(summary["conflicts"])
+        print(f"{kind}: {summary['pushed']} pushed, {summary['pulled']} pulled, {summary['matched']} matched, "
+              f"{summary['created']} created, "
+              f"{summary['archived']} archived, {summary['imported']} imported, {summary['removed']} removed, "
+              f"{len(summary['conflicts'])} conflicts")
+
+    if conflicts:
+        print(f"\n⚠️ CONFLICTS ({len(conflicts)}, policy: {policy}):")
+        for conflict in conflicts:
+            print(f"   • {conflict['record']} / {conflict['property']}: local={conflict['local']!r} "
+                  f"remote={conflict['remote']!r} base={conflict['base']!r} → {conflict['resolution']}")
+
+    return summaries
+
+def main(argv=None):
+    """Command line entry point for two-way sync"""
+    parser = argparse.ArgumentParser(description="Two-way sync between data/*.json and Notion")
+    parser.add_argument("--policy", choices=CONFLICT_POLICIES, default="newest",
+                        help="How to resolve properties edited on both sides (default: newest edit wins)")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args(argv)
+
+    summaries = sync(policy=args.policy, dry_run=args.dry_run)
+    if summaries is None:
+        return False
+    unresolved = [c for s in summaries.values() for c in s["conflicts"] if c["resolution"] == "unresolved"]
+    return not unresolved
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -5,36 +5,125 @@ Validates that all databases and pages were created correctly
 """
 
 import os
+import sys
 import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
 from notion_client import Client
 from dotenv import load_dotenv
 
+from notion_api import DEFAULT_RATE, RateLimiter, SharedRateLimiter, create_client, percentile, shared_rate_limiting
+from notion_schema import SchemaCache, diff_database_schema, format_schema_diff, load_workspace_spec
+from notion_state import STATE_DB, StateStore
+
 # Load environment variables
 load_dotenv()
 
-# Initialize Notion client
-notion = Client(auth=os.environ["NOTION_TOKEN"])
-
-def validate_database_exists(database_id, database_name):
-    """Validate that a database exists and is accessible"""
+# Initialize rate-limited Notion client (safe to share between threads)
+notion = create_client()
+schemas = SchemaCache(notion)
+
+DATABASES = [
+    ("learning_modules", "Learning Modules"),
+    ("resources_library", "Resources Library"),
+    ("projects_portfolio", "Projects Portfolio"),
+    ("weekly_reflections", "Weekly Reflections")
+]
+
+# Database key -> (data file, top-level key) holding the records it should contain
+EXPECTED_RECORDS = {
+    "learning_modules": ("learning_modules.json", "modules"),
+    "resources_library": ("resources.json", "resources"),
+    "projects_portfolio": ("projects.json", "projects")
+}
+
+# Lightweight calls the probe can issue; database calls rotate over the databases
+PROBE_CALLS = {
+    "parent": lambda client, database_id: client.pages.retrieve(page_id=os.environ["NOTION_PARENT_PAGE_ID"]),
+    "retrieve": lambda client, database_id: client.databases.retrieve(database_id=database_id),
+    "query": lambda client, database_id: client.databases.query(database_id=database_id, page_size=1,
+                                                                filter_properties=["title"])
+}
+
+# Probe thresholds for declaring the workspace ready for a bulk load
+PROBE_MAX_ERROR_RATE = 0.01
+PROBE_MAX_P95 = 2.0
+
+def validate_database_schema(db_key, database_name, database_ids, spec):
+    """Compare a live database with the workspace spec; returns (passed, message, diff)
+
+    The diff lists properties missing from Notion (added), properties only in
+    Notion (removed), pending renames, missing select options and changed
+    types, formulas or relation targets.
+    """
     try:
-        database = notion.databases.retrieve(database_id=database_id)
-        print(f"✅ {database_name}: Found with {len(database['properties'])} properties")
-        return True
+        database = schemas.retrieve(database_ids[db_key])
     except Exception as e:
-        print(f"❌ {database_name}: Error - {e}")
-        return False
+        return False, f"❌ {database_name}: Error - {e}", None
+
+    diff, _ = diff_database_schema(db_key, database, database_ids, spec)
+    if not any(diff.values()):
+        return True, f"✅ {database_name}: Found with {len(database['properties'])} properties, matches the schema", diff
+    # format_schema_diff starts with its own heading line; the details follow it
+    details = format_schema_diff(database_name, diff)[1:]
+    return False, "\n".join([f"❌ {database_name}: schema drift"] + details), diff
+
+def count_pages(database_id):
+    """Count every page of a database, fetching only the title property"""
+    count = 0
+    cursor = None
+    while True:
+        kwargs = {"start_cursor": cursor} if cursor else {}
+        # The title property always has the id "title"; skipping the others keeps pages small
+        response = notion.databases.query(database_id=database_id, page_size=100,
+                                          filter_properties=["title"], **kwargs)
+        count += len(response["results"])
+        if not response.get("has_more"):
+            return count
+        cursor = response["next_cursor"]
+
+def expected_record_count(db_key):
+    """Number of records the local JSON data holds for a database, or None if it has no data file"""
+    if db_key not in EXPECTED_RECORDS:
+        return None
+    filename, key = EXPECTED_RECORDS[db_key]
+    try:
+        with open(Path("data") / filename, "r") as f:
+            return len(json.load(f).get(key, []))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
 
-def validate_database_has_data(database_id, database_name):
-    """Check if database has entries"""
+def validate_database_has_data(database_id, database_name, expected=None):
+    """Count a database's entries and compare them with the local records; returns (passed, message)"""
     try:
-        response = notion.databases.query(database_id=database_id, page_size=10)
-        entry_count = len(response['results'])
-        print(f"📊 {database_name}: {entry_count} entries found")
-        return entry_count > 0
+        entry_count = count_pages(database_id)
     except Exception as e:
-        print(f"❌ {database_name} data check failed: {e}")
-        return False
+        return False, f"❌ {database_name} data check failed: {e}"
+
+    if expected is None:
+        return entry_count > 0, f"{'📊' if entry_count else '❌'} {database_name}: {entry_count} entries found"
+    if entry_count < expected:
+        return False, f"❌ {database_name}: {entry_count} of {expected} records populated (incomplete)"
+    if entry_count > expected:
+        return True, f"⚠️ {database_name}: {entry_count} entries for {expected} records (duplicates or pages added in Notion?)"
+    return True, f"📊 {database_name}: {entry_count} of {expected} records populated"
+
+def check_databases(check, database_ids):
+    """Run one check for every database concurrently and print the results in order"""
+    def run(database):
+        db_key, db_name = database
+        if db_key not in database_ids:
+            return False, f"❌ {db_name}: ID not found in {STATE_DB}"
+        return check(db_key, db_name)
+
+    with ThreadPoolExecutor(max_workers=len(DATABASES)) as pool:
+        results = list(pool.map(run, DATABASES))
+    for _, message in results:
+        print(message)
+    return all(passed for passed, _ in results)
 
 def validate_page_exists(page_id, page_name):
     """Validate that a page exists and is accessible"""
@@ -69,7 +158,6 @@ def validate_files():
     print("-" * 40)
 
     required_files = [
-        "database_ids.json",
         "learning_plan.md",
         ".env"
     ]
@@ -84,62 +172,52 @@ def validate_files():
 
     return len(missing_files) == 0
 
-def validate_databases():
-    """Validate all databases exist and have correct structure"""
+def validate_databases(diffs=None):
+    """Validate all databases exist and match the workspace schema
+
+    When diffs is a dict, the structured schema diff of every database is
+    stored in it by database key.
+    """
     print("\n🗄️ Validating Databases...")
     print("-" * 40)
 
-    try:
-        with open("database_ids.json", "r") as f:
-            database_ids = json.load(f)
-    except FileNotFoundError:
-        print("❌ database_ids.json not found. Run notion_database_creator.py first.")
+    database_ids = StateStore().get_database_ids()
+    if not database_ids:
+        print(f"❌ No database IDs in {STATE_DB}. Run notion_database_creator.py first.")
         return False
 
-    databases = [
-        ("learning_modules", "Learning Modules"),
-        ("resources_library", "Resources Library"),
-        ("projects_portfolio", "Projects Portfolio"),
-        ("weekly_reflections", "Weekly Reflections")
-    ]
+    try:
+        spec = load_workspace_spec()
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"❌ Could not load the workspace schema: {e}")
+        return False
 
-    all_valid = True
-    for db_key, db_name in databases:
-        if db_key in database_ids:
-            if not validate_database_exists(database_ids[db_key], db_name):
-                all_valid = False
-        else:
-            print(f"❌ {db_name}: ID not found in database_ids.json")
-            all_valid = False
+    def check(db_key, db_name):
+        passed, message, diff = validate_database_schema(db_key, db_name, database_ids, spec)
+        if diffs is not None and diff is not None:
+            diffs[db_key] = diff
+        return passed, message
 
-    return all_valid
+    passed = check_databases(check, database_ids)
+    if not passed:
+        print("💡 Run 'python notion_database_creator.py migrate --dry-run' to review the fix")
+    return passed
 
 def validate_data():
     """Check if databases have been populated with data"""
     print("\n📊 Validating Data Population...")
     print("-" * 40)
 
-    try:
-        with open("database_ids.json", "r") as f:
-            database_ids = json.load(f)
-    except FileNotFoundError:
-        print("❌ database_ids.json not found.")
+    database_ids = StateStore().get_database_ids()
+    if not database_ids:
+        print(f"❌ No database IDs in {STATE_DB}.")
         return False
 
-    databases = [
-        ("learning_modules", "Learning Modules"),
-        ("resources_library", "Resources Library"),
-        ("projects_portfolio", "Projects Portfolio"),
-        ("weekly_reflections", "Weekly Reflections")
-    ]
-
-    all_have_data = True
-    for db_key, db_name in databases:
-        if db_key in database_ids:
-            if not validate_database_has_data(database_ids[db_key], db_name):
-                all_have_data = False
-
-    return all_have_data
+    return check_databases(
+        lambda db_key, db_name: validate_database_has_data(database_ids[db_key], db_name,
+                                                           expected_record_count(db_key)),
+        database_ids
+    )
 
 def validate_notion_connection():
     """Test basic Notion API connection"""
@@ -156,23 +234,199 @@ def validate_notion_connection():
         print(f"❌ Notion API connection failed: {e}")
         return False
 
-def run_comprehensive_validation():
-    """Run all validation checks"""
+def latency_stats(samples):
+    """Summarise probe samples as request, error and latency figures"""
+    latencies = [sample["latency"] for sample in samples if sample["status"] == "ok"]
+    errors = sum(1 for sample in samples if sample["status"] == "error")
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "throttled": len(samples) - len(latencies) - errors,
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "max": max(latencies) if latencies else None,
+        "sum": sum(latencies)
+    }
+
+def probe(calls=tuple(PROBE_CALLS), iterations=10, concurrency=3, rate=DEFAULT_RATE,
+          max_error_rate=PROBE_MAX_ERROR_RATE, max_p95=PROBE_MAX_P95):
+    """Issue the probe calls iterations times and measure latency, errors and throttling
+
+    The probe takes its permits from the budget its token shares with other
+    processes, at the given rate, but sends through a plain client, so 429s
+    and latencies are observed exactly as the API returns them instead of
+    being retried. Returns the report dict.
+    """
+    database_ids = list(StateStore().get_database_ids().values())
+    if not database_ids:
+        calls = [name for name in calls if name == "parent"]
+        print(f"⚠️ No database IDs in {STATE_DB}; probing the parent page only")
+
+    token = os.environ["NOTION_TOKEN"]
+    client = Client(auth=token)
+    limiter = SharedRateLimiter(token, rate=rate, burst=concurrency) if shared_rate_limiting() \
+        else RateLimiter(rate=rate, burst=concurrency)
+    jobs = [(name, database_ids[i % len(database_ids)] if database_ids else None)
+            for i in range(iterations) for name in calls]
+
+    def run(job):
+        name, database_id = job
+        waited = limiter.acquire()
+        started = time.perf_counter()
+        sample = {"call": name, "waited": waited, "status": "ok", "retry_after": None}
+        try:
+            PROBE_CALLS[name](client, database_id)
+        except Exception as e:
+            status = getattr(e, "status", None)
+            sample["status"] = "throttled" if status == 429 else "error"
+            sample["error"] = str(e)
+            if status == 429:
+                sample["retry_after"] = float(e.headers.get("Retry-After", 0))
+        sample["latency"] = time.perf_counter() - started
+        return sample
+
+    print(f"📡 Probing {', '.join(calls)} × {iterations} (concurrency {concurrency}, {rate:g} req/s)...")
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(run, jobs))
+    elapsed = time.perf_counter() - started
+
+    throttled = [sample for sample in samples if sample["status"] == "throttled"]
+    overall = latency_stats(samples)
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "calls": {name: latency_stats([s for s in samples if s["call"] == name]) for name in calls},
+        "overall": overall,
+        "rate_limit": {
+            "configured_rate": rate,
+            "achieved_rate": len(samples) / elapsed if elapsed else 0.0,
+            "throttled": len(throttled),
+            # Share of requests the API accepted without a 429 at the configured pace
+            "headroom": 1 - len(throttled) / len(samples) if samples else 1.0,
+            "max_retry_after": max((s["retry_after"] for s in throttled), default=0.0),
+            "limiter_wait": sum(sample["waited"] for sample in samples)
+        },
+        "errors": sorted({sample["error"] for sample in samples if "error" in sample})
+    }
+
+    reasons = []
+    if throttled:
+        reasons.append(f"{len(throttled)} requests rate limited (Retry-After up to {report['rate_limit']['max_retry_after']:g}s)")
+    if overall["error_rate"] > max_error_rate:
+        reasons.append(f"error rate {overall['error_rate']:.1%} above {max_error_rate:.1%}")
+    if overall["p95"] is not None and overall["p95"] > max_p95:
+        reasons.append(f"p95 latency {overall['p95']:.2f}s above {max_p95:g}s")
+    if overall["p95"] is None:
+        reasons.append("no successful requests")
+    report["ready"] = not reasons
+    report["reasons"] = reasons
+    return report
+
+def format_seconds(value):
+    """Format a latency in milliseconds, or a dash when there is none"""
+    return f"{value * 1000:.0f}ms" if value is not None else "-"
+
+def print_probe_report(report):
+    """Print the probe results per call and the bulk-load verdict"""
+    print(f"\n{'Call':<10} {'Requests':>8} {'Errors':>7} {'429s':>5} {'p50':>8} {'p95':>8} {'p99':>8}")
+    rows = list(report["calls"].items()) + [("overall", report["overall"])]
+    for name, stats in rows:
+        print(f"{name:<10} {stats['requests']:>8} {stats['errors']:>7} {stats['throttled']:>5} {format_seconds(stats['p50']):>8} "
+              f"{format_seconds(stats['p95']):>8} {format_seconds(stats['p99']):>8}")
+
+    rate_limit = report["rate_limit"]
+    print(f"\n🚦 Rate limit: {rate_limit['throttled']} throttled, headroom {rate_limit['headroom']:.0%}, "
+          f"{rate_limit['achieved_rate']:.1f} of {rate_limit['configured_rate']:g} req/s")
+    for error in report["errors"]:
+        print(f"   ❌ {error}")
+
+    if report["ready"]:
+        print("\n✅ Workspace is ready for a bulk load")
+    else:
+        print("\n⏳ Wait before a bulk load: " + "; ".join(report["reasons"]))
+
+def write_prometheus(report, path):
+    """Write the probe results in the Prometheus text format (for the node_exporter textfile collector)"""
+    lines = [
+        "# HELP notion_probe_latency_seconds Latency of successful Notion probe calls.",
+        "# TYPE notion_probe_latency_seconds summary"
+    ]
+    for name, stats in report["calls"].items():
+        for key, quantile in (("p50", "0.5"), ("p95", "0.95"), ("p99", "0.99")):
+            if stats[key] is not None:
+                lines.append(f'notion_probe_latency_seconds{{call="{name}",quantile="{quantile}"}} {stats[key]:.6f}')
+        lines.append(f'notion_probe_latency_seconds_sum{{call="{name}"}} {stats["sum"]:.6f}')
+        lines.append(f'notion_probe_latency_seconds_count{{call="{name}"}} {stats["requests"] - stats["errors"] - stats["throttled"]}')
+
+    lines += ["# HELP notion_probe_error_ratio Share of probe calls that failed (429s excluded).",
+              "# TYPE notion_probe_error_ratio gauge"]
+    for name, stats in report["calls"].items():
+        lines.append(f'notion_probe_error_ratio{{call="{name}"}} {stats["error_rate"]:.6f}')
+
+    rate_limit = report["rate_limit"]
+    gauges = [
+        ("notion_probe_throttled_requests", "Probe calls answered with 429.", rate_limit["throttled"]),
+        ("notion_probe_rate_limit_headroom", "Share of probe calls accepted without a 429.", rate_limit["headroom"]),
+        ("notion_probe_retry_after_seconds", "Longest Retry-After seen during the probe.", rate_limit["max_retry_after"]),
+        ("notion_probe_ready", "1 if the workspace can take a bulk load.", int(report["ready"])),
+        ("notion_probe_timestamp_seconds", "When the probe finished.", time.time())
+    ]
+    for name, description, value in gauges:
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} gauge", f"{name} {value}"]
+
+    # Write then rename so the collector never reads a partial file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+
+def run_probe(args):
+    """Run the probe from command line arguments and write its outputs"""
+    print("📡 Notion Learning Tracker - Health Probe")
+    print("=" * 60)
+
+    report = probe(calls=args.calls, iterations=args.iterations, concurrency=args.concurrency, rate=args.rate,
+                   max_error_rate=args.max_error_rate, max_p95=args.max_p95)
+    print_probe_report(report)
+
+    if args.probe_output:
+        with open(args.probe_output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Probe report written to {args.probe_output}")
+    if args.prometheus:
+        write_prometheus(report, args.prometheus)
+        print(f"📝 Prometheus metrics written to {args.prometheus}")
+    return report["ready"]
+
+def run_comprehensive_validation(schema_only=False, diff_output=None):
+    """Run all validation checks (or only the schema check) and return whether all passed"""
     print("🔍 Notion Learning Tracker - System Validation")
     print("=" * 60)
 
+    diffs = {}
     checks = [
         ("Environment Setup", validate_environment),
         ("File Existence", validate_files),
         ("Notion Connection", validate_notion_connection),
-        ("Database Structure", validate_databases),
+        ("Database Structure", lambda: validate_databases(diffs)),
         ("Data Population", validate_data)
     ]
+    if schema_only:
+        checks = [check for check in checks if check[0] == "Database Structure"]
 
     results = {}
     for check_name, check_function in checks:
         results[check_name] = check_function()
 
+    if diff_output:
+        with open(diff_output, "w") as f:
+            json.dump({"drift": any(any(diff.values()) for diff in diffs.values()), "databases": diffs}, f, indent=2)
+        print(f"\n📝 Schema diff written to {diff_output}")
+
     # Summary
     print("\n📋 Validation Summary")
     print("=" * 60)
@@ -195,14 +449,35 @@ def run_comprehensive_validation():
         print("\n⚠️ Some validations failed. Please address the issues above.")
         print("\n🔧 Common fixes:")
         print("1. Check your .env file has the correct tokens")
-        print("2. Ensure database_ids.json exists (run notion_database_creator.py)")
+        print("2. Ensure database IDs are stored in notion_state.db (run notion_database_creator.py)")
         print("3. Verify Notion integration has proper permissions")
 
     return all_passed
 
-def main():
+def main(argv=None):
     """Main validation function"""
-    return run_comprehensive_validation()
+    parser = argparse.ArgumentParser(description="Validate the Notion learning tracker setup")
+    parser.add_argument("--schema-only", action="store_true", help="Only compare the databases with the workspace schema")
+    parser.add_argument("--diff-output", help="Write the structured schema diff to this JSON file")
+    probe_group = parser.add_argument_group("health probe")
+    probe_group.add_argument("--probe", action="store_true", help="Measure API latency and headroom instead of validating")
+    probe_group.add_argument("--calls", nargs="+", choices=list(PROBE_CALLS), default=list(PROBE_CALLS),
+                             help="Probe calls to issue (default: all)")
+    probe_group.add_argument("--iterations", type=int, default=10, help="Times each call is issued (default: 10)")
+    probe_group.add_argument("--concurrency", type=int, default=3, help="Calls in flight at once (default: 3)")
+    probe_group.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                             help=f"Requests per second to pace the probe at (default: {DEFAULT_RATE:g})")
+    probe_group.add_argument("--max-error-rate", type=float, default=PROBE_MAX_ERROR_RATE,
+                             help=f"Highest error rate still ready for a bulk load (default: {PROBE_MAX_ERROR_RATE:g})")
+    probe_group.add_argument("--max-p95", type=float, default=PROBE_MAX_P95,
+                             help=f"Highest p95 latency in seconds still ready for a bulk load (default: {PROBE_MAX_P95:g})")
+    probe_group.add_argument("--probe-output", help="Write the probe report to this JSON file")
+    probe_group.add_argument("--prometheus", help="Write the probe metrics to this Prometheus text file")
+    args = parser.parse_args(argv)
+
+    if args.probe:
+        return run_probe(args)
+    return run_comprehensive_validation(schema_only=args.schema_only, diff_output=args.diff_output)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(0 if main() else 1)
\ No newline at end of file
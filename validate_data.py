@@ -6,10 +6,14 @@ Validates JSON data against schemas and ensures backward compatibility
 
 import json
 import sys
+import argparse
 from pathlib import Path
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Optional, Tuple
 import jsonschema
 from jsonschema import validate, ValidationError, Draft7Validator
+from jsonschema.exceptions import best_match
+
+from notion_profile import Profiler, stage
 
 class DataValidator:
     """Validates learning tracker data for consistency and compatibility"""
@@ -19,6 +23,8 @@ class DataValidator:
         self.schemas_dir = self.data_dir / "schemas"
         self.errors = []
         self.warnings = []
+        # Record kind -> compiled item schema, so streaming validation loads each schema once
+        self.record_validators: Dict[str, Draft7Validator] = {}
         
     def load_json_file(self, filepath: Path) -> Dict[str, Any]:
         """Load and parse a JSON file"""
@@ -41,6 +47,39 @@ class DataValidator:
             self.errors.append(f"Schema validation failed for {filename}: {e.message}")
             return False
     
+    def validate_record(self, kind: str, record: Dict[str, Any]) -> bool:
+        """Validate a single module, resource or project against its item schema"""
+        schema_files = {
+            "modules": "learning_module.schema.json",
+            "resources": "resource.schema.json",
+            "projects": "project.schema.json"
+        }
+        validator = self.record_validators.get(kind)
+        if validator is None:
+            schema = self.load_json_file(self.schemas_dir / schema_files[kind])
+            if not schema:
+                return False
+            validator = self.record_validators[kind] = Draft7Validator(schema["properties"][kind]["items"])
+        
+        label = f"{kind[:-1]} '{record.get('id', record.get('name'))}'"
+        error = best_match(validator.iter_errors(record))
+        if error is not None:
+            self.errors.append(f"Schema validation failed for {label}: {error.message}")
+            return False
+        
+        # Record-level checks shared with the full-file validations
+        for url_field in ["url", "github_link", "demo_link"]:
+            url = record.get(url_field)
+            if url and not (url.startswith("http://") or url.startswith("https://")):
+                self.warnings.append(f"{label} has invalid {url_field}")
+        
+        rating = record.get("rating")
+        if rating is not None and (rating < 1 or rating > 5):
+            self.errors.append(f"{label} has invalid rating: {rating}")
+            return False
+        
+        return True
+    
     def validate_modules(self) -> bool:
         """Validate learning modules data"""
         print("📚 Validating learning modules...")
@@ -291,8 +330,8 @@ class DataValidator:
             if self.warnings:
                 print("   • Review warnings for data quality improvements")
     
-    def run(self) -> bool:
-        """Run all validations"""
+    def run(self, profiler: Optional[Profiler] = None) -> bool:
+        """Run all validations, profiling each one when a profiler is given"""
         print("🔍 Starting Data Validation...")
         print("=" * 60)
         
@@ -304,12 +343,15 @@ class DataValidator:
         
         # Run all validations
         validations = [
-            self.validate_modules(),
-            self.validate_resources(),
-            self.validate_projects(),
-            self.check_legacy_compatibility(),
-            self.check_data_consistency()
+            ("validate_modules", self.validate_modules),
+            ("validate_resources", self.validate_resources),
+            ("validate_projects", self.validate_projects),
+            ("legacy_compatibility", self.check_legacy_compatibility),
+            ("data_consistency", self.check_data_consistency)
         ]
+        for name, validation in validations:
+            with stage(profiler, name):
+                validation()
         
         # Generate report
         self.generate_report()
@@ -317,10 +359,18 @@ class DataValidator:
         # Return success if no errors
         return len(self.errors) == 0
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """Main entry point"""
+    parser = argparse.ArgumentParser(description="Validate the JSON data files")
+    parser.add_argument("--profile", nargs="?", const="validate_profile", metavar="PREFIX",
+                        help="Profile each validation; writes PREFIX.txt and PREFIX.prof (default prefix: validate_profile)")
+    args = parser.parse_args(argv)
+    
+    profiler = Profiler(args.profile) if args.profile else None
     validator = DataValidator()
-    success = validator.run()
+    success = validator.run(profiler)
+    if profiler:
+        profiler.write()
     
     # Exit with appropriate code
     sys.exit(0 if success else 1)